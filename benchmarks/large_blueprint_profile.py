@@ -0,0 +1,183 @@
+########
+# Copyright (c) 2015 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+"""
+Profiles parsing a generated blueprint with many node templates, which
+imports a types library with derived node and relationship types, plugins,
+policy types, policy triggers and groups. Prints the time and the memory
+(max RSS growth) of the parse, measured in a process of its own, and the
+functions which take the most time in it.
+
+Usage: python benchmarks/large_blueprint_profile.py [NODES_COUNT] [TOP]
+"""
+
+import cProfile
+import os
+import pstats
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from dsl_parser import parser
+
+TYPES = """
+tosca_definitions_version: cloudify_dsl_1_1
+plugins:
+    test_plugin:
+        executor: central_deployment_agent
+        source: dummy
+    agent_plugin:
+        executor: host_agent
+        source: dummy
+node_types:
+    cloudify.nodes.Compute:
+        interfaces:
+            lifecycle:
+                create: test_plugin.create
+    base_type:
+        properties:
+            key: {}
+            list:
+                default: [1, 2]
+            dict:
+                default: {a: {b: c}}
+        interfaces:
+            lifecycle:
+                create: agent_plugin.create
+                start:
+                    implementation: agent_plugin.start
+                    inputs:
+                        port:
+                            default: 8080
+    test_type:
+        derived_from: base_type
+        properties:
+            other:
+                default: other
+        interfaces:
+            lifecycle:
+                configure: agent_plugin.configure
+relationships:
+    cloudify.relationships.depends_on:
+        source_interfaces:
+            cloudify.interfaces.relationship_lifecycle:
+                preconfigure: test_plugin.preconfigure
+    cloudify.relationships.contained_in:
+        derived_from: cloudify.relationships.depends_on
+    cloudify.relationships.connected_to:
+        derived_from: cloudify.relationships.depends_on
+policy_types:
+    test_policy:
+        source: source
+        properties:
+            metric:
+                default: [1, 2]
+policy_triggers:
+    test_trigger:
+        source: source
+        parameters:
+            threshold:
+                default: 5
+"""
+
+HEADER = """
+tosca_definitions_version: cloudify_dsl_1_1
+imports: [types.yaml]
+groups:
+    group:
+        members: [host0]
+        policies:
+            policy:
+                type: test_policy
+                triggers:
+                    trigger:
+                        type: test_trigger
+node_templates:
+"""
+
+HOST_TEMPLATE = """
+    host{0}:
+        type: cloudify.nodes.Compute
+"""
+
+NODE_TEMPLATE = """
+    node{0}:
+        type: test_type
+        properties:
+            key: value {0}
+        relationships:
+            -   type: cloudify.relationships.contained_in
+                target: host{1}
+            -   type: cloudify.relationships.connected_to
+                target: node{2}
+"""
+
+
+def _write_blueprint(directory, nodes_count):
+    with open(os.path.join(directory, 'types.yaml'), 'w') as f:
+        f.write(TYPES)
+    path = os.path.join(directory, 'blueprint.yaml')
+    hosts_count = max(nodes_count / 10, 1)
+    with open(path, 'w') as f:
+        f.write(HEADER)
+        for i in range(hosts_count):
+            f.write(HOST_TEMPLATE.format(i))
+        for i in range(nodes_count):
+            f.write(NODE_TEMPLATE.format(i, i % hosts_count,
+                                         (i + 1) % nodes_count))
+    return path
+
+
+def _measure(path):
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    started = time.time()
+    parser.parse_from_path(path)
+    elapsed = time.time() - started
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print '{0} {1}'.format(elapsed, rss_after - rss_before)
+
+
+def _profile(path, top):
+    profile = cProfile.Profile()
+    profile.runcall(parser.parse_from_path, path)
+    stats = pstats.Stats(profile, stream=sys.stdout)
+    stats.sort_stats('tottime').print_stats(top)
+
+
+def main():
+    if sys.argv[1:2] == ['--measure']:
+        _measure(sys.argv[2])
+        return
+    nodes_count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    top = int(sys.argv[2]) if len(sys.argv) > 2 else 15
+    temp_dir = tempfile.mkdtemp()
+    try:
+        path = _write_blueprint(temp_dir, nodes_count)
+        output = subprocess.check_output(
+            [sys.executable, __file__, '--measure', path])
+        elapsed, rss_growth = output.split()
+        print 'nodes: {0}'.format(nodes_count)
+        print 'time: {0:.2f}s, max rss growth: {1:.1f}MB'.format(
+            float(elapsed), int(rss_growth) / 1024.0)
+        _profile(path, top)
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+if __name__ == '__main__':
+    main()
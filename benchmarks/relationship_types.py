@@ -0,0 +1,123 @@
+########
+# Copyright (c) 2015 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+"""
+Compares resolving the relationship types of a generated library, in
+which every relationship type is derived from a chain of ancestors, one
+type at a time (recursively re-resolving and copying its ancestors) and
+through the complete types table of the parser, as _process_relationships
+does (without validating operations), and times a whole parse of it.
+
+Usage: python benchmarks/relationship_types.py [TYPES_COUNT] [DEPTH]
+"""
+
+import copy
+import sys
+import time
+
+from dsl_parser import parser
+
+HEADER = """
+tosca_definitions_version: cloudify_dsl_1_1
+plugins:
+    test_plugin:
+        executor: central_deployment_agent
+        source: dummy
+node_templates: {}
+relationships:
+"""
+
+RELATIONSHIP_TYPE = """
+    rel{0}_{1}:
+        properties:
+            prop{1}:
+                default: [{1}, {1}]
+        source_interfaces:
+            source{1}:
+                op{1}:
+                    implementation: test_plugin.op{1}
+                    inputs:
+                        input{1}:
+                            default: {{key: value}}
+        target_interfaces:
+            target:
+                op{1}: test_plugin.op{1}
+"""
+
+
+def _blueprint(types_count, depth):
+    relationship_types = []
+    for chain in range(types_count / depth):
+        for level in range(depth):
+            relationship_type = RELATIONSHIP_TYPE.format(chain, level)
+            if level:
+                relationship_type += '        derived_from: rel{0}_{1}\n' \
+                    .format(chain, level - 1)
+            relationship_types.append(relationship_type)
+    return HEADER + ''.join(relationship_types)
+
+
+def _recursive(relationship_types):
+    processed_relationships = {}
+    for name, relationship_type in relationship_types.iteritems():
+        complete_relationship = parser.extract_complete_relationship_type(
+            relationship_type=relationship_type,
+            relationship_type_name=name,
+            relationship_types=relationship_types)
+        processed_relationships[name] = copy.deepcopy(complete_relationship)
+        processed_relationships[name]['name'] = name
+    return processed_relationships
+
+
+def _complete_types_table(relationship_types):
+    processed_relationships = {}
+    complete_types = parser._complete_relationship_types(relationship_types)
+    for name in relationship_types:
+        processed_relationships[name] = copy.deepcopy(
+            complete_types.get(name))
+        processed_relationships[name]['name'] = name
+    return processed_relationships
+
+
+def _time(func, relationship_types, repeats):
+    elapsed = []
+    for _ in range(repeats):
+        types = copy.deepcopy(relationship_types)
+        started = time.time()
+        result = func(types)
+        elapsed.append(time.time() - started)
+    return min(elapsed), result
+
+
+def main():
+    types_count = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    depth = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    blueprint = _blueprint(types_count, depth)
+    relationship_types = parser._load_yaml(
+        blueprint, 'Failed parsing blueprint')[parser.RELATIONSHIPS]
+    print 'relationship types: {0}, depth {1}'.format(
+        len(relationship_types), depth)
+    recursive_time, expected = _time(_recursive, relationship_types, 3)
+    table_time, result = _time(_complete_types_table, relationship_types, 3)
+    assert expected == result
+    print '{0:12} {1:.3f}s'.format('recursive', recursive_time)
+    print '{0:12} {1:.3f}s'.format('table', table_time)
+    started = time.time()
+    parser.parse(blueprint)
+    print '{0:12} {1:.3f}s'.format('whole parse', time.time() - started)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+########
+# Copyright (c) 2015 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+"""
+Compares parsing a directory of blueprints, which share a types import,
+with cold caches and again once they are cached.
+
+Usage: python benchmarks/repeated_parse_from_path.py [BLUEPRINTS] [NODES]
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from dsl_parser import document_cache
+from dsl_parser import file_cache
+from dsl_parser import parser
+
+TYPES = """
+plugins:
+    test_plugin:
+        executor: central_deployment_agent
+        source: dummy
+node_types:
+    test_type:
+        properties:
+            key: {}
+        interfaces:
+            lifecycle:
+                create: test_plugin.create
+"""
+
+NODE_TEMPLATE = """
+    node{0}:
+        type: test_type
+        properties:
+            key: value {0}
+"""
+
+
+def _write_blueprints(directory, blueprints_count, nodes_count):
+    with open(os.path.join(directory, 'types.yaml'), 'w') as f:
+        f.write(TYPES)
+    paths = []
+    for i in range(blueprints_count):
+        path = os.path.join(directory, 'blueprint{0}.yaml'.format(i))
+        with open(path, 'w') as f:
+            f.write('tosca_definitions_version: cloudify_dsl_1_1\n'
+                    'imports: [types.yaml]\n'
+                    'node_templates:\n')
+            for j in range(nodes_count):
+                f.write(NODE_TEMPLATE.format(j))
+        paths.append(path)
+    # recently modified files are not cached
+    modified_at = time.time() - file_cache.RACY_INTERVAL
+    for name in os.listdir(directory):
+        os.utime(os.path.join(directory, name), (modified_at, modified_at))
+    return paths
+
+
+def _time_parse_all(paths):
+    started = time.time()
+    for path in paths:
+        parser.parse_from_path(path)
+    return time.time() - started
+
+
+def main():
+    blueprints_count = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    nodes_count = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    temp_dir = tempfile.mkdtemp()
+    try:
+        paths = _write_blueprints(temp_dir, blueprints_count, nodes_count)
+        print 'blueprints: {0} of {1} nodes'.format(blueprints_count,
+                                                    nodes_count)
+        file_cache.clear()
+        document_cache.clear()
+        print '{0:10} {1:.3f}s'.format('cold', _time_parse_all(paths))
+        print '{0:10} {1:.3f}s'.format('cached', _time_parse_all(paths))
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+if __name__ == '__main__':
+    main()
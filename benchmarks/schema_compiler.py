@@ -0,0 +1,80 @@
+########
+# Copyright (c) 2015 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+"""
+Compares validating a large combined blueprint against the DSL schema with
+a generic jsonschema validator and with the compiled validator.
+
+Usage: python benchmarks/schema_compiler.py [NODES_COUNT]
+"""
+
+import sys
+import time
+
+from jsonschema import Draft4Validator
+
+from dsl_parser import schemas
+from dsl_parser.schema_compiler import compile_schema
+
+
+def _blueprint(nodes_count):
+    operation = {'implementation': 'script.op', 'inputs': {'port': 8080}}
+    node_templates = {}
+    for i in range(nodes_count):
+        node_templates['node{0}'.format(i)] = {
+            'type': 'test_type',
+            'properties': {'key': 'value {0}'.format(i)},
+            'instances': {'deploy': 1},
+            'interfaces': {
+                'lifecycle': dict(('op{0}'.format(j), dict(operation))
+                                  for j in range(5))
+            },
+            'relationships': [{
+                'type': 'cloudify.relationships.depends_on',
+                'target': 'node{0}'.format(max(i - 1, 0)),
+                'source_interfaces': {'test': {'op': 'script.op'}}
+            }]
+        }
+    return {
+        'tosca_definitions_version': 'cloudify_dsl_1_1',
+        'plugins': {'script': {'executor': 'central_deployment_agent',
+                               'install': False}},
+        'node_types': {'test_type': {'properties': {'key': {}}}},
+        'node_templates': node_templates
+    }
+
+
+def _time_validate(validator, blueprint, repeat=3):
+    timings = []
+    for _ in range(repeat):
+        started = time.time()
+        validator.validate(blueprint)
+        timings.append(time.time() - started)
+    return min(timings)
+
+
+def main():
+    nodes_count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    blueprint = _blueprint(nodes_count)
+    print 'blueprint: {0} nodes'.format(nodes_count)
+    for name, validator in [
+            ('generic', Draft4Validator(schemas.DSL_SCHEMA)),
+            ('compiled', compile_schema(schemas.DSL_SCHEMA))]:
+        print '{0:10} {1:.3f}s'.format(name,
+                                       _time_validate(validator, blueprint))
+
+
+if __name__ == '__main__':
+    main()
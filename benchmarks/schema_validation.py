@@ -0,0 +1,76 @@
+########
+# Copyright (c) 2015 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+"""
+Measures the per parse overhead of schema validation on a small blueprint,
+building the validators on every call (as jsonschema.validate does) and
+reusing them.
+
+Usage: python benchmarks/schema_validation.py [ITERATIONS]
+"""
+
+import sys
+import timeit
+
+import yaml
+from jsonschema import validate
+
+from dsl_parser import parser
+from dsl_parser import schemas
+
+BLUEPRINT = """
+tosca_definitions_version: cloudify_dsl_1_1
+imports:
+    - http://www.getcloudify.org/spec/cloudify/3.2/types.yaml
+plugins:
+    script:
+        executor: central_deployment_agent
+        install: false
+node_types:
+    test_type:
+        properties:
+            key:
+                default: value
+node_templates:
+    test_node:
+        type: test_type
+        interfaces:
+            cloudify.interfaces.lifecycle:
+                create: script.create
+"""
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    parsed_dsl = yaml.safe_load(BLUEPRINT)
+    imports = parsed_dsl.pop(parser.IMPORTS)
+
+    def validate_every_time():
+        validate(imports, schemas.IMPORTS_SCHEMA)
+        validate(parsed_dsl, schemas.DSL_SCHEMA)
+
+    def reuse_validators():
+        parser._validate_imports_section(imports, None)
+        parser._validate_dsl_schema(parsed_dsl)
+
+    for name, function in [('jsonschema.validate', validate_every_time),
+                           ('reused validators', reuse_validators)]:
+        seconds = min(timeit.repeat(function, number=iterations, repeat=3))
+        print '{0:20} {1:.1f}us per parse'.format(
+            name, seconds / iterations * 1000000)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+########
+# Copyright (c) 2015 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+"""
+Compares the peak memory (max RSS) and time of parsing a generated
+blueprint with many node templates, with and without streaming. Every
+parse runs in a process of its own, so their peaks are measured apart.
+
+Usage: python benchmarks/streaming_rss.py [NODES_COUNT]
+"""
+
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from dsl_parser import parser
+
+HEADER = """
+tosca_definitions_version: cloudify_dsl_1_1
+plugins:
+    test_plugin:
+        executor: central_deployment_agent
+        source: dummy
+node_types:
+    test_type:
+        properties:
+            key: {}
+            list:
+                default: []
+        interfaces:
+            lifecycle:
+                create: test_plugin.create
+                start: test_plugin.start
+relationships:
+    cloudify.relationships.depends_on: {}
+node_templates:
+"""
+
+NODE_TEMPLATE = """
+    node{0}:
+        type: test_type
+        properties:
+            key: value {0}
+            list: [1, 2.5, true, 'x']
+        interfaces:
+            lifecycle:
+                configure:
+                    implementation: test_plugin.configure
+                    inputs:
+                        port: 8080
+        relationships:
+            -   type: cloudify.relationships.depends_on
+                target: node{1}
+"""
+
+
+def _write_blueprint(path, nodes_count):
+    with open(path, 'w') as f:
+        f.write(HEADER)
+        for i in range(nodes_count):
+            f.write(NODE_TEMPLATE.format(i, (i + 1) % nodes_count))
+
+
+def _measure(path, streaming):
+    started = time.time()
+    plan = parser.parse_from_path(path, streaming=streaming)
+    elapsed = time.time() - started
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print '{0} {1} {2}'.format(len(plan['nodes']), elapsed, max_rss)
+
+
+def main():
+    if sys.argv[1:2] == ['--measure']:
+        _measure(sys.argv[2], sys.argv[3] == 'streaming')
+        return
+    nodes_count = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    temp_dir = tempfile.mkdtemp()
+    try:
+        path = os.path.join(temp_dir, 'blueprint.yaml')
+        _write_blueprint(path, nodes_count)
+        print 'blueprint: {0} nodes, {1:.1f}MB'.format(
+            nodes_count, os.path.getsize(path) / 1024.0 / 1024)
+        for mode in ['whole', 'streaming']:
+            output = subprocess.check_output(
+                [sys.executable, __file__, '--measure', path, mode])
+            _, elapsed, max_rss = output.split()
+            print '{0:10} {1:7.1f}s {2:8.1f}MB max rss'.format(
+                mode, float(elapsed), int(max_rss) / 1024.0)
+    finally:
+        shutil.rmtree(temp_dir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+########
+# Copyright (c) 2015 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+"""
+Compares the time it takes to load a large blueprint with the pure python
+yaml loader and with the libyaml based loader.
+
+Usage: python benchmarks/yaml_loading.py [NODES_COUNT]
+"""
+
+import sys
+import time
+
+import yaml
+
+from dsl_parser import parser
+
+NODE_TEMPLATE = """
+    node{0}:
+        type: cloudify.nodes.Compute
+        properties:
+            ip: 10.0.0.{1}
+            description: "node number {0}"
+            tags: [a, b, c]
+            settings:
+                retries: 3
+                enabled: true
+        interfaces:
+            cloudify.interfaces.lifecycle:
+                create: scripts/create.sh
+                start:
+                    implementation: scripts/start.sh
+                    inputs:
+                        port: 8080
+        relationships:
+            -   type: cloudify.relationships.depends_on
+                target: node{2}
+"""
+
+
+def _blueprint(nodes_count):
+    return 'tosca_definitions_version: cloudify_dsl_1_1\nnode_templates:' + \
+        ''.join(NODE_TEMPLATE.format(i, i % 256, max(i - 1, 0))
+                for i in range(nodes_count))
+
+
+def _time_load(loader, blueprint, repeat=3):
+    parser._YAML_LOADER = loader
+    timings = []
+    for _ in range(repeat):
+        started = time.time()
+        parser._load_yaml(blueprint, 'Failed to parse DSL')
+        timings.append(time.time() - started)
+    return min(timings)
+
+
+def main():
+    nodes_count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    blueprint = _blueprint(nodes_count)
+    print 'blueprint: {0} nodes, {1:.1f} MB'.format(
+        nodes_count, len(blueprint) / 1024.0 / 1024)
+    loaders = [('SafeLoader', yaml.SafeLoader)]
+    if hasattr(yaml, 'CSafeLoader'):
+        loaders.append(('CSafeLoader', yaml.CSafeLoader))
+    else:
+        print 'libyaml is not available'
+    for name, loader in loaders:
+        print '{0:12} {1:.3f}s'.format(name, _time_load(loader, blueprint))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,197 @@
+########
+# Copyright (c) 2015 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+import mmap
+import zipfile
+import posixpath
+import threading
+from urllib2 import URLError
+
+import yaml
+
+from dsl_parser import loader
+from dsl_parser.exceptions import DSLParsingFormatException
+
+ARCHIVE_SCHEME = 'archive:'
+MANIFEST_FILENAME = 'manifest.yaml'
+MAIN_BLUEPRINT = 'main_blueprint'
+DEFAULT_MAIN_BLUEPRINT = 'blueprint.yaml'
+
+
+class BlueprintArchive(object):
+    """
+    A zip archive holding a blueprint along with its imports and scripts.
+
+    The archive is memory mapped and its members are read (and
+    decompressed) in memory, through an index of the archive built when it
+    is opened, so nothing is ever extracted. When all members are under a
+    single top level directory, member names are relative to it.
+
+    An optional manifest.yaml at the archive root names the main blueprint
+    (`main_blueprint`), which otherwise defaults to blueprint.yaml.
+    """
+
+    def __init__(self, archive_path):
+        self.archive_path = archive_path
+        with open(archive_path, 'rb') as f:
+            try:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except (ValueError, EnvironmentError), ex:
+                # an empty file cannot be mapped
+                raise _invalid_archive(archive_path, ex)
+        try:
+            self._zip = zipfile.ZipFile(_MappedFile(self._mmap))
+            infos = self._zip.infolist()
+        except (zipfile.BadZipfile, zipfile.LargeZipFile), ex:
+            self._mmap.close()
+            raise _invalid_archive(archive_path, ex)
+        root = _common_root([info.filename for info in infos])
+        self._members = dict((info.filename[len(root):], info)
+                             for info in infos
+                             if not info.filename.endswith('/'))
+        # members are read through the shared position of the mapped file
+        self._lock = threading.Lock()
+        self._manifest = None
+
+    @property
+    def names(self):
+        return sorted(self._members.keys())
+
+    @property
+    def manifest(self):
+        if self._manifest is None:
+            self._manifest = self._load_manifest()
+        return self._manifest
+
+    @property
+    def main_blueprint(self):
+        main_blueprint = self.manifest.get(MAIN_BLUEPRINT,
+                                           DEFAULT_MAIN_BLUEPRINT)
+        if not isinstance(main_blueprint, basestring):
+            raise _invalid_archive(self.archive_path,
+                                   '{0} in {1} must be a string'.format(
+                                       MAIN_BLUEPRINT, MANIFEST_FILENAME))
+        return main_blueprint
+
+    def exists(self, name):
+        return name in self._members
+
+    def read(self, name):
+        with self._lock:
+            return self._zip.read(self._members[name])
+
+    @staticmethod
+    def url(name):
+        return '{0}/{1}'.format(ARCHIVE_SCHEME, name)
+
+    def close(self):
+        self._zip.close()
+        self._mmap.close()
+
+    def _load_manifest(self):
+        if not self.exists(MANIFEST_FILENAME):
+            return {}
+        try:
+            manifest = yaml.safe_load(self.read(MANIFEST_FILENAME))
+        except yaml.YAMLError, ex:
+            raise _invalid_archive(self.archive_path, ex)
+        if manifest is None:
+            return {}
+        if not isinstance(manifest, dict):
+            raise _invalid_archive(self.archive_path,
+                                   '{0} must be a dict'.format(
+                                       MANIFEST_FILENAME))
+        return manifest
+
+
+class ArchiveResourceLoader(loader.ResourceLoader):
+    """
+    Loads archive: urls from a BlueprintArchive, and any other url through
+    fallback_loader (defaults to loader.default_loader()).
+    """
+
+    schemes = loader.ResourceLoader.schemes + (ARCHIVE_SCHEME,)
+    # archives are self-contained
+    resolves_local_paths = False
+
+    def __init__(self, archive, fallback_loader=None):
+        self.archive = archive
+        self.fallback_loader = fallback_loader or loader.default_loader()
+
+    def open(self, url, headers=None, timeout=None):
+        if not _is_archive_url(url):
+            return self.fallback_loader.open(url, headers, timeout)
+        name = _member_name(url)
+        if not self.archive.exists(name):
+            raise URLError('{0} not found in archive {1}'.format(
+                name, self.archive.archive_path))
+        return loader.Resource(self.archive.read(name), {})
+
+    def exists(self, url, timeout=None):
+        if not _is_archive_url(url):
+            return self.fallback_loader.exists(url, timeout)
+        return self.archive.exists(_member_name(url))
+
+    def local_path(self, url):
+        if not _is_archive_url(url):
+            return self.fallback_loader.local_path(url)
+        return None
+
+    def is_remote(self, url):
+        if not _is_archive_url(url):
+            return self.fallback_loader.is_remote(url)
+        return False
+
+
+class _MappedFile(object):
+    """The file interface zipfile expects, over a memory mapped file."""
+
+    def __init__(self, mapped):
+        self._mapped = mapped
+
+    def read(self, size=-1):
+        if size < 0:
+            size = len(self._mapped) - self._mapped.tell()
+        return self._mapped.read(size)
+
+    def seek(self, offset, whence=0):
+        try:
+            self._mapped.seek(offset, whence)
+        except ValueError, ex:
+            # as files do, so zipfile detects too short archives
+            raise IOError(ex)
+
+    def tell(self):
+        return self._mapped.tell()
+
+
+def _is_archive_url(url):
+    return url.startswith(ARCHIVE_SCHEME)
+
+
+def _member_name(url):
+    return posixpath.normpath(url[len(ARCHIVE_SCHEME):]).lstrip('/')
+
+
+def _common_root(names):
+    top_levels = set(name.split('/', 1)[0] for name in names)
+    if len(top_levels) != 1 or not all('/' in name for name in names):
+        return ''
+    return '{0}/'.format(top_levels.pop())
+
+
+def _invalid_archive(archive_path, reason):
+    return DSLParsingFormatException(
+        31, 'Invalid blueprint archive {0}; {1}'.format(archive_path, reason))
@@ -0,0 +1,107 @@
+########
+# Copyright (c) 2015 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+import copy
+import time
+import hashlib
+
+from dsl_parser import lru_cache
+
+# in bytes of source content, see DocumentCache
+DEFAULT_MAX_SIZE = 16 * 1024 * 1024
+DEFAULT_TTL = 60 * 60
+
+
+class DocumentCache(lru_cache.LRUCache):
+    """
+    An in-memory LRU cache of loaded import documents.
+
+    Documents are keyed by their resolved url along with a fingerprint of
+    their content, so a changed import is never served from the cache.
+    Entries expire ttl seconds after they were loaded.
+
+    max_size counts the bytes of the documents' source content, not the
+    memory of the loaded documents the cache holds, which is typically
+    about ten times larger (so the default max_size of 16MB may hold
+    documents taking well over 100MB).
+
+    The cache keeps its own copies of the documents and only ever hands out
+    copies, so callers which modify loaded documents (as merging imports
+    does) cannot corrupt cached entries.
+    """
+
+    def __init__(self, max_size=DEFAULT_MAX_SIZE, ttl=DEFAULT_TTL):
+        super(DocumentCache, self).__init__(max_size)
+        self.ttl = ttl
+
+    def load(self, url, content, load_document):
+        """
+        Get the document of url with the given content, calling
+        load_document(content) to load it if it is not cached.
+        """
+        key = (url, hashlib.sha1(content).hexdigest())
+        entry = self.get(key, is_valid=_not_expired)
+        if entry is not None:
+            return copy.deepcopy(entry[0])
+        document = load_document(content)
+        self.put(key, (copy.deepcopy(document), time.time() + self.ttl),
+                 len(content))
+        return document
+
+    def info(self):
+        info = super(DocumentCache, self).info()
+        info['urls'] = [url for url, _ in self.keys()]
+        info['ttl'] = self.ttl
+        return info
+
+
+def _not_expired(entry):
+    _, expires_at = entry
+    return expires_at > time.time()
+
+
+_cache = DocumentCache()
+
+
+def load(url, content, load_document):
+    """
+    Get a document through the process-wide cache.
+    See DocumentCache.load.
+    """
+    return _cache.load(url, content, load_document)
+
+
+def clear():
+    """Clear the process-wide cache."""
+    _cache.clear()
+
+
+def info():
+    """
+    Inspect the process-wide cache: its cached urls, number of entries,
+    size, limits and hit/miss counts.
+    """
+    return _cache.info()
+
+
+def configure(max_size=None, ttl=None):
+    """
+    Change the limits of the process-wide cache. A max_size of 0 disables
+    it.
+    """
+    if ttl is not None:
+        _cache.ttl = ttl
+    if max_size is not None:
+        _cache.resize(max_size)
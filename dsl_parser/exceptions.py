@@ -54,3 +54,11 @@ class DSLParsingLogicException(DSLParsingException):
 
 class DSLParsingFormatException(DSLParsingException):
     pass
+
+
+class DSLParsingTimeoutException(DSLParsingException):
+    """
+    An error raised when fetching an import or a resource took longer than
+    allowed. failed_import holds the url which was being fetched.
+    """
+    pass
@@ -0,0 +1,102 @@
+########
+# Copyright (c) 2015 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+import os
+import time
+
+from dsl_parser import lru_cache
+
+DEFAULT_MAX_SIZE = 64 * 1024 * 1024
+# files modified this recently may be modified again without their
+# modification time changing, so they are not cached
+RACY_INTERVAL = 2
+
+
+class FileCache(lru_cache.LRUCache):
+    """
+    An in-memory LRU cache of local file contents.
+
+    Files are cached along with their inode, modification time and size,
+    so a file which has not changed since it was read is not read again,
+    and a changed (or replaced) file is never served from the cache. The
+    memory used by the cache is bounded by max_size bytes of content.
+    """
+
+    def __init__(self, max_size=DEFAULT_MAX_SIZE):
+        super(FileCache, self).__init__(max_size)
+
+    def read(self, path):
+        """
+        The content of the file at path, along with its os.stat result.
+
+        :raises IOError: if the file cannot be read.
+        """
+        try:
+            stat = os.stat(path)
+        except OSError, ex:
+            raise IOError(ex.errno, ex.strerror, path)
+        version = _version(stat)
+        entry = self.get(path, is_valid=lambda e: e[0] == version)
+        if entry is not None:
+            return entry[1], stat
+        with open(path, 'rb') as f:
+            # the file may have changed since it was stat-ed
+            stat = os.fstat(f.fileno())
+            content = f.read()
+        if time.time() - stat.st_mtime >= RACY_INTERVAL:
+            # replaces the entry of an older version of the file
+            self.put(path, (_version(stat), content), len(content))
+        return content, stat
+
+    def info(self):
+        info = super(FileCache, self).info()
+        info['paths'] = self.keys()
+        return info
+
+
+def _version(stat):
+    return stat.st_ino, stat.st_mtime, stat.st_size
+
+
+_cache = FileCache()
+
+
+def read(path):
+    """
+    Read a file through the process-wide cache. See FileCache.read.
+    """
+    return _cache.read(path)
+
+
+def clear():
+    """Clear the process-wide cache."""
+    _cache.clear()
+
+
+def info():
+    """
+    Inspect the process-wide cache: its cached paths, number of entries,
+    size, limit and hit/miss counts.
+    """
+    return _cache.info()
+
+
+def configure(max_size=None):
+    """
+    Change the limit of the process-wide cache. A max_size of 0 disables
+    it.
+    """
+    if max_size is not None:
+        _cache.resize(max_size)
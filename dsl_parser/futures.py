@@ -0,0 +1,121 @@
+########
+# Copyright (c) 2015 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+import sys
+import threading
+from multiprocessing import TimeoutError
+from multiprocessing.pool import ThreadPool
+
+DEFAULT_MAX_WORKERS = 4
+
+
+class Future(object):
+    """
+    The pending result of a call running in a worker thread.
+
+    Follows the interface of concurrent.futures.Future (without
+    cancellation), so callers running an event loop can be notified through
+    add_done_callback instead of blocking on result.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._done = False
+        self._result = None
+        self._exc_info = None
+        self._callbacks = []
+
+    def done(self):
+        with self._condition:
+            return self._done
+
+    def result(self, timeout=None):
+        """
+        The result of the call, waiting up to timeout seconds for it.
+
+        :raises multiprocessing.TimeoutError: if the call did not end in
+                                              time.
+        :raises: the exception raised by the call, if it failed.
+        """
+        self._wait(timeout)
+        if self._exc_info:
+            raise self._exc_info[0], self._exc_info[1], self._exc_info[2]
+        return self._result
+
+    def exception(self, timeout=None):
+        self._wait(timeout)
+        return self._exc_info[1] if self._exc_info else None
+
+    def add_done_callback(self, fn):
+        """
+        Call fn(future) once the call ends. fn is called in the worker
+        thread, or right away if the call already ended.
+        """
+        with self._condition:
+            if not self._done:
+                self._callbacks.append(fn)
+                return
+        fn(self)
+
+    def set_result(self, result):
+        self._set(result, None)
+
+    def set_exc_info(self, exc_info):
+        self._set(None, exc_info)
+
+    def _set(self, result, exc_info):
+        with self._condition:
+            self._result = result
+            self._exc_info = exc_info
+            self._done = True
+            callbacks = self._callbacks
+            self._callbacks = []
+            self._condition.notify_all()
+        for callback in callbacks:
+            callback(self)
+
+    def _wait(self, timeout):
+        with self._condition:
+            if not self._done:
+                self._condition.wait(timeout)
+            if not self._done:
+                raise TimeoutError()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def submit(fn, *args, **kwargs):
+    """Call fn(*args, **kwargs) in a worker thread, returning a Future."""
+    future = Future()
+
+    def run():
+        try:
+            result = fn(*args, **kwargs)
+        except Exception:
+            future.set_exc_info(sys.exc_info())
+        else:
+            future.set_result(result)
+    _get_pool().apply_async(run)
+    return future
+
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPool(DEFAULT_MAX_WORKERS)
+        return _pool
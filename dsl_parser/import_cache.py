@@ -0,0 +1,219 @@
+########
+# Copyright (c) 2015 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+import os
+import json
+import errno
+import hashlib
+import tempfile
+import threading
+import contextlib
+from urllib2 import HTTPError
+
+from dsl_parser import loader
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+DEFAULT_MAX_SIZE = 100 * 1024 * 1024
+
+CACHEABLE_SCHEMES = ('http:', 'https:')
+
+
+class ImportCache(object):
+    """
+    A persistent cache of http(s) imports, which may be shared by several
+    processes.
+
+    Contents are stored once per content hash (under `objects`), while
+    every cached url has an entry (under `urls`) holding the hash of its
+    content along with the ETag and Last-Modified headers it was served
+    with. Cached urls are revalidated with a conditional GET on every fetch,
+    so an unchanged import costs a round trip but not a download.
+
+    When the stored contents exceed max_size bytes, the least recently
+    used contents are evicted. All files are written to a temporary file
+    and renamed into place, and eviction holds an exclusive lock on the
+    cache directory, so concurrent processes never see partial entries.
+    """
+
+    def __init__(self, cache_dir, max_size=DEFAULT_MAX_SIZE):
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+        self._objects_dir = os.path.join(cache_dir, 'objects')
+        self._urls_dir = os.path.join(cache_dir, 'urls')
+        self._lock_path = os.path.join(cache_dir, 'lock')
+        for directory in [self._objects_dir, self._urls_dir]:
+            _makedirs(directory)
+        self._stats_lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+
+    @staticmethod
+    def is_cacheable(url):
+        return url.startswith(CACHEABLE_SCHEMES)
+
+    @property
+    def stats(self):
+        """
+        Counts of this instance: hits (revalidated cached contents), misses
+        (downloaded contents) and evictions, along with the current size of
+        the stored contents.
+        """
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats['size'] = sum(size for _, size, _ in self._list_objects())
+        return stats
+
+    def fetch(self, url, resource_loader=None):
+        """
+        Fetch the content of url, revalidating a cached copy if one exists.
+
+        :param resource_loader: the loader.ResourceLoader used for fetching
+                                (defaults to loader.default_loader()).
+        :raises URLError: if the url could not be fetched.
+        """
+        resource_loader = resource_loader or loader.default_loader()
+        entry = self._read_entry(url)
+        headers = {}
+        if entry:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+        try:
+            resource = resource_loader.open(url, headers)
+        except HTTPError, ex:
+            if ex.code != 304 or not entry:
+                raise
+            content = self._read_object(entry['content_hash'])
+            if content is not None:
+                self._increment('hits')
+                return content
+            # evicted in the meanwhile (possibly by another process)
+            resource = resource_loader.open(url)
+        self._increment('misses')
+        self._store(url, resource.content, resource.headers)
+        return resource.content
+
+    def clear(self):
+        with self._exclusive_lock():
+            for directory in [self._objects_dir, self._urls_dir]:
+                for name in os.listdir(directory):
+                    _remove(os.path.join(directory, name))
+
+    def _store(self, url, content, headers):
+        content_hash = hashlib.sha256(content).hexdigest()
+        object_path = os.path.join(self._objects_dir, content_hash)
+        if not os.path.exists(object_path):
+            self._write_atomically(object_path, content)
+        self._write_atomically(self._entry_path(url), json.dumps({
+            'url': url,
+            'etag': headers.get('etag'),
+            'last_modified': headers.get('last-modified'),
+            'content_hash': content_hash
+        }))
+        self._evict()
+
+    def _evict(self):
+        objects = self._list_objects()
+        total_size = sum(size for _, size, _ in objects)
+        if total_size <= self.max_size:
+            return
+        with self._exclusive_lock():
+            # least recently used first
+            for path, size, _ in sorted(objects, key=lambda o: o[2]):
+                if total_size <= self.max_size:
+                    break
+                if _remove(path):
+                    self._increment('evictions')
+                total_size -= size
+
+    def _read_entry(self, url):
+        try:
+            with open(self._entry_path(url)) as f:
+                entry = json.load(f)
+        except (IOError, ValueError):
+            return None
+        return entry if entry.get('url') == url else None
+
+    def _read_object(self, content_hash):
+        object_path = os.path.join(self._objects_dir, content_hash)
+        try:
+            with open(object_path, 'rb') as f:
+                content = f.read()
+            # mark as recently used
+            os.utime(object_path, None)
+        except (IOError, OSError):
+            return None
+        return content
+
+    def _list_objects(self):
+        objects = []
+        for name in os.listdir(self._objects_dir):
+            try:
+                stat = os.stat(os.path.join(self._objects_dir, name))
+            except OSError:
+                continue
+            objects.append((os.path.join(self._objects_dir, name),
+                            stat.st_size,
+                            stat.st_mtime))
+        return objects
+
+    def _entry_path(self, url):
+        return os.path.join(self._urls_dir, hashlib.sha256(url).hexdigest())
+
+    def _write_atomically(self, path, content):
+        fd, temp_path = tempfile.mkstemp(dir=self.cache_dir, prefix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(content)
+            os.rename(temp_path, path)
+        except Exception:
+            _remove(temp_path)
+            raise
+
+    @contextlib.contextmanager
+    def _exclusive_lock(self):
+        if fcntl is None:
+            yield
+            return
+        with open(self._lock_path, 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _increment(self, stat):
+        with self._stats_lock:
+            self._stats[stat] += 1
+
+
+def _makedirs(directory):
+    try:
+        os.makedirs(directory)
+    except OSError, ex:
+        if ex.errno != errno.EEXIST:
+            raise
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+        return True
+    except OSError:
+        return False
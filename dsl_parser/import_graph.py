@@ -0,0 +1,232 @@
+########
+# Copyright (c) 2015 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+import threading
+from multiprocessing.pool import ThreadPool
+
+
+class ImportGraph(object):
+    """
+    The resolved imports tree of a blueprint.
+
+    Every import is fetched and loaded exactly once and recorded here,
+    keyed by its resolved url. Both the imports ordering and the merging of
+    the imported documents into the combined blueprint read from this graph.
+    """
+
+    def __init__(self, root_location, root_document):
+        self._root_location = root_location
+        self._root_document = root_document
+        self._documents = {}
+        self._ordered_imports = []
+        self._imports = {root_location: []}
+        self._content_hashes = {}
+
+    @property
+    def root_location(self):
+        return self._root_location
+
+    @property
+    def root_document(self):
+        return self._root_document
+
+    @property
+    def ordered_imports(self):
+        """
+        The resolved import urls, in the order their documents are merged
+        into the combined blueprint (depth first, each url appears once).
+        The root blueprint itself is not included.
+        """
+        return list(self._ordered_imports)
+
+    def document(self, url):
+        """
+        The loaded document of a resolved import url, owned by the graph.
+        Documents are merged in place when the graph is combined into a
+        blueprint by a parse, so a graph is consumed by combining it, and
+        its documents should not be used after that.
+        """
+        if url == self._root_location:
+            return self._root_document
+        return self._documents[url]
+
+    def imports(self, url=None):
+        """
+        The resolved urls directly imported by the document at url, in
+        declaration order. If url is not given, the root blueprint
+        imports are returned.
+        """
+        if url is None:
+            url = self._root_location
+        return list(self._imports[url])
+
+    def add_document(self, url, document):
+        self._documents[url] = document
+        self._ordered_imports.append(url)
+        self._imports[url] = []
+
+    def add_import(self, importing_url, imported_url):
+        self._imports[importing_url].append(imported_url)
+
+    def set_content_hash(self, url, content_hash):
+        self._content_hashes[url] = content_hash
+
+    def content_hash(self, url):
+        """
+        The hash of the content the document of url was loaded from.
+        """
+        return self._content_hashes[url]
+
+    def __contains__(self, url):
+        return url == self._root_location or url in self._documents
+
+    def __iter__(self):
+        return iter(self.ordered_imports)
+
+    def __len__(self):
+        return len(self._ordered_imports)
+
+
+class SerialImportsFetcher(object):
+    """
+    Resolves and loads imports one at a time, when the import graph walk
+    reaches them.
+    """
+
+    def __init__(self, resolve_import, load_import):
+        self._resolve_import = resolve_import
+        self._load_import = load_import
+
+    def fetch(self, imports, current_import):
+        for another_import in imports:
+            yield _SerialFetchedImport(self, another_import, current_import)
+
+    def close(self):
+        pass
+
+
+class _SerialFetchedImport(object):
+
+    def __init__(self, fetcher, another_import, current_import):
+        self._fetcher = fetcher
+        self._import = another_import
+        self._current_import = current_import
+        self._url = None
+
+    def url(self):
+        if self._url is None:
+            self._url = self._fetcher._resolve_import(self._import,
+                                                      self._current_import)
+        return self._url
+
+    def document(self):
+        return self._fetcher._load_import(self._import, self.url())
+
+
+class ConcurrentImportsFetcher(object):
+    """
+    Resolves and loads imports concurrently, using a bounded pool of
+    threads. As soon as a document is loaded, its own imports are submitted
+    as well, so the whole imports tree is fetched ahead of the import graph
+    walk.
+
+    Each url is loaded at most once. Errors are kept until the import graph
+    walk consumes the failed import, so the walk (and therefore the imports
+    order and the raised errors) is exactly the same as with the
+    SerialImportsFetcher.
+    """
+
+    def __init__(self, resolve_import, load_import, document_imports,
+                 max_workers, known_documents=None):
+        self._resolve_import = resolve_import
+        self._load_import = load_import
+        self._document_imports = document_imports
+        self._pool = ThreadPool(processes=max_workers)
+        self._lock = threading.Lock()
+        self._loads = {}
+        self._submitted = {}
+        for url, document in (known_documents or {}).iteritems():
+            self._loads[url] = _ImportLoad()
+            self._loads[url].set_document(document)
+
+    def fetch(self, imports, current_import):
+        with self._lock:
+            submitted = self._submitted.get(current_import)
+        if submitted is None:
+            submitted = self._submit(imports, current_import)
+        return [_ConcurrentFetchedImport(async_result)
+                for async_result in submitted]
+
+    def close(self):
+        self._pool.terminate()
+        self._pool.join()
+
+    def _submit(self, imports, current_import):
+        submitted = [self._pool.apply_async(self._resolve_and_load,
+                                            (another_import, current_import))
+                     for another_import in imports]
+        with self._lock:
+            return self._submitted.setdefault(current_import, submitted)
+
+    def _resolve_and_load(self, another_import, current_import):
+        import_url = self._resolve_import(another_import, current_import)
+        with self._lock:
+            import_load = self._loads.get(import_url)
+            owner = import_load is None
+            if owner:
+                import_load = self._loads[import_url] = _ImportLoad()
+        if owner:
+            try:
+                document = self._load_import(another_import, import_url)
+            except Exception, ex:
+                import_load.set_error(ex)
+            else:
+                import_load.set_document(document)
+                self._submit(self._document_imports(document), import_url)
+        return import_url, import_load
+
+
+class _ConcurrentFetchedImport(object):
+
+    def __init__(self, async_result):
+        self._async_result = async_result
+
+    def url(self):
+        return self._async_result.get()[0]
+
+    def document(self):
+        return self._async_result.get()[1].get()
+
+
+class _ImportLoad(object):
+
+    def __init__(self):
+        self._done = threading.Event()
+        self._document = None
+        self._error = None
+
+    def set_document(self, document):
+        self._document = document
+        self._done.set()
+
+    def set_error(self, error):
+        self._error = error
+        self._done.set()
+
+    def get(self):
+        self._done.wait()
+        if self._error is not None:
+            raise self._error
+        return self._document
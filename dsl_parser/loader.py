@@ -0,0 +1,527 @@
+########
+# Copyright (c) 2015 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+import time
+import socket
+import httplib
+import mimetypes
+import threading
+import contextlib
+from collections import namedtuple
+from email.utils import formatdate
+from urllib import getproxies, proxy_bypass, url2pathname
+from urllib2 import (build_opener, Request, URLError, HTTPError,
+                     HTTPHandler, HTTPSHandler)
+from urlparse import urlsplit, urljoin
+
+from dsl_parser import file_cache
+from dsl_parser import lru_cache
+
+Resource = namedtuple('Resource', ['content', 'headers'])
+
+MAX_REDIRECTS = 10
+REDIRECT_CODES = (301, 302, 303, 307)
+MISSING_CODES = (404, 410)
+DEFAULT_MISSING_TTL = 30
+DEFAULT_MAX_MISSING = 1024
+DEFAULT_TIMEOUT = 30
+READ_CHUNK_SIZE = 64 * 1024
+
+
+class ResourceTimeout(URLError):
+    """Raised when loading a resource takes longer than allowed."""
+    pass
+
+
+class ResourceLoader(object):
+    """
+    Loads blueprints, imports and resources by url.
+
+    Implementations override open (and possibly exists), and raise
+    URLError (or HTTPError) when a resource cannot be loaded, or
+    ResourceTimeout when loading it timed out. They may support additional
+    url schemes by extending `schemes`.
+    """
+
+    schemes = ('http:', 'https:', 'file:', 'ftp:')
+    # whether imports that name an existing local file are loaded from it,
+    # relative to the working directory
+    resolves_local_paths = True
+
+    def open(self, url, headers=None, timeout=None):
+        """
+        Load the resource at url.
+
+        :param headers: request headers, which loaders of non http urls may
+                        ignore. A conditional request whose resource was not
+                        modified raises an HTTPError with code 304.
+        :param timeout: seconds the resource may take to load, if it is
+                        loaded over the network.
+        :return: a Resource holding the content and the response headers
+                 (keyed by lower case header names).
+        """
+        raise NotImplementedError()
+
+    def load(self, url, timeout=None):
+        return self.open(url, timeout=timeout).content
+
+    def exists(self, url, timeout=None):
+        try:
+            self.open(url, timeout=timeout)
+            return True
+        except ResourceTimeout:
+            raise
+        except URLError:
+            return False
+
+    def is_url(self, resource_name):
+        return resource_name.startswith(self.schemes)
+
+    def local_path(self, url):
+        """
+        The local file system path url is loaded from, or None if url is
+        not loaded from a local file.
+        """
+        return None
+
+    def is_remote(self, url):
+        """
+        Whether url is loaded over the network, so that checking several
+        such urls concurrently pays off.
+        """
+        return self.local_path(url) is None
+
+    def close(self):
+        pass
+
+
+class DefaultResourceLoader(ResourceLoader):
+    """
+    The default loader. http(s) requests reuse pooled keep-alive
+    connections, up to max_connections_per_host idle connections per host.
+    Other urls (and proxied http urls) are opened with urllib2.
+
+    Http(s) urls found not to exist (404/410 responses) are remembered for
+    missing_ttl seconds, during which loading them fails without another
+    request. At most max_missing urls are remembered, the least recently
+    requested are forgotten first. A missing_ttl of 0 disables this.
+    Missing files are not remembered, as checking them again only costs a
+    stat, and they are often created right after a parse failed for want
+    of them.
+
+    Network operations (connecting, and every read of a response) time out
+    after `timeout` seconds, or the timeout of the request if it is
+    shorter. The timeout of a request bounds the whole request, so a
+    response which keeps trickling in is cut off too.
+
+    Local files are read through the process-wide file_cache, so unchanged
+    files are not read again.
+    """
+
+    def __init__(self, max_connections_per_host=4,
+                 missing_ttl=DEFAULT_MISSING_TTL,
+                 timeout=DEFAULT_TIMEOUT,
+                 max_missing=DEFAULT_MAX_MISSING):
+        self.max_connections_per_host = max_connections_per_host
+        self.missing_ttl = missing_ttl
+        self.timeout = timeout
+        self._pools = {}
+        self._pools_lock = threading.Lock()
+        # url -> (expiry time, code, reason, headers) of a missing url,
+        # each counted as 1 towards max_missing
+        self._missing = lru_cache.LRUCache(max_missing)
+
+    def open(self, url, headers=None, timeout=None):
+        self._raise_if_missing(url)
+        deadline = _deadline(timeout)
+        timeout = self._request_timeout(timeout)
+        try:
+            path = self.local_path(url)
+            if path is not None:
+                return _open_file(path)
+            if self._is_pooled(url):
+                return self._request('GET', url, headers or {}, timeout,
+                                     deadline)
+            request = Request(url, headers=headers or {})
+            request.deadline = deadline
+            with contextlib.closing(_opener.open(request,
+                                                 timeout=timeout)) as f:
+                return Resource(_read(f, deadline), dict(f.info().items()))
+        except socket.timeout, ex:
+            raise ResourceTimeout(ex)
+        except URLError, ex:
+            if isinstance(ex.reason, socket.timeout):
+                raise ResourceTimeout(ex.reason)
+            self._remember_if_missing(url, ex)
+            raise
+
+    def exists(self, url, timeout=None):
+        if not self._is_pooled(url):
+            return super(DefaultResourceLoader, self).exists(url, timeout)
+        try:
+            self._raise_if_missing(url)
+            self._request('HEAD', url, {}, self._request_timeout(timeout),
+                          _deadline(timeout))
+            return True
+        except HTTPError, ex:
+            if ex.code in (405, 501):
+                # HEAD is not supported by the server
+                return super(DefaultResourceLoader, self).exists(url,
+                                                                 timeout)
+            self._remember_if_missing(url, ex)
+            return False
+        except ResourceTimeout:
+            raise
+        except URLError:
+            return False
+
+    def local_path(self, url):
+        if not url.startswith('file:'):
+            return None
+        split_url = urlsplit(url)
+        if split_url.netloc not in ('', 'localhost'):
+            return None
+        return url2pathname(split_url.path)
+
+    def clear_missing(self):
+        """Forget the urls found not to exist."""
+        self._missing.clear()
+
+    def close(self):
+        with self._pools_lock:
+            pools = self._pools.values()
+            self._pools = {}
+        for pool in pools:
+            pool.close()
+
+    def _request_timeout(self, timeout):
+        if timeout is None:
+            return self.timeout
+        if self.timeout is None:
+            return timeout
+        return min(timeout, self.timeout)
+
+    def _raise_if_missing(self, url):
+        entry = self._missing.get(url, is_valid=_not_expired)
+        if entry is None:
+            return
+        _, code, reason, headers = entry
+        # a new error every time, as callers may modify it
+        raise HTTPError(url, code, reason, dict(headers), None)
+
+    def _remember_if_missing(self, url, error):
+        if not self.missing_ttl or not _is_missing_error(error):
+            return
+        headers = dict(error.hdrs.items()) if error.hdrs else {}
+        self._missing.put(url, (time.time() + self.missing_ttl, error.code,
+                                error.msg, headers), 1)
+
+    def _is_pooled(self, url):
+        scheme = url[:url.find(':')].lower()
+        if scheme not in ('http', 'https'):
+            return False
+        return scheme not in getproxies() or \
+            proxy_bypass(urlsplit(url).hostname)
+
+    def _request(self, method, url, headers, timeout, deadline):
+        for _ in range(MAX_REDIRECTS + 1):
+            split_url = urlsplit(url)
+            pool = self._pool(split_url.scheme, split_url.netloc)
+            path = split_url.path or '/'
+            if split_url.query:
+                path = '{0}?{1}'.format(path, split_url.query)
+            status, reason, response_headers, content = pool.request(
+                method, path, headers, timeout, deadline)
+            if status in REDIRECT_CODES and 'location' in response_headers:
+                url = urljoin(url, response_headers['location'])
+                continue
+            if status >= 300:
+                raise HTTPError(url, status, reason, response_headers, None)
+            return Resource(content, response_headers)
+        raise HTTPError(url, status, 'Too many redirects', response_headers,
+                        None)
+
+    def _pool(self, scheme, netloc):
+        key = (scheme.lower(), netloc.lower())
+        with self._pools_lock:
+            pool = self._pools.get(key)
+            if pool is None:
+                pool = self._pools[key] = _ConnectionPool(
+                    key[0], key[1], self.max_connections_per_host)
+            return pool
+
+
+class _ConnectionPool(object):
+
+    def __init__(self, scheme, netloc, max_idle_connections):
+        self._connection_class = _DeadlineHTTPSConnection \
+            if scheme == 'https' else _DeadlineHTTPConnection
+        self._netloc = netloc
+        self._max_idle_connections = max_idle_connections
+        self._idle_connections = []
+        self._lock = threading.Lock()
+
+    def request(self, method, path, headers, timeout, deadline):
+        with self._lock:
+            connection = self._idle_connections.pop() \
+                if self._idle_connections else None
+        reused = connection is not None
+        if reused:
+            _set_timeout(connection, timeout)
+        else:
+            connection = self._connection_class(self._netloc,
+                                                timeout=timeout)
+        try:
+            try:
+                response = self._send(connection, method, path, headers,
+                                      deadline)
+            except socket.timeout:
+                raise
+            except (httplib.HTTPException, socket.error):
+                connection.close()
+                if not reused:
+                    raise
+                # the server closed the idle connection, try a new one
+                connection = self._connection_class(self._netloc,
+                                                    timeout=timeout)
+                response = self._send(connection, method, path, headers,
+                                      deadline)
+        except socket.timeout, ex:
+            connection.close()
+            raise ResourceTimeout(ex)
+        except (httplib.HTTPException, socket.error), ex:
+            connection.close()
+            raise URLError(ex)
+        status, reason, response_headers, content, will_close = response
+        if will_close:
+            connection.close()
+        else:
+            self._release(connection)
+        return status, reason, response_headers, content
+
+    def close(self):
+        with self._lock:
+            connections = self._idle_connections
+            self._idle_connections = []
+        for connection in connections:
+            connection.close()
+
+    @staticmethod
+    def _send(connection, method, path, headers, deadline):
+        _set_deadline(connection, deadline)
+        connection.request(method, path, headers=headers)
+        response = connection.getresponse()
+        # the body must be fully read for the connection to be reused
+        content = response.read()
+        return (response.status,
+                response.reason,
+                dict(response.getheaders()),
+                content,
+                response.will_close)
+
+    def _release(self, connection):
+        with self._lock:
+            if len(self._idle_connections) < self._max_idle_connections:
+                self._idle_connections.append(connection)
+                return
+        connection.close()
+
+
+class DeadlineResourceLoader(ResourceLoader):
+    """
+    Loads resources through another loader, as long as a deadline, `timeout`
+    seconds from its creation, has not passed. Each request is given the
+    time left until the deadline.
+    """
+
+    def __init__(self, resource_loader, timeout):
+        self.resource_loader = resource_loader
+        self.schemes = resource_loader.schemes
+        self.resolves_local_paths = resource_loader.resolves_local_paths
+        self.deadline = time.time() + timeout
+
+    def open(self, url, headers=None, timeout=None):
+        return self.resource_loader.open(url, headers,
+                                         self._time_left(url, timeout))
+
+    def exists(self, url, timeout=None):
+        return self.resource_loader.exists(url,
+                                           self._time_left(url, timeout))
+
+    def is_url(self, resource_name):
+        return self.resource_loader.is_url(resource_name)
+
+    def local_path(self, url):
+        return self.resource_loader.local_path(url)
+
+    def is_remote(self, url):
+        return self.resource_loader.is_remote(url)
+
+    def _time_left(self, url, timeout):
+        time_left = self.deadline - time.time()
+        if time_left <= 0:
+            raise ResourceTimeout(
+                'deadline passed before loading {0}'.format(url))
+        return time_left if timeout is None else min(timeout, time_left)
+
+
+class _DeadlineSocket(object):
+    """
+    A socket whose receives wait at most until the deadline of the request
+    being read, if it is set, and fail once it has passed. Responses are
+    read through it, so a response which keeps trickling in cannot outlive
+    the deadline of its request.
+    """
+
+    def __init__(self, sock, deadline):
+        self._sock = sock
+        self._timeout = sock.gettimeout()
+        self.deadline = deadline
+
+    def recv(self, bufsize):
+        timeout = self._timeout
+        if self.deadline is not None:
+            time_left = self.deadline - time.time()
+            if time_left <= 0:
+                raise socket.timeout('timed out')
+            if timeout is None or time_left < timeout:
+                timeout = time_left
+        self._sock.settimeout(timeout)
+        return self._sock.recv(bufsize)
+
+    def makefile(self, mode='r', bufsize=-1):
+        # as ssl sockets do, so that responses are read through recv
+        return socket._fileobject(self, mode, bufsize)
+
+    def settimeout(self, timeout):
+        self._timeout = timeout
+        self._sock.settimeout(timeout)
+
+    def gettimeout(self):
+        return self._timeout
+
+    def __getattr__(self, name):
+        return getattr(self._sock, name)
+
+
+def _deadline_connection_class(connection_class):
+    class DeadlineConnection(connection_class):
+        """
+        A connection whose responses are read until its deadline, if it is
+        set.
+        """
+
+        deadline = None
+
+        def connect(self):
+            connection_class.connect(self)
+            self.sock = _DeadlineSocket(self.sock, self.deadline)
+    return DeadlineConnection
+
+
+_DeadlineHTTPConnection = _deadline_connection_class(httplib.HTTPConnection)
+_DeadlineHTTPSConnection = _deadline_connection_class(httplib.HTTPSConnection)
+
+
+class _DeadlineHTTPHandler(HTTPHandler):
+
+    def http_open(self, req):
+        return self.do_open(_request_connection_class(
+            _DeadlineHTTPConnection, req), req)
+
+
+class _DeadlineHTTPSHandler(HTTPSHandler):
+
+    def https_open(self, req):
+        return self.do_open(_request_connection_class(
+            _DeadlineHTTPSConnection, req), req, context=self._context)
+
+
+def _request_connection_class(connection_class, request):
+    def create_connection(*args, **kwargs):
+        connection = connection_class(*args, **kwargs)
+        _set_deadline(connection, getattr(request, 'deadline', None))
+        return connection
+    return create_connection
+
+
+def _set_deadline(connection, deadline):
+    """Read the responses of connection until deadline, if it is set."""
+    connection.deadline = deadline
+    if connection.sock is not None:
+        connection.sock.deadline = deadline
+
+
+def _deadline(timeout):
+    return None if timeout is None else time.time() + timeout
+
+
+def _read(f, deadline):
+    """
+    Read f to its end, in chunks, failing once deadline has passed between
+    them.
+    """
+    if deadline is None:
+        return f.read()
+    chunks = []
+    while True:
+        if time.time() >= deadline:
+            raise socket.timeout('timed out')
+        chunk = f.read(READ_CHUNK_SIZE)
+        if not chunk:
+            return ''.join(chunks)
+        chunks.append(chunk)
+
+
+def _open_file(path):
+    try:
+        content, stat = file_cache.read(path)
+    except EnvironmentError, ex:
+        raise URLError(ex)
+    # the headers urllib2 responds with for files
+    return Resource(content, {
+        'content-type': mimetypes.guess_type(path)[0] or 'text/plain',
+        'content-length': str(stat.st_size),
+        'last-modified': formatdate(stat.st_mtime, usegmt=True)
+    })
+
+
+def _set_timeout(connection, timeout):
+    connection.timeout = timeout
+    if connection.sock is not None:
+        connection.sock.settimeout(timeout)
+
+
+def _not_expired(entry):
+    return entry[0] > time.time()
+
+
+def _is_missing_error(error):
+    return isinstance(error, HTTPError) and error.code in MISSING_CODES
+
+
+# handles http(s) urls which are not pooled (proxied ones) so that the
+# deadlines of their requests are enforced
+_opener = build_opener(_DeadlineHTTPHandler, _DeadlineHTTPSHandler)
+
+_default_loader = DefaultResourceLoader()
+
+
+def default_loader():
+    """
+    The process-wide default loader, whose pooled connections are shared
+    by all parse calls that do not pass their own loader.
+    """
+    return _default_loader
@@ -0,0 +1,103 @@
+########
+# Copyright (c) 2015 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+import threading
+
+try:
+    from collections import OrderedDict
+except ImportError:
+    from ordereddict import OrderedDict
+
+
+class LRUCache(object):
+    """
+    A thread safe in-memory LRU cache, whose memory use is bounded by
+    max_size, measured in the sizes its entries are put with. A max_size of
+    0 disables it.
+
+    The in-memory caches of the parser (of documents and of files) are
+    built on it.
+    """
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        # key -> (value, size), from the least recently used
+        self._entries = OrderedDict()
+        self._size = 0
+        self._hits = 0
+        self._misses = 0
+        self._lock = threading.Lock()
+
+    def get(self, key, is_valid=None):
+        """
+        The value of key, or None if it is not cached.
+
+        :param is_valid: called with the cached value, which is dropped (and
+                         counted as a miss) if it returns False.
+        """
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None and is_valid and not is_valid(entry[0]):
+                self._size -= entry[1]
+                entry = None
+            if entry is None:
+                self._misses += 1
+                return None
+            # re-insert as the most recently used entry
+            self._entries[key] = entry
+            self._hits += 1
+            return entry[0]
+
+    def put(self, key, value, size):
+        """Cache value under key, evicting the least recently used entries
+        as needed. Values larger than max_size are not cached."""
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= previous[1]
+            if not self.max_size or size > self.max_size:
+                return
+            self._entries[key] = (value, size)
+            self._size += size
+            while self._size > self.max_size:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._size -= evicted_size
+
+    def keys(self):
+        """The cached keys, from the least recently used."""
+        with self._lock:
+            return self._entries.keys()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def resize(self, max_size):
+        """Change max_size, and clear the cache."""
+        with self._lock:
+            self.max_size = max_size
+            self._entries.clear()
+            self._size = 0
+
+    def info(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'size': self._size,
+                'max_size': self.max_size,
+                'hits': self._hits,
+                'misses': self._misses
+            }
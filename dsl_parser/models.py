@@ -52,3 +52,7 @@ class Plan(dict):
     @property
     def node_templates(self):
         return self['nodes']
+
+    @property
+    def fingerprint(self):
+        return self.get('fingerprint')
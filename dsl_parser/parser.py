@@ -16,29 +16,51 @@
 
 import os
 import copy
-import contextlib
+import json
+import hashlib
+import threading
+import itertools
 from urllib import pathname2url
-from urllib2 import urlopen, URLError, HTTPError
+from urllib2 import URLError, HTTPError
 from collections import namedtuple
 
 import yaml
-from jsonschema import validate, ValidationError
+from jsonschema import ValidationError
+from jsonschema.validators import validator_for
 from yaml.parser import ParserError
 
+from dsl_parser import archive
 from dsl_parser import constants
+from dsl_parser import document_cache
+from dsl_parser import file_cache
 from dsl_parser import functions
+from dsl_parser import futures
+from dsl_parser import import_graph
+from dsl_parser import loader
+from dsl_parser import lru_cache
 from dsl_parser import models
+from dsl_parser import resource_index
+from dsl_parser import schema_compiler
 from dsl_parser import schemas
 from dsl_parser import utils
+from dsl_parser import yaml_stream
 from dsl_parser.interfaces import interfaces_parser
+from dsl_parser.snapshot import Snapshot
 from dsl_parser.exceptions import DSLParsingFormatException
 from dsl_parser.exceptions import DSLParsingLogicException
+from dsl_parser.exceptions import DSLParsingTimeoutException
 from dsl_parser.utils import merge_schema_and_instance_properties
 from dsl_parser.utils import extract_complete_type_recursive
 
 
 functions.register_entry_point_functions()
 
+# libyaml based loading is much faster, when available
+try:
+    _YAML_LOADER = yaml.CSafeLoader
+except AttributeError:
+    _YAML_LOADER = yaml.SafeLoader
+
 DSL_VERSION_PREFIX = 'cloudify_dsl_'
 DSL_VERSION_1_0 = DSL_VERSION_PREFIX + '1_0'
 DSL_VERSION_1_1 = DSL_VERSION_PREFIX + '1_1'
@@ -70,32 +92,127 @@ DEPENDS_ON_REL_TYPE = 'cloudify.relationships.depends_on'
 CONTAINED_IN_REL_TYPE = 'cloudify.relationships.contained_in'
 CONNECTED_TO_REL_TYPE = 'cloudify.relationships.connected_to'
 DEFAULT_WORKFLOWS_PLUGIN = 'default_workflows'
+DEFAULT_ASYNC_IMPORT_WORKERS = 4
+JSON_EXTENSION = '.json'
+SCHEMA_VALID_IMPORTS_MAX_SIZE = 1024
+# streamed node templates whose script mappings are checked at once
+STREAMED_PREFETCH_BATCH_SIZE = 100
+FINGERPRINT_VERSION = 1
+# imports (url, content hash) found valid on their own
+_schema_valid_imports = lru_cache.LRUCache(SCHEMA_VALID_IMPORTS_MAX_SIZE)
 OpDescriptor = namedtuple('OpDescriptor', [
     'plugin', 'op_struct', 'name'])
 
 
-class ParseContext(dict):
+class _SchemaValidators(threading.local):
+    """
+    Validators of the DSL schemas, compiled (see schema_compiler) the first
+    time they are used and reused by later parses. Validators keep their
+    resolution scope in their resolver, so every thread has its own.
+    """
+
+    def __init__(self):
+        self._validators = {}
+
+    def get(self, schema_name):
+        validator = self._validators.get(schema_name)
+        if validator is None:
+            schema = getattr(schemas, schema_name)
+            validator_class = validator_for(schema)
+            validator_class.check_schema(schema)
+            validator = schema_compiler.compile_schema(schema,
+                                                       validator_class)
+            self._validators[schema_name] = validator
+        return validator
+
+
+_schema_validators = _SchemaValidators()
+
+
+class ParseContext(threading.local):
+    """
+    The state of a parse. Every thread has its own, so parses may run
+    concurrently in different threads.
+    """
+
+    def __init__(self):
+        self._values = {}
+
+    def clear(self):
+        self._values = {}
+
     @property
     def version(self):
-        return self['version']
+        return self._values['version']
 
     @version.setter
     def version(self, value):
-        self['version'] = value
-parse_context = ParseContext()
+        self._values['version'] = value
+
+    @property
+    def resource_loader(self):
+        return self._values.get('resource_loader') or \
+            loader.default_loader()
+
+    @resource_loader.setter
+    def resource_loader(self, value):
+        self._values['resource_loader'] = value
+
+    @property
+    def trusted(self):
+        return self._values.get('trusted', False)
 
+    @trusted.setter
+    def trusted(self, value):
+        self._values['trusted'] = value
 
-def parse_from_path(dsl_file_path, resources_base_url=None):
-    with open(dsl_file_path, 'r') as f:
-        dsl_string = f.read()
-    return _parse(dsl_string, resources_base_url, dsl_file_path)
+    @property
+    def resource_index(self):
+        if 'resource_index' not in self._values:
+            self._values['resource_index'] = resource_index.ResourceIndex(
+                self.resource_loader)
+        return self._values['resource_index']
+parse_context = ParseContext()
 
 
-def parse_from_url(dsl_url, resources_base_url=None):
+def parse_from_path(dsl_file_path, resources_base_url=None,
+                    max_import_workers=None, import_cache=None,
+                    resource_loader=None, timeout=None, snapshot=None,
+                    trusted_fingerprint=None, streaming=False):
+    """
+    Parse the blueprint at a local path. The blueprint is read through the
+    process-wide file_cache and loaded through the process-wide
+    document_cache, as its imports are, so parsing an unchanged blueprint
+    again reads and loads none of its files.
+    """
+    dsl_string, _ = file_cache.read(dsl_file_path)
+    return _parse(dsl_string, resources_base_url, dsl_file_path,
+                  max_import_workers=max_import_workers,
+                  import_cache=import_cache,
+                  resource_loader=_deadline_loader(resource_loader, timeout),
+                  snapshot=snapshot,
+                  trusted_fingerprint=trusted_fingerprint,
+                  streaming=streaming,
+                  cache_document=True)
+
+
+def parse_from_url(dsl_url, resources_base_url=None,
+                   max_import_workers=None, import_cache=None,
+                   resource_loader=None, timeout=None, snapshot=None,
+                   trusted_fingerprint=None, streaming=False):
+    resource_loader = _deadline_loader(resource_loader, timeout)
     try:
-        with contextlib.closing(urlopen(dsl_url)) as f:
-            dsl_string = f.read()
-        return _parse(dsl_string, resources_base_url, dsl_url)
+        try:
+            dsl_string = resource_loader.load(dsl_url)
+        except loader.ResourceTimeout, ex:
+            raise _timeout_exception(dsl_url, ex)
+        return _parse(dsl_string, resources_base_url, dsl_url,
+                      max_import_workers=max_import_workers,
+                      import_cache=import_cache,
+                      resource_loader=resource_loader,
+                      snapshot=snapshot,
+                      trusted_fingerprint=trusted_fingerprint,
+                      streaming=streaming)
     except HTTPError as e:
         if e.code == 404:
             # HTTPError.__str__ uses the 'msg'.
@@ -106,13 +223,215 @@ def parse_from_url(dsl_url, resources_base_url=None):
         raise
 
 
-def parse(dsl_string, resources_base_url=None):
-    return _parse(dsl_string, resources_base_url)
+def parse_from_url_async(dsl_url, resources_base_url=None,
+                         max_import_workers=DEFAULT_ASYNC_IMPORT_WORKERS,
+                         import_cache=None, resource_loader=None,
+                         timeout=None, snapshot=None,
+                         trusted_fingerprint=None, streaming=False):
+    """
+    Parse the blueprint at dsl_url in a worker thread, fetching sibling
+    imports concurrently, without blocking the caller.
+
+    :return: a futures.Future of the plan. Its add_done_callback can be
+             used to hand the plan over to an event loop.
+    """
+    return futures.submit(parse_from_url, dsl_url,
+                          resources_base_url=resources_base_url,
+                          max_import_workers=max_import_workers,
+                          import_cache=import_cache,
+                          resource_loader=resource_loader,
+                          timeout=timeout,
+                          snapshot=snapshot,
+                          trusted_fingerprint=trusted_fingerprint,
+                          streaming=streaming)
+
+
+def parse_from_archive(archive_path, blueprint_filename=None,
+                       resources_base_url=None, max_import_workers=None,
+                       import_cache=None, resource_loader=None,
+                       timeout=None, snapshot=None, trusted_fingerprint=None,
+                       streaming=False):
+    """
+    Parse a blueprint packed in a zip archive along with its imports and
+    scripts, without extracting the archive.
+
+    :param blueprint_filename: the path of the blueprint in the archive.
+                               Defaults to the main_blueprint named by the
+                               archive manifest, or blueprint.yaml.
+    :param resource_loader: the loader.ResourceLoader through which imports
+                            outside of the archive are fetched.
+    """
+    blueprint_archive = archive.BlueprintArchive(archive_path)
+    try:
+        blueprint_filename = blueprint_filename or \
+            blueprint_archive.main_blueprint
+        if not blueprint_archive.exists(blueprint_filename):
+            raise DSLParsingLogicException(
+                32, 'Blueprint {0} not found in archive {1}'.format(
+                    blueprint_filename, archive_path))
+        archive_loader = archive.ArchiveResourceLoader(
+            blueprint_archive, _deadline_loader(resource_loader, timeout))
+        dsl_url = blueprint_archive.url(blueprint_filename)
+        return _parse(archive_loader.load(dsl_url), resources_base_url,
+                      dsl_url,
+                      max_import_workers=max_import_workers,
+                      import_cache=import_cache,
+                      resource_loader=archive_loader,
+                      snapshot=snapshot,
+                      trusted_fingerprint=trusted_fingerprint,
+                      streaming=streaming)
+    finally:
+        blueprint_archive.close()
+
+
+def parse(dsl_string, resources_base_url=None, max_import_workers=None,
+          import_cache=None, resource_loader=None, timeout=None,
+          snapshot=None, trusted_fingerprint=None, streaming=False):
+    """
+    Parse a blueprint.
+
+    :param timeout: when set, the number of seconds the parse may spend
+                    fetching imports and resources, after which it fails
+                    with a DSLParsingTimeoutException. Each request is also
+                    bounded by the timeout of the loader.
+    :param snapshot: a snapshot.Snapshot (see compile_snapshot) whose
+                     documents are used for unchanged imports, instead of
+                     loading them.
+    :param trusted_fingerprint: the fingerprint of a plan the blueprint
+                                was already parsed into. When the blueprint
+                                and its imports still have this
+                                fingerprint, schema and function validation
+                                and resource existence checks are skipped.
+                                The plan is the same as an untrusted
+                                parse's, as long as the resources still
+                                exist.
+    :param streaming: when set, node templates are loaded from the YAML
+                      one at a time as they are processed, rather than
+                      along with the rest of the blueprint, which lowers the
+                      memory needed to parse blueprints with many node
+                      templates. Node template schema errors are reported
+                      as the templates are processed. Plans are the same,
+                      except for their fingerprint.
+    """
+    return _parse(dsl_string, resources_base_url,
+                  max_import_workers=max_import_workers,
+                  import_cache=import_cache,
+                  resource_loader=_deadline_loader(resource_loader, timeout),
+                  snapshot=snapshot,
+                  trusted_fingerprint=trusted_fingerprint,
+                  streaming=streaming)
+
+
+def parse_from_dict(parsed_dsl, resources_base_url=None,
+                    max_import_workers=None, import_cache=None,
+                    resource_loader=None, timeout=None, snapshot=None,
+                    trusted_fingerprint=None):
+    """
+    Parse a blueprint which is already loaded, e.g. from JSON, skipping
+    YAML loading. The parse is otherwise the same as parse's, and
+    parsed_dsl is not modified by it.
+    """
+    return _parse_dsl(_normalize_strings(parsed_dsl), resources_base_url,
+                      max_import_workers=max_import_workers,
+                      import_cache=import_cache,
+                      resource_loader=_deadline_loader(resource_loader,
+                                                       timeout),
+                      snapshot=snapshot,
+                      trusted_fingerprint=trusted_fingerprint)
+
+
+def parse_from_json(dsl_json, resources_base_url=None,
+                    max_import_workers=None, import_cache=None,
+                    resource_loader=None, timeout=None, snapshot=None,
+                    trusted_fingerprint=None):
+    """
+    Parse a blueprint given as a JSON string. See parse_from_dict.
+    """
+    # _load_json already normalizes the document it loads
+    return _parse_dsl(_load_json(dsl_json, 'Failed to parse DSL'),
+                      resources_base_url,
+                      max_import_workers=max_import_workers,
+                      import_cache=import_cache,
+                      resource_loader=_deadline_loader(resource_loader,
+                                                       timeout),
+                      snapshot=snapshot,
+                      trusted_fingerprint=trusted_fingerprint)
+
+
+def resolve_imports(dsl_string, resources_base_url=None, dsl_location=None,
+                    max_import_workers=None, import_cache=None,
+                    resource_loader=None, timeout=None, snapshot=None):
+    """
+    Fetch and load all imports of a blueprint, without parsing it.
+
+    :param max_import_workers: when set, sibling imports are fetched
+                               concurrently by up to this many threads.
+    :param import_cache: an optional import_cache.ImportCache through which
+                         http(s) imports are fetched.
+    :param resource_loader: the loader.ResourceLoader through which the
+                            imports are fetched (defaults to the
+                            process-wide loader.default_loader()).
+    :param timeout: when set, the number of seconds fetching the imports
+                    may take.
+    :param snapshot: an optional snapshot.Snapshot of imports.
+    :return: an ImportGraph describing the resolved imports tree.
+    """
+    resource_loader = _deadline_loader(resource_loader, timeout)
+    parsed_dsl = _load_document(dsl_string, dsl_location,
+                                'Failed to parse DSL')
+    if dsl_location:
+        dsl_location = _dsl_location_to_url(dsl_location, resources_base_url,
+                                            resource_loader)
+    _validate_imports_section(parsed_dsl.get(IMPORTS, []), dsl_location)
+    return _build_import_graph(parsed_dsl, dsl_location, resources_base_url,
+                               max_import_workers, import_cache,
+                               resource_loader, snapshot)
+
+
+def compile_snapshot(imports, resources_base_url=None, resource_loader=None):
+    """
+    Load imports, along with everything they import, into a
+    snapshot.Snapshot. Parse calls given the snapshot use its documents
+    instead of loading these imports again, as long as their content has
+    not changed. Snapshots are saved and loaded with Snapshot.save and
+    Snapshot.load.
+
+    :param imports: a list of imports, as they appear in the imports section
+                    of a blueprint.
+    """
+    _validate_imports_section(imports, None)
+    compiled = Snapshot()
+
+    def add_to_snapshot(import_url, content, document):
+        if isinstance(document, dict):
+            _validate_imports_section(document.get(IMPORTS, []), import_url)
+        compiled.add(import_url, content, document)
+    _build_import_graph({IMPORTS: imports}, None, resources_base_url,
+                        resource_loader=resource_loader,
+                        on_import_loaded=add_to_snapshot)
+    return compiled
+
 
+def _deadline_loader(resource_loader, timeout):
+    resource_loader = resource_loader or loader.default_loader()
+    if timeout is not None:
+        resource_loader = loader.DeadlineResourceLoader(resource_loader,
+                                                        timeout)
+    return resource_loader
 
-def _dsl_location_to_url(dsl_location, resources_base_url):
+
+def _timeout_exception(url, ex):
+    timeout_ex = DSLParsingTimeoutException(
+        33, 'Timed out fetching {0}; {1}'.format(url, ex.reason))
+    timeout_ex.failed_import = url
+    return timeout_ex
+
+
+def _dsl_location_to_url(dsl_location, resources_base_url, resource_loader):
     if dsl_location is not None:
-        dsl_location = _get_resource_location(dsl_location, resources_base_url)
+        dsl_location = _get_resource_location(dsl_location,
+                                              resources_base_url,
+                                              resource_loader=resource_loader)
         if dsl_location is None:
             ex = DSLParsingLogicException(30, 'Failed on converting dsl '
                                               'location to url - no suitable '
@@ -126,7 +445,14 @@ def _dsl_location_to_url(dsl_location, resources_base_url):
 
 def _load_yaml(yaml_stream, error_message):
     try:
-        parsed_dsl = yaml.safe_load(yaml_stream)
+        try:
+            parsed_dsl = yaml.load(yaml_stream, Loader=_YAML_LOADER)
+        except yaml.YAMLError:
+            if _YAML_LOADER is yaml.SafeLoader:
+                raise
+            # libyaml reports errors differently than the pure python
+            # loader, whose errors are the ones reported to users
+            parsed_dsl = yaml.load(yaml_stream, Loader=yaml.SafeLoader)
     except ParserError, ex:
         raise DSLParsingFormatException(-1, '{0}: Illegal yaml; {1}'
                                         .format(error_message, ex))
@@ -136,6 +462,54 @@ def _load_yaml(yaml_stream, error_message):
     return parsed_dsl
 
 
+def _load_json(json_string, error_message):
+    try:
+        parsed_dsl = json.loads(json_string)
+    except ValueError, ex:
+        raise DSLParsingFormatException(-1, '{0}: Illegal json; {1}'
+                                        .format(error_message, ex))
+    if parsed_dsl is None:
+        parsed_dsl = {}
+    return _normalize_strings(parsed_dsl)
+
+
+def _load_document(content, location, error_message):
+    """
+    Load a blueprint or import document. Documents whose location has a
+    .json extension are decoded as JSON, which is much faster than loading
+    them as YAML; ones that turn out not to be JSON are loaded as YAML.
+    """
+    if _is_json_location(location):
+        try:
+            return _load_json(content, error_message)
+        except DSLParsingFormatException:
+            pass
+    return _load_yaml(content, error_message)
+
+
+def _is_json_location(location):
+    return bool(location) and location.lower().endswith(JSON_EXTENSION)
+
+
+def _normalize_strings(value):
+    """
+    A copy of value in which strings are str when they are ascii, as they
+    are when loaded from YAML, rather than unicode, as they are when loaded
+    from JSON.
+    """
+    if isinstance(value, unicode):
+        try:
+            return value.encode('ascii')
+        except UnicodeEncodeError:
+            return value
+    if isinstance(value, dict):
+        return dict((_normalize_strings(k), _normalize_strings(v))
+                    for k, v in value.iteritems())
+    if isinstance(value, list):
+        return [_normalize_strings(v) for v in value]
+    return value
+
+
 def _create_plan_deployment_plugins(processed_nodes):
     deployment_plugins = []
     deployment_plugin_names = set()
@@ -162,22 +536,78 @@ def _create_plan_workflow_plugins(workflows, plugins):
     return workflow_plugins
 
 
-def _parse(dsl_string, resources_base_url, dsl_location=None):
+def _parse(dsl_string, resources_base_url, dsl_location=None,
+           max_import_workers=None, import_cache=None,
+           resource_loader=None, snapshot=None, trusted_fingerprint=None,
+           streaming=False, cache_document=False):
+    streamed = None
+    if streaming and not _is_json_location(dsl_location):
+        # documents which cannot be streamed are loaded whole
+        streamed = yaml_stream.load_streamed(dsl_string, NODE_TEMPLATES)
+    if streamed is not None:
+        parsed_dsl, streamed_nodes = streamed
+    else:
+        def load_document(content):
+            return _load_document(content, dsl_location,
+                                  'Failed to parse DSL')
+        if cache_document:
+            parsed_dsl = document_cache.load(dsl_location, dsl_string,
+                                             load_document)
+        else:
+            parsed_dsl = load_document(dsl_string)
+        streamed_nodes = None
+    return _parse_dsl(parsed_dsl, resources_base_url, dsl_location,
+                      max_import_workers=max_import_workers,
+                      import_cache=import_cache,
+                      resource_loader=resource_loader,
+                      snapshot=snapshot,
+                      trusted_fingerprint=trusted_fingerprint,
+                      streamed_nodes=streamed_nodes)
+
+
+def _parse_dsl(parsed_dsl, resources_base_url, dsl_location=None,
+               max_import_workers=None, import_cache=None,
+               resource_loader=None, snapshot=None,
+               trusted_fingerprint=None, streamed_nodes=None):
+    """
+    :param streamed_nodes: a yaml_stream.StreamedSection of the node
+                           templates, when they were not loaded into
+                           parsed_dsl.
+    """
+    resource_loader = resource_loader or loader.default_loader()
     try:
-        parsed_dsl = _load_yaml(dsl_string, 'Failed to parse DSL')
+        parse_context.resource_loader = resource_loader
 
         # not sure about the name. this will actually be the dsl_location
         # minus the /blueprint.yaml at the end of it
         resource_base = None
         if dsl_location:
             dsl_location = _dsl_location_to_url(dsl_location,
-                                                resources_base_url)
+                                                resources_base_url,
+                                                resource_loader)
             resource_base = dsl_location[:dsl_location.rfind('/')]
-        combined_parsed_dsl = _combine_imports(parsed_dsl,
+        imports_graph = _resolve_imports_graph(parsed_dsl,
                                                dsl_location,
-                                               resources_base_url)
-
-        _validate_dsl_schema(combined_parsed_dsl)
+                                               resources_base_url,
+                                               max_import_workers,
+                                               import_cache,
+                                               resource_loader,
+                                               snapshot)
+
+        fingerprint = _fingerprint(parsed_dsl, imports_graph, dsl_location,
+                                   resources_base_url, streamed_nodes)
+        trusted = fingerprint is not None and \
+            fingerprint == trusted_fingerprint
+        parse_context.trusted = trusted
+
+        # imports are validated before they are merged, which modifies them
+        imports_schema_valid = not trusted and \
+            _imports_schema_valid(imports_graph)
+        combined_parsed_dsl = _combine_imports(parsed_dsl, imports_graph)
+
+        if not trusted:
+            _validate_combined_dsl_schema(parsed_dsl, combined_parsed_dsl,
+                                          imports_schema_valid)
 
         dsl_version = combined_parsed_dsl[VERSION]
         if dsl_version not in SUPPORTED_VERSIONS:
@@ -188,8 +618,24 @@ def _parse(dsl_string, resources_base_url, dsl_location=None):
         parsed_dsl_version = parse_dsl_version(dsl_version)
         parse_context.version = parsed_dsl_version
 
-        nodes = combined_parsed_dsl[NODE_TEMPLATES]
-        node_names_set = set(nodes.keys())
+        if resource_base and not trusted:
+            # check all script mappings at once, rather than one by one
+            # while processing the operations
+            _prefetch_scripts(combined_parsed_dsl, resource_base)
+
+        if streamed_nodes is not None:
+            node_names_set = set(streamed_nodes.names)
+            nodes = _validated_node_templates(streamed_nodes, trusted)
+            if resource_base and not trusted:
+                # streamed templates are not part of combined_parsed_dsl,
+                # so their scripts are checked as they are loaded
+                nodes = _prefetched_node_templates(
+                    nodes, _get_dict_prop(combined_parsed_dsl, PLUGINS),
+                    resource_base)
+        else:
+            nodes = combined_parsed_dsl[NODE_TEMPLATES]
+            node_names_set = set(nodes.keys())
+            nodes = nodes.iteritems()
 
         top_level_relationships = _process_relationships(
             combined_parsed_dsl, resource_base)
@@ -205,18 +651,26 @@ def _parse(dsl_string, resources_base_url, dsl_location=None):
                                                         dsl_version))
                                  for (name, plugin) in plugins.items())
 
+        complete_types = _complete_node_types(
+            _get_dict_prop(combined_parsed_dsl, NODE_TYPES))
+        type_hierarchies = utils.TypeHierarchies(
+            _get_dict_prop(combined_parsed_dsl, NODE_TYPES),
+            is_relationships=False)
+        relationship_hierarchies = utils.TypeHierarchies(
+            top_level_relationships, is_relationships=True)
         processed_nodes = map(lambda node_name_and_node: _process_node(
             node_name_and_node[0], node_name_and_node[1], combined_parsed_dsl,
-            top_level_relationships, node_names_set, type_impls,
+            complete_types, type_hierarchies, top_level_relationships,
+            relationship_hierarchies, node_names_set, type_impls,
             relationship_impls, processed_plugins, resource_base),
-            nodes.iteritems())
+            nodes)
 
         inputs = combined_parsed_dsl.get(INPUTS, {})
         outputs = combined_parsed_dsl.get(OUTPUTS, {})
 
         _post_process_nodes(processed_nodes,
-                            _get_dict_prop(combined_parsed_dsl, NODE_TYPES),
-                            _get_dict_prop(combined_parsed_dsl, RELATIONSHIPS),
+                            type_hierarchies,
+                            relationship_hierarchies,
                             processed_plugins,
                             type_impls,
                             relationship_impls,
@@ -256,27 +710,30 @@ def _parse(dsl_string, resources_base_url, dsl_location=None):
             constants.DEPLOYMENT_PLUGINS_TO_INSTALL: plan_deployment_plugins,
             OUTPUTS: outputs,
             'workflow_plugins_to_install': workflow_plugins_to_install,
-            'version': _process_dsl_version(dsl_version)
+            'version': _process_dsl_version(dsl_version),
+            'fingerprint': fingerprint
         })
 
-        functions.validate_functions(plan)
+        if not trusted:
+            functions.validate_functions(plan)
 
         return plan
     finally:
         parse_context.clear()
 
 
-def _post_process_nodes(processed_nodes, types, relationships, plugins,
+def _post_process_nodes(processed_nodes, type_hierarchies,
+                        relationship_hierarchies, plugins,
                         type_impls, relationship_impls,
                         resource_base):
     node_name_to_node = dict((node['id'], node) for node in processed_nodes)
 
-    depends_on_rel_types = _build_family_descendants_set(
-        relationships, DEPENDS_ON_REL_TYPE)
-    contained_in_rel_types = _build_family_descendants_set(
-        relationships, CONTAINED_IN_REL_TYPE)
-    connected_to_rel_types = _build_family_descendants_set(
-        relationships, CONNECTED_TO_REL_TYPE)
+    depends_on_rel_types = relationship_hierarchies.descendants(
+        DEPENDS_ON_REL_TYPE)
+    contained_in_rel_types = relationship_hierarchies.descendants(
+        CONTAINED_IN_REL_TYPE)
+    connected_to_rel_types = relationship_hierarchies.descendants(
+        CONNECTED_TO_REL_TYPE)
     for node in processed_nodes:
         _post_process_node_relationships(node,
                                          node_name_to_node,
@@ -284,12 +741,12 @@ def _post_process_nodes(processed_nodes, types, relationships, plugins,
                                          contained_in_rel_types,
                                          connected_to_rel_types,
                                          depends_on_rel_types,
-                                         relationships,
+                                         relationship_hierarchies,
                                          resource_base)
-        node[TYPE_HIERARCHY] = _create_type_hierarchy(node['type'], types)
+        node[TYPE_HIERARCHY] = type_hierarchies.hierarchy(node['type'])
 
     # set host_id property to all relevant nodes
-    host_types = _build_family_descendants_set(types, HOST_TYPE)
+    host_types = type_hierarchies.descendants(HOST_TYPE)
     for node in processed_nodes:
         host_id = _extract_node_host_id(node, node_name_to_node, host_types,
                                         contained_in_rel_types)
@@ -333,27 +790,13 @@ def _post_process_nodes(processed_nodes, types, relationships, plugins,
     _validate_relationship_impls(relationship_impls)
 
 
-def _create_type_hierarchy(type_name, types):
-    """
-    Creates node types hierarchy as list where the last type in the list is
-    the actual node type.
-    """
-    current_type = types[type_name]
-    if 'derived_from' in current_type:
-        parent_type_name = current_type['derived_from']
-        types_hierarchy = _create_type_hierarchy(parent_type_name, types)
-        types_hierarchy.append(type_name)
-        return types_hierarchy
-    return [type_name]
-
-
 def _post_process_node_relationships(processed_node,
                                      node_name_to_node,
                                      plugins,
                                      contained_in_rel_types,
                                      connected_to_rel_types,
                                      depends_on_rel_type,
-                                     relationships,
+                                     relationship_hierarchies,
                                      resource_base):
     contained_in_relationships = []
     if RELATIONSHIPS in processed_node:
@@ -370,8 +813,8 @@ def _post_process_node_relationships(processed_node,
                                            connected_to_rel_types,
                                            depends_on_rel_type,
                                            contained_in_relationships)
-            relationship[TYPE_HIERARCHY] = _create_type_hierarchy(
-                relationship['type'], relationships)
+            relationship[TYPE_HIERARCHY] = \
+                relationship_hierarchies.hierarchy(relationship['type'])
 
     if len(contained_in_relationships) > 1:
         ex = DSLParsingLogicException(
@@ -531,20 +974,6 @@ def _validate_agent_plugins_on_host_nodes(processed_nodes):
                                                          constants.HOST_AGENT))
 
 
-def _build_family_descendants_set(types_dict, derived_from):
-    return set(type_name for type_name in types_dict.iterkeys()
-               if _is_derived_from(type_name, types_dict, derived_from))
-
-
-def _is_derived_from(type_name, types, derived_from):
-    if type_name == derived_from:
-        return True
-    elif 'derived_from' in types[type_name]:
-        return _is_derived_from(types[type_name]['derived_from'], types,
-                                derived_from)
-    return False
-
-
 def relationship_type_merging_function(overridden_relationship_type,
                                        overriding_relationship_type):
 
@@ -593,17 +1022,7 @@ def extract_complete_relationship_type(relationship_types,
                                        relationship_type):
 
     if 'derived_from' not in relationship_type:
-        # top level types do not undergo merge properly,
-        # which means the operations are not augmented.
-        # do so here
-        source_interfaces = relationship_type.get('source_interfaces', {})
-        for interface_name, interface in source_interfaces.iteritems():
-            for operation_name, operation in interface.iteritems():
-                augment_operation(operation)
-        target_interfaces = relationship_type.get('target_interfaces', {})
-        for interface_name, interface in target_interfaces.iteritems():
-            for operation_name, operation in interface.iteritems():
-                augment_operation(operation)
+        _augment_relationship_type_operations(relationship_type)
 
     return extract_complete_type_recursive(
         dsl_type_name=relationship_type_name,
@@ -614,18 +1033,34 @@ def extract_complete_relationship_type(relationship_types,
     )
 
 
+def _complete_relationship_types(relationship_types):
+    """
+    The complete relationship types of a parse, each computed once.
+    See utils.CompleteTypes.
+    """
+    return utils.CompleteTypes(
+        dsl_container=relationship_types,
+        merging_func=relationship_type_merging_function,
+        is_relationships=True,
+        prepare_root_func=_augment_relationship_type_operations)
+
+
+def _augment_relationship_type_operations(relationship_type):
+    # top level types do not undergo merge properly,
+    # which means the operations are not augmented.
+    # do so here
+    for interfaces in [SOURCE_INTERFACES, TARGET_INTERFACES]:
+        for interface in relationship_type.get(interfaces, {}).itervalues():
+            for operation in interface.itervalues():
+                augment_operation(operation)
+
+
 def extract_complete_node_type(node_types,
                                node_type_name,
                                node_type):
 
     if 'derived_from' not in node_type:
-        # top level types do not undergo merge properly,
-        # which means the operations are not augmented.
-        # do so here
-        interfaces = node_type.get('interfaces', {})
-        for interface_name, interface in interfaces.iteritems():
-            for operation_name, operation in interface.iteritems():
-                augment_operation(operation)
+        _augment_node_type_operations(node_type)
 
     return extract_complete_type_recursive(
         dsl_type_name=node_type_name,
@@ -636,6 +1071,28 @@ def extract_complete_node_type(node_types,
     )
 
 
+def _complete_node_types(node_types):
+    """
+    The complete node types of a parse, each computed once.
+    See utils.CompleteTypes.
+    """
+    return utils.CompleteTypes(
+        dsl_container=node_types,
+        merging_func=node_type_interfaces_merging_function,
+        is_relationships=False,
+        prepare_root_func=_augment_node_type_operations)
+
+
+def _augment_node_type_operations(node_type):
+    # top level types do not undergo merge properly,
+    # which means the operations are not augmented.
+    # do so here
+    interfaces = node_type.get('interfaces', {})
+    for interface_name, interface in interfaces.iteritems():
+        for operation_name, operation in interface.iteritems():
+            augment_operation(operation)
+
+
 def augment_operation(operation):
     if isinstance(operation, str):
         operation = {
@@ -659,24 +1116,21 @@ def _process_relationships(combined_parsed_dsl, resource_base):
         return processed_relationships
 
     relationship_types = combined_parsed_dsl[RELATIONSHIPS]
+    complete_types = _complete_relationship_types(relationship_types)
+    plugins = _get_dict_prop(combined_parsed_dsl, PLUGINS)
 
     for relationship_type_name, relationship_type in \
             relationship_types.iteritems():
-        complete_relationship = extract_complete_relationship_type(
-            relationship_type=relationship_type,
-            relationship_type_name=relationship_type_name,
-            relationship_types=relationship_types
-        )
-
-        plugins = _get_dict_prop(combined_parsed_dsl, PLUGINS)
+        complete_relationship = complete_types.get(relationship_type_name)
         _validate_relationship_fields(relationship_type, plugins,
                                       relationship_type_name,
                                       resource_base)
+        # complete types share their inherited parts with their ancestors,
+        # while every processed relationship is a copy of its own
         complete_rel_obj_copy = copy.deepcopy(complete_relationship)
+        complete_rel_obj_copy['name'] = relationship_type_name
         processed_relationships[relationship_type_name] = \
             complete_rel_obj_copy
-        processed_relationships[relationship_type_name]['name'] = \
-            relationship_type_name
     return processed_relationships
 
 
@@ -775,7 +1229,7 @@ def _extract_plugin_name_and_operation_mapping_from_operation(
             plugin=plugins[longest_prefix_plugin_name],
             op_struct=operation_struct)
     elif resource_base and _resource_exists(resource_base, operation_mapping):
-        operation_payload = copy.deepcopy(operation_payload or {})
+        operation_payload = dict(operation_payload or {})
         if constants.SCRIPT_PATH_PROPERTY in operation_payload:
             message = 'Cannot define {0} property in {1} for {2} "{3}"' \
                 .format(constants.SCRIPT_PATH_PROPERTY,
@@ -840,7 +1294,87 @@ def _extract_plugin_name_and_operation_mapping_from_operation(
 
 
 def _resource_exists(resource_base, resource_name):
-    return _validate_url_exists('{0}/{1}'.format(resource_base, resource_name))
+    if parse_context.trusted:
+        # mappings which are neither plugin operations nor resources fail
+        # the parse, so every one checked in a trusted blueprint existed
+        return True
+    url = '{0}/{1}'.format(resource_base, resource_name)
+    try:
+        return parse_context.resource_index.exists(url)
+    except loader.ResourceTimeout, ex:
+        raise _timeout_exception(url, ex)
+
+
+def _script_mappings(combined_parsed_dsl):
+    """
+    Operation and workflow mappings which may point to scripts, i.e. which
+    are not prefixed by a plugin name.
+    """
+    plugin_prefixes = tuple('{0}.'.format(plugin_name) for plugin_name
+                            in _get_dict_prop(combined_parsed_dsl, PLUGINS))
+
+    def mapping_of(operation_content, mapping_field_name):
+        if isinstance(operation_content, basestring):
+            return operation_content
+        if isinstance(operation_content, dict):
+            return operation_content.get(mapping_field_name)
+        return None
+
+    def interfaces_mappings(interfaces):
+        for interface in (interfaces or {}).itervalues():
+            for operation in (interface or {}).itervalues():
+                yield mapping_of(operation, 'implementation')
+
+    def relationship_mappings(relationship):
+        for interfaces in [relationship.get(SOURCE_INTERFACES),
+                           relationship.get(TARGET_INTERFACES)]:
+            for mapping in interfaces_mappings(interfaces):
+                yield mapping
+
+    def all_mappings():
+        for node_type in _get_dict_prop(combined_parsed_dsl,
+                                        NODE_TYPES).itervalues():
+            for mapping in interfaces_mappings(node_type.get(INTERFACES)):
+                yield mapping
+        for node in _get_dict_prop(combined_parsed_dsl,
+                                   NODE_TEMPLATES).itervalues():
+            for mapping in interfaces_mappings(node.get(INTERFACES)):
+                yield mapping
+            for relationship in node.get(RELATIONSHIPS, []):
+                for mapping in relationship_mappings(relationship):
+                    yield mapping
+        for relationship in _get_dict_prop(combined_parsed_dsl,
+                                           RELATIONSHIPS).itervalues():
+            for mapping in relationship_mappings(relationship):
+                yield mapping
+        for workflow in _get_dict_prop(combined_parsed_dsl,
+                                       WORKFLOWS).itervalues():
+            yield mapping_of(workflow, 'mapping')
+
+    return set(mapping for mapping in all_mappings()
+               if mapping and not mapping.startswith(plugin_prefixes))
+
+
+def _prefetch_scripts(parsed_dsl, resource_base):
+    parse_context.resource_index.prefetch(
+        '{0}/{1}'.format(resource_base, mapping)
+        for mapping in _script_mappings(parsed_dsl))
+
+
+def _prefetched_node_templates(nodes, plugins, resource_base):
+    """
+    The (name, template) pairs of nodes, whose script mappings are
+    prefetched a batch of STREAMED_PREFETCH_BATCH_SIZE templates at a time.
+    """
+    nodes = iter(nodes)
+    while True:
+        batch = list(itertools.islice(nodes, STREAMED_PREFETCH_BATCH_SIZE))
+        if not batch:
+            return
+        _prefetch_scripts({PLUGINS: plugins, NODE_TEMPLATES: dict(batch)},
+                          resource_base)
+        for node_name_and_node in batch:
+            yield node_name_and_node
 
 
 def _process_workflows(workflows, plugins, resource_base):
@@ -862,22 +1396,41 @@ def _process_workflows(workflows, plugins, resource_base):
 
 
 def _process_policy_types(policy_types):
-    processed = copy.deepcopy(policy_types)
+    processed = dict((name, dict(policy))
+                     for name, policy in policy_types.iteritems())
     for policy in processed.values():
         policy[PROPERTIES] = policy.get(PROPERTIES, {})
     return processed
 
 
 def _process_policy_triggers(policy_triggers):
-    processed = copy.deepcopy(policy_triggers)
+    processed = dict((name, dict(trigger))
+                     for name, trigger in policy_triggers.iteritems())
     for trigger in processed.values():
         trigger[PARAMETERS] = trigger.get(PARAMETERS, {})
     return processed
 
 
+def _copy_group(group):
+    """
+    A copy of a group in which its policies and their triggers, which are
+    processed in place, are copied, while the rest of it is shared.
+    """
+    group = dict(group)
+    group['policies'] = dict((name, dict(policy))
+                             for name, policy in group['policies'].iteritems())
+    for policy in group['policies'].itervalues():
+        if 'triggers' in policy:
+            policy['triggers'] = dict(
+                (name, dict(trigger))
+                for name, trigger in policy['triggers'].iteritems())
+    return group
+
+
 def _process_groups(groups, policy_types, policy_triggers, processed_nodes):
     node_names = set(n['name'] for n in processed_nodes)
-    processed_groups = copy.deepcopy(groups)
+    processed_groups = dict((name, _copy_group(group))
+                            for name, group in groups.iteritems())
     for group_name, group in processed_groups.items():
         for member in group['members']:
             if member not in node_names:
@@ -932,7 +1485,7 @@ def _process_groups(groups, policy_types, policy_triggers, processed_nodes):
 
 def _process_node_relationships(node, node_name, node_names_set,
                                 processed_node, top_level_relationships,
-                                relationship_impls):
+                                relationship_hierarchies, relationship_impls):
     if RELATIONSHIPS in node:
         relationships = []
         for relationship in node[RELATIONSHIPS]:
@@ -940,7 +1493,7 @@ def _process_node_relationships(node, node_name, node_names_set,
             relationship_type, impl_properties = \
                 _get_relationship_implementation_if_exists(
                     node_name, relationship['target'], relationship_impls,
-                    relationship_type, top_level_relationships)
+                    relationship_type, relationship_hierarchies)
             relationship['type'] = relationship_type
             # validating only the instance relationship values - the inherited
             # relationship values if any
@@ -1004,7 +1557,7 @@ def _process_node_relationships(node, node_name, node_names_set,
 
 
 def _get_implementation(lookup_message_str, type_name, implementations,
-                        impl_category, types, err_code_ambig,
+                        impl_category, type_hierarchies, err_code_ambig,
                         err_code_derive, candidate_func):
     candidates = dict((impl_name, impl_content) for impl_name, impl_content in
                       implementations.iteritems() if
@@ -1026,7 +1579,7 @@ def _get_implementation(lookup_message_str, type_name, implementations,
     impl = candidates.values()[0]
     impl_name = candidates.keys()[0]
     impl_type = impl['type']
-    if not _is_derived_from(impl_type, types, type_name):
+    if not type_hierarchies.is_derived_from(impl_type, type_name):
         ex = \
             DSLParsingLogicException(
                 err_code_derive,
@@ -1043,7 +1596,8 @@ def _get_implementation(lookup_message_str, type_name, implementations,
 
 
 def _get_type_implementation_if_exists(node_name, node_type_name,
-                                       type_implementations, types):
+                                       type_implementations,
+                                       type_hierarchies):
 
     def candidate_function(impl_content):
         return impl_content['node_ref'] == node_name
@@ -1052,7 +1606,7 @@ def _get_type_implementation_if_exists(node_name, node_type_name,
                                node_type_name,
                                type_implementations,
                                'node',
-                               types,
+                               type_hierarchies,
                                103,
                                102,
                                candidate_function)
@@ -1068,20 +1622,20 @@ def _get_relationship_implementation_if_exists(source_node_name,
                                                target_node_name,
                                                relationship_impls,
                                                relationship_type,
-                                               relationships):
+                                               relationship_hierarchies):
     def candidate_function(impl_content):
         return \
             impl_content['source_node_ref'] == source_node_name and \
             impl_content['target_node_ref'] == target_node_name and \
-            _is_derived_from(impl_content['type'], relationships,
-                             relationship_type)
+            relationship_hierarchies.is_derived_from(impl_content['type'],
+                                                     relationship_type)
 
     impl = _get_implementation('{0}->{1}'.format(source_node_name,
                                                  target_node_name),
                                relationship_type,
                                relationship_impls,
                                'relationship',
-                               relationships,
+                               relationship_hierarchies,
                                108,
                                109,
                                candidate_function)
@@ -1119,8 +1673,9 @@ def _workflow_operation_struct(plugin_name,
     }
 
 
-def _process_node(node_name, node, parsed_dsl,
-                  top_level_relationships, node_names_set, type_impls,
+def _process_node(node_name, node, parsed_dsl, complete_types,
+                  type_hierarchies, top_level_relationships,
+                  relationship_hierarchies, node_names_set, type_impls,
                   relationship_impls, plugins, resource_base):
     declared_node_type_name = node['type']
     processed_node = {'name': node_name,
@@ -1140,16 +1695,14 @@ def _process_node(node_name, node, parsed_dsl,
         _get_type_implementation_if_exists(
             node_name, declared_node_type_name,
             type_impls,
-            parsed_dsl[NODE_TYPES])
+            type_hierarchies)
     processed_node['type'] = node_type_name
 
-    node_type = parsed_dsl[NODE_TYPES][node_type_name]
-    complete_node_type = _extract_complete_node(node_type,
-                                                node_type_name,
-                                                parsed_dsl[NODE_TYPES],
-                                                node_name,
-                                                node,
-                                                impl_properties)
+    complete_node_type = _extract_complete_node(
+        complete_types.get(node_type_name),
+        node_name,
+        node,
+        impl_properties)
     processed_node[PROPERTIES] = complete_node_type[PROPERTIES]
     processed_node[PLUGINS] = {}
     # handle plugins and operations
@@ -1167,7 +1720,7 @@ def _process_node(node_name, node, parsed_dsl,
     # handle relationships
     _process_node_relationships(node, node_name, node_names_set,
                                 processed_node, top_level_relationships,
-                                relationship_impls)
+                                relationship_hierarchies, relationship_impls)
 
     processed_node[PROPERTIES]['cloudify_runtime'] = {}
 
@@ -1179,17 +1732,25 @@ def _process_node(node_name, node, parsed_dsl,
 
 def _extract_node_host_id(processed_node, node_name_to_node, host_types,
                           contained_in_rel_types):
-    if processed_node['type'] in host_types:
-        return processed_node['id']
-    else:
-        if RELATIONSHIPS in processed_node:
-            for rel in processed_node[RELATIONSHIPS]:
-                if rel['type'] in contained_in_rel_types:
-                    return _extract_node_host_id(
-                        node_name_to_node[rel['target_id']],
-                        node_name_to_node,
-                        host_types,
-                        contained_in_rel_types)
+    # follow the contained_in relationships up to a host, if there is one
+    containers = []
+    visited = set()
+    while processed_node['type'] not in host_types:
+        if processed_node['id'] in visited:
+            containers.append(processed_node['id'])
+            ex = DSLParsingLogicException(
+                113, 'Node {0} is contained in itself: {1}'
+                     .format(processed_node['id'], ' --> '.join(containers)))
+            ex.circular_dependency = containers
+            raise ex
+        visited.add(processed_node['id'])
+        containers.append(processed_node['id'])
+        contained_in = [rel for rel in processed_node.get(RELATIONSHIPS, [])
+                        if rel['type'] in contained_in_rel_types]
+        if not contained_in:
+            return None
+        processed_node = node_name_to_node[contained_in[0]['target_id']]
+    return processed_node['id']
 
 
 def _process_plugin(plugin, plugin_name, dsl_version):
@@ -1233,7 +1794,7 @@ def _process_plugin(plugin, plugin_name, dsl_version):
             .format(plugin_name, constants.PLUGIN_SOURCE_KEY)
         )
 
-    processed_plugin = copy.deepcopy(plugin)
+    processed_plugin = dict(plugin)
 
     # augment plugin dictionary
     processed_plugin[constants.PLUGIN_NAME_KEY] = plugin_name
@@ -1266,19 +1827,13 @@ def is_version_equal_or_greater_than(version_found, version_required):
     return greater_or_equals
 
 
-def _extract_complete_node(node_type,
-                           node_type_name,
-                           node_types,
+def _extract_complete_node(complete_type,
                            node_name,
                            node,
                            impl_properties):
-
-    complete_type = extract_complete_node_type(
-        node_type=node_type,
-        node_types=node_types,
-        node_type_name=node_type_name
-    )
-
+    """
+    Merge a node template on top of its (shared) complete node type.
+    """
     complete_node = {
         INTERFACES:
         interfaces_parser.merge_node_type_and_node_template_interfaces(
@@ -1330,7 +1885,32 @@ def _get_dict_prop(dictionary, prop_name):
     return dictionary.get(prop_name, {})
 
 
-def _combine_imports(parsed_dsl, dsl_location, resources_base_url):
+def _resolve_imports_graph(parsed_dsl, dsl_location, resources_base_url,
+                           max_import_workers=None, import_cache=None,
+                           resource_loader=None, snapshot=None):
+    """
+    The imports graph of the main blueprint, or None if it has no imports.
+    """
+    if VERSION not in parsed_dsl:
+        raise DSLParsingLogicException(
+            27, '{0} field must appear in the main blueprint file'.format(
+                VERSION))
+
+    if IMPORTS not in parsed_dsl:
+        return None
+
+    _validate_imports_section(parsed_dsl[IMPORTS], dsl_location)
+
+    return _build_import_graph(parsed_dsl,
+                               dsl_location,
+                               resources_base_url,
+                               max_import_workers,
+                               import_cache,
+                               resource_loader,
+                               snapshot)
+
+
+def _combine_imports(parsed_dsl, imports_graph):
     def _merge_into_dict_or_throw_on_duplicate(from_dict, to_dict,
                                                top_level_key, path):
         for _key, _value in from_dict.iteritems():
@@ -1350,40 +1930,26 @@ def _combine_imports(parsed_dsl, dsl_location, resources_base_url):
                              POLICY_TYPES, GROUPS, POLICY_TRIGGERS])
     merge_one_nested_level_no_override = dict()
 
-    combined_parsed_dsl = copy.deepcopy(parsed_dsl)
+    # parsed_dsl is private to the parse, so its sections are shared rather
+    # than copied, except for those which imports are merged into
+    combined_parsed_dsl = dict(parsed_dsl)
+    copied_sections = set()
 
-    if VERSION not in parsed_dsl:
-        raise DSLParsingLogicException(
-            27, '{0} field must appear in the main blueprint file'.format(
-                VERSION))
+    def _writable_section(key):
+        if key not in copied_sections:
+            combined_parsed_dsl[key] = dict(combined_parsed_dsl[key])
+            copied_sections.add(key)
+        return combined_parsed_dsl[key]
 
-    if IMPORTS not in parsed_dsl:
+    if imports_graph is None:
         return combined_parsed_dsl
 
     dsl_version = parsed_dsl[VERSION]
-    _validate_imports_section(parsed_dsl[IMPORTS], dsl_location)
 
-    ordered_imports_list = []
-    _build_ordered_imports_list(parsed_dsl, ordered_imports_list,
-                                dsl_location,
-                                resources_base_url)
-    if dsl_location:
-        ordered_imports_list = ordered_imports_list[1:]
-
-    for single_import in ordered_imports_list:
-        try:
-            # (note that this check is only to verify nothing went wrong in
-            # the meanwhile, as we've already read
-            # from all imported files earlier)
-            with contextlib.closing(urlopen(single_import)) as f:
-                parsed_imported_dsl = _load_yaml(
-                    f, 'Failed to parse import {0}'.format(single_import))
-        except URLError, ex:
-            error = DSLParsingLogicException(
-                13, 'Failed on import - Unable to open import url {0}; {1}'
-                    .format(single_import, ex.message))
-            error.failed_import = single_import
-            raise error
+    for single_import in imports_graph.ordered_imports:
+        # the graph is private to the parse, which consumes it: its
+        # documents are merged in place (see ImportGraph.document)
+        parsed_imported_dsl = imports_graph.document(single_import)
 
         if VERSION in parsed_imported_dsl:
             imported_dsl_version = parsed_imported_dsl[VERSION]
@@ -1407,22 +1973,25 @@ def _combine_imports(parsed_dsl, dsl_location, resources_base_url):
             if key not in combined_parsed_dsl:
                 # simply add this first level property to the dsl
                 combined_parsed_dsl[key] = value
+                copied_sections.add(key)
             else:
                 if key in merge_no_override:
                     # this section will combine dictionary entries of the top
                     # level only, with no overrides
                     _merge_into_dict_or_throw_on_duplicate(
-                        value, combined_parsed_dsl[key], key, [])
+                        value, _writable_section(key), key, [])
                 elif key in merge_one_nested_level_no_override:
                     # this section will combine dictionary entries on up to one
                     # nested level, yet without overrides
+                    section = _writable_section(key)
                     for nested_key, nested_value in value.iteritems():
-                        if nested_key not in combined_parsed_dsl[key]:
-                            combined_parsed_dsl[key][nested_key] = nested_value
+                        if nested_key not in section:
+                            section[nested_key] = nested_value
                         else:
+                            section[nested_key] = dict(section[nested_key])
                             _merge_into_dict_or_throw_on_duplicate(
                                 nested_value,
-                                combined_parsed_dsl[key][nested_key],
+                                section[nested_key],
                                 key, [nested_key])
                 else:
                     # first level property is not white-listed for merge -
@@ -1438,81 +2007,232 @@ def _combine_imports(parsed_dsl, dsl_location, resources_base_url):
 
 
 def _get_resource_location(resource_name, resources_base_url,
-                           current_resource_context=None):
+                           current_resource_context=None,
+                           resource_loader=None,
+                           url_exists=None):
+    resource_loader = resource_loader or loader.default_loader()
+    url_exists = url_exists or resource_loader.exists
     # Already url format
-    if resource_name.startswith('http:')\
-            or resource_name.startswith('https:')\
-            or resource_name.startswith('file:')\
-            or resource_name.startswith('ftp:'):
+    if resource_loader.is_url(resource_name):
         return resource_name
 
     # Points to an existing file
-    if os.path.exists(resource_name):
+    if resource_loader.resolves_local_paths and \
+            os.path.exists(resource_name):
         return 'file:{0}'.format(pathname2url(os.path.abspath(resource_name)))
 
     if current_resource_context:
         candidate_url = current_resource_context[
             :current_resource_context.rfind('/') + 1] + resource_name
-        if _validate_url_exists(candidate_url):
+        if url_exists(candidate_url):
             return candidate_url
 
     if resources_base_url:
         return resources_base_url + resource_name
 
 
-def _validate_url_exists(url):
-    try:
-        with contextlib.closing(urlopen(url)):
+def _build_import_graph(parsed_dsl, dsl_location, resources_base_url,
+                        max_import_workers=None, import_cache=None,
+                        resource_loader=None, snapshot=None,
+                        on_import_loaded=None):
+    resource_loader = resource_loader or loader.default_loader()
+    graph = import_graph.ImportGraph(dsl_location, parsed_dsl)
+    # contents of relative imports, fetched while proving they exist
+    fetched_contents = {}
+
+    def fetch_import(import_url):
+        if import_cache and import_cache.is_cacheable(import_url):
+            return import_cache.fetch(import_url, resource_loader)
+        return resource_loader.load(import_url)
+
+    def import_exists(candidate_url):
+        try:
+            fetched_contents[candidate_url] = fetch_import(candidate_url)
             return True
-    except URLError:
+        except loader.ResourceTimeout, ex:
+            raise _timeout_exception(candidate_url, ex)
+        except URLError:
+            return False
+
+    def resolve_import(another_import, current_import):
+        import_url = _get_resource_location(another_import,
+                                            resources_base_url,
+                                            current_import,
+                                            resource_loader,
+                                            import_exists)
+        if import_url is None:
+            ex = DSLParsingLogicException(
+                13, 'Failed on import - no suitable location found for '
+                    'import {0}'.format(another_import))
+            ex.failed_import = another_import
+            raise ex
+        return import_url
+
+    def load_import(another_import, import_url):
+        try:
+            imported_dsl_string = fetched_contents.pop(import_url, None)
+            if imported_dsl_string is None:
+                imported_dsl_string = fetch_import(import_url)
+        except loader.ResourceTimeout, ex:
+            raise _timeout_exception(import_url, ex)
+        except URLError, ex:
+            ex = DSLParsingLogicException(
+                13, 'Failed on import - Unable to open import url '
+                    '{0}; {1}'.format(import_url, ex.message))
+            ex.failed_import = import_url
+            raise ex
+        document = None
+        if snapshot is not None:
+            document = snapshot.document(import_url, imported_dsl_string)
+        if document is None:
+            document = document_cache.load(
+                import_url, imported_dsl_string,
+                lambda content: _load_document(
+                    content, import_url,
+                    'Failed to parse import {0} (via {1})'
+                    .format(another_import, import_url)))
+        if on_import_loaded:
+            on_import_loaded(import_url, imported_dsl_string, document)
+        graph.set_content_hash(import_url,
+                               hashlib.sha1(imported_dsl_string).hexdigest())
+        return document
+
+    def document_imports(document):
+        return document[IMPORTS] if IMPORTS in document else []
+
+    if max_import_workers:
+        fetcher = import_graph.ConcurrentImportsFetcher(
+            resolve_import, load_import, document_imports, max_import_workers,
+            known_documents={dsl_location: parsed_dsl})
+    else:
+        fetcher = import_graph.SerialImportsFetcher(resolve_import,
+                                                    load_import)
+
+    def _build_import_graph_recursive(_parsed_dsl, _current_import):
+        for fetched_import in fetcher.fetch(document_imports(_parsed_dsl),
+                                            _current_import):
+            import_url = fetched_import.url()
+            graph.add_import(_current_import, import_url)
+            if import_url not in graph:
+                imported_dsl = fetched_import.document()
+                graph.add_document(import_url, imported_dsl)
+                _build_import_graph_recursive(imported_dsl, import_url)
+
+    try:
+        _build_import_graph_recursive(parsed_dsl, dsl_location)
+    finally:
+        fetcher.close()
+    return graph
+
+
+def _fingerprint(parsed_dsl, imports_graph, dsl_location,
+                 resources_base_url, streamed_nodes=None):
+    """
+    A fingerprint of everything a parse depends on: the blueprint, its
+    resolved imports along with their content, and the locations resources
+    are resolved from. None if the blueprint cannot be fingerprinted.
+
+    Streamed node templates are not in parsed_dsl, so the content they are
+    loaded from is fingerprinted instead.
+    """
+    try:
+        blueprint = json.dumps(parsed_dsl, sort_keys=True, default=repr)
+    except (TypeError, ValueError):
+        return None
+    parts = [str(FINGERPRINT_VERSION), dsl_location or '',
+             resources_base_url or '', blueprint]
+    if imports_graph is not None:
+        for import_url in imports_graph.ordered_imports:
+            parts.extend([import_url, imports_graph.content_hash(import_url)])
+    if streamed_nodes is not None:
+        parts.append(streamed_nodes.content)
+    fingerprint = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, unicode):
+            part = part.encode('utf-8')
+        fingerprint.update(part)
+        fingerprint.update('\0')
+    return fingerprint.hexdigest()
+
+
+def _validate_combined_dsl_schema(parsed_dsl, combined_parsed_dsl,
+                                  imports_schema_valid):
+    """
+    Validate a combined blueprint. When all of its imports are valid on
+    their own, only the blueprint's own document and the top level of the
+    combined blueprint are validated. Otherwise, or when they turn out to
+    be invalid, the combined blueprint is validated in full, so errors are
+    reported just as they were before documents were validated separately.
+    """
+    if imports_schema_valid and \
+            _schema_valid('DOCUMENT_SCHEMA', parsed_dsl) and \
+            _schema_valid('COMBINED_SECTIONS_SCHEMA', combined_parsed_dsl):
+        return
+    _validate_dsl_schema(combined_parsed_dsl)
+
+
+def _imports_schema_valid(imports_graph):
+    if imports_graph is None:
         return False
+    # every import is validated, as its result is memoized for later parses
+    return all([_import_schema_valid(import_url,
+                                     imports_graph.content_hash(import_url),
+                                     imports_graph.document(import_url))
+                for import_url in imports_graph.ordered_imports])
 
 
-def _build_ordered_imports_list(parsed_dsl, ordered_imports_list,
-                                current_import,
-                                resources_base_url):
-    def _build_ordered_imports_list_recursive(_parsed_dsl, _current_import):
-        if _current_import is not None:
-            ordered_imports_list.append(_current_import)
+def _import_schema_valid(import_url, content_hash, document):
+    """
+    Whether an import document is valid on its own, memoized by content
+    hash so a shared types library is only validated once.
+    """
+    key = (import_url, content_hash)
+    if _schema_valid_imports.get(key):
+        return True
+    if not _schema_valid('DOCUMENT_SCHEMA', document):
+        return False
+    _schema_valid_imports.put(key, True, 1)
+    return True
 
-        if IMPORTS not in _parsed_dsl:
-            return
 
-        for another_import in _parsed_dsl[IMPORTS]:
-            import_url = _get_resource_location(another_import,
-                                                resources_base_url,
-                                                _current_import)
-            if import_url is None:
-                ex = DSLParsingLogicException(
-                    13, 'Failed on import - no suitable location found for '
-                        'import {0}'.format(another_import))
-                ex.failed_import = another_import
-                raise ex
-            if import_url not in ordered_imports_list:
-                try:
-                    with contextlib.closing(urlopen(import_url)) as f:
-                        imported_dsl = _load_yaml(
-                            f, 'Failed to parse import {0} (via {1})'
-                               .format(another_import, import_url))
-                    _build_ordered_imports_list_recursive(imported_dsl,
-                                                          import_url)
-                except URLError, ex:
-                    ex = DSLParsingLogicException(
-                        13, 'Failed on import - Unable to open import url '
-                            '{0}; {1}'.format(import_url, ex.message))
-                    ex.failed_import = import_url
-                    raise ex
-
-    _build_ordered_imports_list_recursive(parsed_dsl, current_import)
+def _schema_valid(schema_name, instance):
+    try:
+        return _schema_validators.get(schema_name).is_valid(instance)
+    except TypeError:
+        # e.g. non string keys, which are left for the full validation to
+        # report
+        return False
 
 
 def _validate_dsl_schema(parsed_dsl):
+    _validate_schema('DSL_SCHEMA', parsed_dsl)
+
+
+def _validate_schema(schema_name, instance, path=()):
+    """
+    :param path: the path of instance in the blueprint, which error paths
+                 are relative to.
+    """
     try:
-        validate(parsed_dsl, schemas.DSL_SCHEMA)
+        _schema_validators.get(schema_name).validate(instance)
     except ValidationError, ex:
         raise DSLParsingFormatException(
             1, '{0}; Path to error: {1}'
-               .format(ex.message, '.'.join((str(x) for x in ex.path))))
+               .format(ex.message,
+                       '.'.join((str(x) for x in list(path) + list(ex.path)))))
+
+
+def _validated_node_templates(streamed_nodes, trusted):
+    """
+    The (name, template) pairs of streamed node templates, each validated
+    against the schema as it is loaded, as the rest of the blueprint was
+    validated without them.
+    """
+    for node_name, node in streamed_nodes:
+        if not trusted:
+            _validate_schema('NODE_TEMPLATE_SCHEMA', node,
+                             [NODE_TEMPLATES, node_name])
+        yield node_name, node
 
 
 def _validate_imports_section(imports_section, dsl_location):
@@ -1521,7 +2241,7 @@ def _validate_imports_section(imports_section, dsl_location):
     # while the standard validation runs only after combining all imports
     # together
     try:
-        validate(imports_section, schemas.IMPORTS_SCHEMA)
+        _schema_validators.get('IMPORTS_SCHEMA').validate(imports_section)
     except ValidationError, ex:
         raise DSLParsingFormatException(
             2, 'Improper "imports" section in yaml {0}; {1}; Path to error: '
@@ -1563,7 +2283,7 @@ def _get_plugins_from_operations(operations, processed_plugins):
         if not plugin_name:
             # no-op
             continue
-        plugin = copy.deepcopy(processed_plugins[plugin_name])
+        plugin = dict(processed_plugins[plugin_name])
         plugin['executor'] = real_executor
         plugins.append(plugin)
     return plugins
@@ -0,0 +1,87 @@
+########
+# Copyright (c) 2015 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+import os
+from multiprocessing.pool import ThreadPool
+
+from dsl_parser.loader import ResourceTimeout
+
+DEFAULT_MAX_WORKERS = 8
+
+
+class ResourceIndex(object):
+    """
+    Answers resource existence checks during a single parse.
+
+    Local resources (as reported by the loader's local_path) are looked up
+    in a listing of their directory, which is read once per directory.
+    Other resources are checked with the loader, and every answer is
+    memoized. Checks of several remote resources can be batched with
+    prefetch, which runs them concurrently. A check which timed out during
+    prefetch raises its ResourceTimeout when the resource is looked up.
+    """
+
+    def __init__(self, resource_loader, max_workers=DEFAULT_MAX_WORKERS):
+        self._loader = resource_loader
+        self._max_workers = max_workers
+        self._exists = {}
+        self._listings = {}
+
+    def exists(self, url):
+        exists = self._exists.get(url)
+        if isinstance(exists, ResourceTimeout):
+            raise exists
+        if exists is None:
+            exists = self._exists[url] = self._check(url)
+        return exists
+
+    def prefetch(self, urls):
+        """Check the existence of all (remote) urls concurrently."""
+        urls = [url for url in set(urls)
+                if url not in self._exists and self._loader.is_remote(url)]
+        if len(urls) < 2:
+            return
+        pool = ThreadPool(min(self._max_workers, len(urls)))
+        try:
+            results = pool.map(self._check_remote, urls)
+        finally:
+            pool.close()
+            pool.join()
+        self._exists.update(zip(urls, results))
+
+    def _check_remote(self, url):
+        try:
+            return self._loader.exists(url)
+        except ResourceTimeout, ex:
+            return ex
+
+    def _check(self, url):
+        path = self._loader.local_path(url)
+        if path is None:
+            return self._loader.exists(url)
+        directory, name = os.path.split(os.path.normpath(path))
+        return name in self._list_files(directory)
+
+    def _list_files(self, directory):
+        files = self._listings.get(directory)
+        if files is None:
+            try:
+                names = os.listdir(directory)
+            except OSError:
+                names = []
+            files = self._listings[directory] = set(
+                name for name in names
+                if os.path.isfile(os.path.join(directory, name)))
+        return files
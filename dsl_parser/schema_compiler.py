@@ -0,0 +1,295 @@
+########
+# Copyright (c) 2015 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+import re
+
+from jsonschema import _utils
+from jsonschema import Draft4Validator, ValidationError
+
+
+def compile_schema(schema, validator_class=Draft4Validator):
+    """
+    Compile a schema into a validator made of python functions specialized
+    for it, which validates much faster than a generic jsonschema validator.
+
+    The compiled validator reports the same first error (message and path)
+    a validator_class validator would. Keywords which are not specialized
+    are validated by a validator_class validator, and schemas of drafts
+    other than draft 4 are not compiled at all.
+    """
+    if validator_class is not Draft4Validator:
+        return validator_class(schema)
+    return CompiledValidator(schema, validator_class)
+
+
+class CompiledValidator(object):
+
+    def __init__(self, schema, validator_class=Draft4Validator):
+        self.schema = schema
+        self._generic = validator_class(schema)
+        self._compiled = {}
+        self._check = self._compile(schema)
+
+    def validate(self, instance):
+        """
+        :raises ValidationError: the first error in instance.
+        """
+        error = self._check(instance)
+        if error is not None:
+            raise error
+
+    def is_valid(self, instance):
+        return self._check(instance) is None
+
+    def _compile(self, schema):
+        # shared sub schemas are compiled once
+        compiled = self._compiled.get(id(schema))
+        if compiled is not None:
+            return compiled[1]
+        if '$ref' in schema or 'id' in schema:
+            check = self._generic_node(schema)
+        else:
+            checks = []
+            for keyword, value in schema.iteritems():
+                compile_keyword = self._KEYWORDS.get(keyword)
+                if compile_keyword is not None:
+                    check = compile_keyword(self, value, schema)
+                elif keyword in self._generic.VALIDATORS:
+                    check = self._generic_keyword(keyword, value, schema)
+                else:
+                    continue
+                if check is not None:
+                    checks.append(check)
+            check = _all_of(checks)
+        # the schema is kept so its id is not reused
+        self._compiled[id(schema)] = (schema, check)
+        return check
+
+    def _generic_node(self, schema):
+        generic = self._generic
+
+        def check(instance):
+            for error in generic.iter_errors(instance, schema):
+                return error
+        return check
+
+    def _generic_keyword(self, keyword, value, schema):
+        generic = self._generic
+        validate_keyword = generic.VALIDATORS[keyword]
+
+        def check(instance):
+            for error in validate_keyword(generic, value, instance,
+                                          schema) or ():
+                return error
+        return check
+
+    def _compile_type(self, types, schema):
+        types = _utils.ensure_list(types)
+        python_types = []
+        for type_name in types:
+            if not isinstance(type_name, basestring) or \
+                    type_name not in self._generic.DEFAULT_TYPES:
+                return self._generic_keyword('type', types, schema)
+            python_types.extend(
+                _utils.flatten(self._generic.DEFAULT_TYPES[type_name]))
+        python_types = tuple(python_types)
+        # bool is an int, but is only of the boolean type
+        bool_allowed = 'boolean' in types
+
+        def check(instance):
+            if isinstance(instance, bool):
+                if bool_allowed:
+                    return None
+            elif isinstance(instance, python_types):
+                return None
+            return ValidationError(_utils.types_msg(instance, types))
+        return check
+
+    def _compile_properties(self, properties, schema):
+        compiled = [(name, self._compile(subschema))
+                    for name, subschema in properties.iteritems()]
+
+        def check(instance):
+            if not isinstance(instance, dict):
+                return None
+            for name, check_property in compiled:
+                if name in instance:
+                    error = check_property(instance[name])
+                    if error is not None:
+                        error.path.appendleft(name)
+                        return error
+        return check
+
+    def _compile_pattern_properties(self, pattern_properties, schema):
+        compiled = [(re.compile(pattern).search, self._compile(subschema))
+                    for pattern, subschema in pattern_properties.iteritems()]
+
+        def check(instance):
+            if not isinstance(instance, dict):
+                return None
+            for search, check_property in compiled:
+                for key, value in instance.iteritems():
+                    if search(key):
+                        error = check_property(value)
+                        if error is not None:
+                            error.path.appendleft(key)
+                            return error
+        return check
+
+    def _compile_additional_properties(self, additional_properties, schema):
+        properties = schema.get('properties', {})
+        patterns = '|'.join(schema.get('patternProperties', {}))
+        search = re.compile(patterns).search if patterns else None
+
+        def extras_of(instance):
+            return set(key for key in instance
+                       if key not in properties and
+                       not (search and search(key)))
+
+        if isinstance(additional_properties, dict):
+            check_extra = self._compile(additional_properties)
+
+            def check(instance):
+                if not isinstance(instance, dict):
+                    return None
+                for extra in extras_of(instance):
+                    error = check_extra(instance[extra])
+                    if error is not None:
+                        error.path.appendleft(extra)
+                        return error
+            return check
+
+        if additional_properties:
+            return None
+
+        def check(instance):
+            if not isinstance(instance, dict):
+                return None
+            extras = extras_of(instance)
+            if extras:
+                return ValidationError(
+                    'Additional properties are not allowed (%s %s '
+                    'unexpected)' % _utils.extras_msg(extras))
+        return check
+
+    def _compile_required(self, required, schema):
+        def check(instance):
+            if not isinstance(instance, dict):
+                return None
+            for name in required:
+                if name not in instance:
+                    return ValidationError('%r is a required property' % name)
+        return check
+
+    def _compile_min_properties(self, min_properties, schema):
+        def check(instance):
+            if isinstance(instance, dict) and len(instance) < min_properties:
+                return ValidationError(
+                    '%r does not have enough properties' % (instance,))
+        return check
+
+    def _compile_items(self, items, schema):
+        if not isinstance(items, dict):
+            return self._generic_keyword('items', items, schema)
+        check_item = self._compile(items)
+
+        def check(instance):
+            if not isinstance(instance, list):
+                return None
+            for index, item in enumerate(instance):
+                error = check_item(item)
+                if error is not None:
+                    error.path.appendleft(index)
+                    return error
+        return check
+
+    def _compile_unique_items(self, unique_items, schema):
+        if not unique_items:
+            return None
+
+        def check(instance):
+            if isinstance(instance, list) and not _utils.uniq(instance):
+                return ValidationError(
+                    '%r has non-unique elements' % instance)
+        return check
+
+    def _compile_enum(self, enum, schema):
+        def check(instance):
+            if instance not in enum:
+                return ValidationError(
+                    '%r is not one of %r' % (instance, enum))
+        return check
+
+    def _compile_any_of(self, any_of, schema):
+        compiled = [self._compile(subschema) for subschema in any_of]
+
+        def check(instance):
+            for check_subschema in compiled:
+                if check_subschema(instance) is None:
+                    return None
+            return ValidationError(
+                '%r is not valid under any of the given schemas' %
+                (instance,))
+        return check
+
+    def _compile_one_of(self, one_of, schema):
+        compiled = [(subschema, self._compile(subschema))
+                    for subschema in one_of]
+
+        def check(instance):
+            for index, (subschema, check_subschema) in enumerate(compiled):
+                if check_subschema(instance) is None:
+                    first_valid = subschema
+                    break
+            else:
+                return ValidationError(
+                    '%r is not valid under any of the given schemas' %
+                    (instance,))
+            more_valid = [s for s, check_subschema in compiled[index + 1:]
+                          if check_subschema(instance) is None]
+            if more_valid:
+                more_valid.append(first_valid)
+                reprs = ', '.join(repr(s) for s in more_valid)
+                return ValidationError(
+                    '%r is valid under each of %s' % (instance, reprs))
+        return check
+
+    _KEYWORDS = {
+        'type': _compile_type,
+        'properties': _compile_properties,
+        'patternProperties': _compile_pattern_properties,
+        'additionalProperties': _compile_additional_properties,
+        'required': _compile_required,
+        'minProperties': _compile_min_properties,
+        'items': _compile_items,
+        'uniqueItems': _compile_unique_items,
+        'enum': _compile_enum,
+        'anyOf': _compile_any_of,
+        'oneOf': _compile_one_of
+    }
+
+
+def _all_of(checks):
+    if not checks:
+        return lambda instance: None
+    if len(checks) == 1:
+        return checks[0]
+
+    def check(instance):
+        for check_keyword in checks:
+            error = check_keyword(instance)
+            if error is not None:
+                return error
+    return check
@@ -522,4 +522,37 @@ DSL_SCHEMA = {
     },
     'required': ['tosca_definitions_version', 'node_templates'],
     'additionalProperties': False
-}
\ No newline at end of file
+}
+
+
+def _sections_schema(dsl_schema):
+    """
+    The schema of a combined blueprint's top level, given that every
+    document it was combined from is valid against DOCUMENT_SCHEMA.
+
+    Combining imports only adds whole items to sections, so sections which
+    are validated item by item are valid when all their documents are.
+    Other sections are validated in full.
+    """
+    def by_item(section_schema):
+        return section_schema.get('type') == 'object' and \
+            section_schema.get('patternProperties', {}).keys() == ['^'] and \
+            set(section_schema.keys()) <= set(['type', 'patternProperties',
+                                               'additionalProperties'])
+    sections_schema = dict(dsl_schema)
+    sections_schema['properties'] = dict(
+        (section, {} if by_item(section_schema) else section_schema)
+        for section, section_schema in dsl_schema['properties'].iteritems())
+    return sections_schema
+
+
+# A single node template, for node templates which are validated one at a time
+NODE_TEMPLATE_SCHEMA = \
+    DSL_SCHEMA['properties']['node_templates']['patternProperties']['^']
+
+# A single blueprint or import document, before imports are combined
+DOCUMENT_SCHEMA = dict(DSL_SCHEMA)
+del DOCUMENT_SCHEMA['required']
+DOCUMENT_SCHEMA['properties'] = dict(DSL_SCHEMA['properties'], imports={})
+
+COMBINED_SECTIONS_SCHEMA = _sections_schema(DSL_SCHEMA)
@@ -0,0 +1,222 @@
+########
+# Copyright (c) 2015 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+import os
+import json
+import base64
+import hashlib
+import datetime
+import tempfile
+
+from dsl_parser.exceptions import DSLParsingFormatException
+
+FORMAT_VERSION = 3
+_MAGIC = 'cloudify-dsl-parser-snapshot'
+# key of the type tag of encoded values JSON has no type for
+_TAG = '!'
+_DATETIME_FORMAT = '%Y-%m-%dT%H:%M:%S'
+_DATE_FORMAT = '%Y-%m-%d'
+
+
+class Snapshot(object):
+    """
+    Already loaded import documents, which parse calls use instead of
+    loading the imports again.
+
+    Every document is stored along with a hash of the content it was loaded
+    from, and is only used for an import whose content has the same hash.
+    Snapshots are saved as versioned JSON, which loads the same on any
+    interpreter and never runs code. Values JSON has no type for (unicode
+    strings, non string keys, dates, sets and binary strings) are stored
+    tagged with their type, so documents are loaded without loss. Documents
+    holding other values are left out, and loaded as usual by parse calls.
+
+    A snapshot's documents stand in for the imports they were loaded from,
+    so snapshots should only be loaded from sources as trusted as the
+    imports themselves.
+
+    Snapshots are created by parser.compile_snapshot.
+    """
+
+    def __init__(self):
+        # url -> (content hash, encoded document)
+        self._entries = {}
+
+    @property
+    def urls(self):
+        return sorted(self._entries.keys())
+
+    def add(self, url, content, document):
+        try:
+            encoded = _encode(document)
+        except ValueError:
+            return
+        self._entries[url] = (_content_hash(content), encoded)
+
+    def document(self, url, content):
+        """
+        A copy of the document of url, or None if it is not in the snapshot
+        or content has changed since the snapshot was compiled.
+        """
+        entry = self._entries.get(url)
+        if entry is None or entry[0] != _content_hash(content):
+            return None
+        return _decode(entry[1])
+
+    def save(self, path):
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write('{0} {1}\n'.format(_MAGIC, FORMAT_VERSION))
+                json.dump(self._entries, f, separators=(',', ':'))
+            os.rename(temp_path, path)
+        except Exception:
+            os.remove(temp_path)
+            raise
+
+    @classmethod
+    def load(cls, path):
+        """
+        :raises DSLParsingFormatException: if path is not a snapshot, or was
+                                           saved in another format version.
+        """
+        with open(path, 'rb') as f:
+            header = f.readline().split()
+            if len(header) != 2 or header[0] != _MAGIC:
+                raise _invalid_snapshot(path, 'not a snapshot')
+            if header[1] != str(FORMAT_VERSION):
+                raise _invalid_snapshot(
+                    path, 'format version {0} is not supported (expected '
+                          '{1}), the snapshot should be compiled again'
+                          .format(header[1], FORMAT_VERSION))
+            try:
+                entries = json.load(f)
+            except ValueError, ex:
+                raise _invalid_snapshot(path, ex)
+        if not _valid_entries(entries):
+            raise _invalid_snapshot(path, 'unexpected content')
+        snapshot = cls()
+        snapshot._entries = dict((url, tuple(entry))
+                                 for url, entry in entries.iteritems())
+        return snapshot
+
+    def __contains__(self, url):
+        return url in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def _content_hash(content):
+    return hashlib.sha256(content).hexdigest()
+
+
+def _is_ascii(value):
+    try:
+        value.decode('ascii')
+    except UnicodeDecodeError:
+        return False
+    return True
+
+
+def _encode(value):
+    """value as JSON data, tagging values JSON has no type for.
+
+    :raises ValueError: if value holds values that cannot be encoded.
+    """
+    if isinstance(value, dict):
+        if _TAG not in value and all(isinstance(key, str) and _is_ascii(key)
+                                     for key in value):
+            return dict((key, _encode(item))
+                        for key, item in value.iteritems())
+        return {_TAG: 'dict', 'items': [[_encode(key), _encode(item)]
+                                        for key, item in value.iteritems()]}
+    if isinstance(value, list):
+        return [_encode(item) for item in value]
+    if isinstance(value, str):
+        if _is_ascii(value):
+            return value
+        return {_TAG: 'bytes', 'value': base64.b64encode(value)}
+    if isinstance(value, unicode):
+        return {_TAG: 'unicode', 'value': value}
+    if value is None or isinstance(value, (bool, int, long, float)):
+        return value
+    if isinstance(value, datetime.datetime):
+        if value.tzinfo is not None:
+            raise ValueError('aware datetimes are not supported')
+        return {_TAG: 'datetime', 'value': value.isoformat()}
+    if isinstance(value, datetime.date):
+        return {_TAG: 'date', 'value': value.isoformat()}
+    if isinstance(value, (set, frozenset)):
+        return {_TAG: 'set', 'items': [_encode(item) for item in value]}
+    raise ValueError('{0} values are not supported'
+                     .format(type(value).__name__))
+
+
+def _decode(value):
+    """A new copy of the value encoded by _encode.
+
+    :raises ValueError, KeyError, TypeError: if value is malformed.
+    """
+    if isinstance(value, dict):
+        if _TAG not in value:
+            return dict((str(key), _decode(item))
+                        for key, item in value.iteritems())
+        return _DECODERS[value[_TAG]](value)
+    if isinstance(value, list):
+        return [_decode(item) for item in value]
+    if isinstance(value, unicode):
+        # untagged strings were str
+        return str(value)
+    return value
+
+
+def _decode_datetime(value):
+    date_format = _DATETIME_FORMAT
+    if '.' in value['value']:
+        date_format += '.%f'
+    return datetime.datetime.strptime(value['value'], date_format)
+
+
+_DECODERS = {
+    'dict': lambda value: dict((_decode(key), _decode(item))
+                               for key, item in value['items']),
+    'set': lambda value: set(_decode(item) for item in value['items']),
+    'unicode': lambda value: unicode(value['value']),
+    'bytes': lambda value: base64.b64decode(str(value['value'])),
+    'date': lambda value: datetime.datetime.strptime(
+        value['value'], _DATE_FORMAT).date(),
+    'datetime': _decode_datetime
+}
+
+
+def _valid_entries(entries):
+    if not isinstance(entries, dict):
+        return False
+    for url, entry in entries.iteritems():
+        if not isinstance(entry, list) or len(entry) != 2 or \
+                not isinstance(entry[0], basestring):
+            return False
+        try:
+            _decode(entry[1])
+        except (ValueError, KeyError, TypeError):
+            return False
+    return True
+
+
+def _invalid_snapshot(path, reason):
+    return DSLParsingFormatException(
+        34, 'Invalid snapshot {0}; {1}'.format(path, reason))
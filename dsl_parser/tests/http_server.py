@@ -0,0 +1,175 @@
+########
+# Copyright (c) 2015 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+import socket
+import hashlib
+import threading
+import time
+from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+from SocketServer import ThreadingMixIn
+from urlparse import urlsplit
+
+LAST_MODIFIED = 'Thu, 01 Jan 2015 00:00:00 GMT'
+HOLD_TIMEOUT = 10
+
+
+class ResourcesHTTPServer(ThreadingMixIn, HTTPServer):
+    """
+    A local stand-in for a blueprints resources server, used by tests.
+
+    Serves the contents of the `resources` dict (path -> content), with an
+    optional injected latency per request, which may be overridden per path
+    in the `latencies` dict. Paths in the `drips` dict have their content
+    sent one byte at a time, every `drips[path]` seconds. Requests are held
+    (for up to HOLD_TIMEOUT seconds) while the `released` event is cleared.
+    Keeps count of requests, connections and the maximal number of requests
+    served concurrently.
+    """
+
+    daemon_threads = True
+    request_queue_size = 64
+
+    def __init__(self, resources=None, latency=0):
+        HTTPServer.__init__(self, ('127.0.0.1', 0), _ResourcesRequestHandler)
+        self.resources = resources or {}
+        self.latency = latency
+        self.latencies = {}
+        self.drips = {}
+        self.released = threading.Event()
+        self.released.set()
+        self.requests = []
+        self.connections = 0
+        self.max_concurrent_requests = 0
+        self._concurrent_requests = 0
+        self._lock = threading.Lock()
+        self._thread = None
+        self._open_connections = set()
+
+    @property
+    def base_url(self):
+        return 'http://127.0.0.1:{0}/'.format(self.server_port)
+
+    def url(self, path):
+        return self.base_url + path
+
+    def requests_for(self, path, method=None):
+        return [r for r in self.requests
+                if r[1] == path and (method is None or r[0] == method)]
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever)
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+        self._thread.join()
+        # end kept alive connections
+        with self._lock:
+            connections = list(self._open_connections)
+        for connection in connections:
+            try:
+                connection.shutdown(socket.SHUT_RDWR)
+            except socket.error:
+                pass
+
+    def handle_error(self, request, client_address):
+        # clients going away (e.g. after timing out) are expected
+        pass
+
+    def _request_started(self, method, path, headers):
+        with self._lock:
+            self.requests.append((method, path, headers))
+            self._concurrent_requests += 1
+            self.max_concurrent_requests = max(self.max_concurrent_requests,
+                                               self._concurrent_requests)
+
+    def _request_ended(self):
+        with self._lock:
+            self._concurrent_requests -= 1
+
+    def _connection_opened(self, connection):
+        with self._lock:
+            self.connections += 1
+            self._open_connections.add(connection)
+
+    def _connection_closed(self, connection):
+        with self._lock:
+            self._open_connections.discard(connection)
+
+
+class _ResourcesRequestHandler(BaseHTTPRequestHandler):
+
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        BaseHTTPRequestHandler.setup(self)
+        self.server._connection_opened(self.connection)
+
+    def finish(self):
+        self.server._connection_closed(self.connection)
+        BaseHTTPRequestHandler.finish(self)
+
+    def do_GET(self):
+        self._serve(send_body=True)
+
+    def do_HEAD(self):
+        self._serve(send_body=False)
+
+    def _serve(self, send_body):
+        # proxied requests name the absolute url
+        path = urlsplit(self.path).path.lstrip('/')
+        self.server._request_started(self.command, path, dict(self.headers))
+        try:
+            self.server.released.wait(HOLD_TIMEOUT)
+            latency = self.server.latencies.get(path, self.server.latency)
+            if latency:
+                time.sleep(latency)
+            content = self.server.resources.get(path)
+            if content is None:
+                self._respond(404, 'Not Found', send_body=send_body)
+                return
+            etag = '"{0}"'.format(hashlib.md5(content).hexdigest())
+            headers = {'ETag': etag, 'Last-Modified': LAST_MODIFIED}
+            if self.headers.get('If-None-Match') == etag:
+                self._respond(304, '', headers, send_body=False)
+                return
+            self._respond(200, content, headers, send_body=send_body,
+                          drip=self.server.drips.get(path))
+        finally:
+            self.server._request_ended()
+
+    def _respond(self, code, content, headers=None, send_body=True,
+                 drip=None):
+        self.send_response(code)
+        for name, value in (headers or {}).iteritems():
+            self.send_header(name, value)
+        if code != 304:
+            self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        if not send_body:
+            return
+        if not drip:
+            self.wfile.write(content)
+            return
+        for byte in content:
+            self.wfile.write(byte)
+            self.wfile.flush()
+            time.sleep(drip)
+
+    def log_message(self, format, *args):
+        pass
@@ -0,0 +1,174 @@
+########
+# Copyright (c) 2015 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+import os
+import zipfile
+
+from dsl_parser import constants
+from dsl_parser import parser
+from dsl_parser.archive import ArchiveResourceLoader, BlueprintArchive
+from dsl_parser.exceptions import (DSLParsingFormatException,
+                                   DSLParsingLogicException)
+from dsl_parser.loader import DeadlineResourceLoader
+from dsl_parser.parser import parse_from_archive
+from dsl_parser.tests.abstract_test_parser import AbstractTestParser
+
+
+class TestArchive(AbstractTestParser):
+
+    def _blueprint(self):
+        return self.BASIC_VERSION_SECTION_DSL_1_0 + """
+imports:
+    -   types/types.yaml
+plugins:
+    script:
+        executor: central_deployment_agent
+        install: false
+node_templates:
+    test_node:
+        type: test_type
+        interfaces:
+            test:
+                op: scripts/install.sh
+"""
+
+    def _types(self):
+        return """
+imports:
+    -   plugin.yaml
+node_types:
+    test_type: {}
+"""
+
+    def _make_archive(self, members, name='blueprint.zip'):
+        archive_path = os.path.join(self._temp_dir, name)
+        with zipfile.ZipFile(archive_path, 'w',
+                             zipfile.ZIP_DEFLATED) as archive:
+            for member_name, content in members.iteritems():
+                archive.writestr(member_name, content)
+        return archive_path
+
+    def _members(self, root=''):
+        return dict((root + name, content) for name, content in {
+            'blueprint.yaml': self._blueprint(),
+            'types/types.yaml': self._types(),
+            'types/plugin.yaml': self.BASIC_PLUGIN,
+            'scripts/install.sh': 'echo installing'
+        }.iteritems())
+
+    def _assert_plan(self, plan):
+        node = plan['nodes'][0]
+        self.assertEquals('test_type', node['type'])
+        self.assertEquals(
+            'scripts/install.sh',
+            node['operations']['test.op']['inputs'][
+                constants.SCRIPT_PATH_PROPERTY])
+
+    def test_parse_from_archive(self):
+        archive_path = self._make_archive(self._members())
+        temp_dir_contents = os.listdir(self._temp_dir)
+        self._assert_plan(parse_from_archive(archive_path))
+        # nothing was extracted
+        self.assertEquals(temp_dir_contents, os.listdir(self._temp_dir))
+
+    def test_single_top_level_directory(self):
+        archive_path = self._make_archive(self._members('blueprint/'))
+        self._assert_plan(parse_from_archive(archive_path))
+
+    def test_manifest(self):
+        members = self._members()
+        members['main.yaml'] = members.pop('blueprint.yaml')
+        members['manifest.yaml'] = 'main_blueprint: main.yaml'
+        archive_path = self._make_archive(members)
+        self._assert_plan(parse_from_archive(archive_path))
+
+    def test_blueprint_filename(self):
+        members = self._members()
+        members['other/blueprint.yaml'] = self.BASIC_VERSION_SECTION_DSL_1_0 +\
+            self.MINIMAL_BLUEPRINT
+        archive_path = self._make_archive(members)
+        plan = parse_from_archive(archive_path,
+                                  blueprint_filename='other/blueprint.yaml')
+        self.assertEquals('test_node', plan['nodes'][0]['id'])
+
+    def test_imports_not_resolved_from_working_directory(self):
+        members = self._members()
+        members['blueprint.yaml'] = members['blueprint.yaml'].replace(
+            'types/types.yaml', 'types.yaml')
+        members['types.yaml'] = self._types().replace(
+            'plugin.yaml', 'types/plugin.yaml')
+        archive_path = self._make_archive(members)
+        working_directory = os.path.join(self._temp_dir, 'working')
+        os.mkdir(working_directory)
+        with open(os.path.join(working_directory, 'types.yaml'), 'w') as f:
+            f.write('node_types: {other_type: {}}')
+        cwd = os.getcwd()
+        os.chdir(working_directory)
+        self.addCleanup(os.chdir, cwd)
+        self._assert_plan(parse_from_archive(archive_path))
+        # also when the archive loader is wrapped to enforce a timeout
+        blueprint_archive = BlueprintArchive(archive_path)
+        self.addCleanup(blueprint_archive.close)
+        archive_loader = ArchiveResourceLoader(blueprint_archive)
+        self.assertEquals(
+            blueprint_archive.url('types.yaml'),
+            parser._get_resource_location(
+                'types.yaml', None, blueprint_archive.url('blueprint.yaml'),
+                resource_loader=DeadlineResourceLoader(archive_loader, 60)))
+
+    def test_missing_blueprint(self):
+        archive_path = self._make_archive({'other.yaml': ''})
+        ex = self.assertRaises(DSLParsingLogicException,
+                               parse_from_archive, archive_path)
+        self.assertEquals(32, ex.err_code)
+
+    def test_missing_import(self):
+        members = self._members()
+        del members['types/plugin.yaml']
+        ex = self.assertRaises(DSLParsingLogicException, parse_from_archive,
+                               self._make_archive(members))
+        self.assertEquals(13, ex.err_code)
+
+    def test_missing_script(self):
+        members = self._members()
+        del members['scripts/install.sh']
+        ex = self.assertRaises(DSLParsingLogicException, parse_from_archive,
+                               self._make_archive(members))
+        self.assertEquals(10, ex.err_code)
+
+    def test_invalid_archive(self):
+        for content in ['', 'not a zip']:
+            archive_path = self.make_file_with_name(content, 'invalid.zip')
+            ex = self.assertRaises(DSLParsingFormatException,
+                                   parse_from_archive, archive_path)
+            self.assertEquals(31, ex.err_code)
+
+    def test_invalid_manifest(self):
+        members = self._members()
+        members['manifest.yaml'] = '- main.yaml'
+        ex = self.assertRaises(DSLParsingFormatException, parse_from_archive,
+                               self._make_archive(members))
+        self.assertEquals(31, ex.err_code)
+
+    def test_archive_index(self):
+        archive = BlueprintArchive(self._make_archive(self._members('bp/')))
+        self.addCleanup(archive.close)
+        self.assertEquals(['blueprint.yaml', 'scripts/install.sh',
+                           'types/plugin.yaml', 'types/types.yaml'],
+                          archive.names)
+        self.assertTrue(archive.exists('scripts/install.sh'))
+        self.assertFalse(archive.exists('scripts'))
+        self.assertEquals('echo installing',
+                          archive.read('scripts/install.sh'))
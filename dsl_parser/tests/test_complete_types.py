@@ -0,0 +1,395 @@
+########
+# Copyright (c) 2015 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+import copy
+
+from dsl_parser import parser
+from dsl_parser import utils
+from dsl_parser.exceptions import DSLParsingLogicException
+from dsl_parser.tests.abstract_test_parser import AbstractTestParser
+
+NODE_TYPES = {
+    'root': {
+        'properties': {'a': {'default': [1]}},
+        'interfaces': {'lifecycle': {'create': 'plugin.create'}}
+    },
+    'middle': {
+        'derived_from': 'root',
+        'properties': {'b': {'default': {'key': 'value'}}},
+        'interfaces': {'lifecycle': {'start': 'plugin.start'}}
+    },
+    'leaf': {
+        'derived_from': 'middle',
+        'properties': {'a': {'default': [2]}}
+    },
+    'other_leaf': {
+        'derived_from': 'middle'
+    }
+}
+
+BLUEPRINT = """
+tosca_definitions_version: cloudify_dsl_1_0
+plugins:
+    plugin:
+        executor: central_deployment_agent
+        source: dummy
+node_types:
+    root:
+        properties:
+            list:
+                default: [1, 2]
+        interfaces:
+            lifecycle:
+                create:
+                    implementation: plugin.create
+                    inputs:
+                        dict:
+                            default: {key: value}
+    leaf:
+        derived_from: root
+node_templates:
+"""
+
+
+class TestCompleteTypes(AbstractTestParser):
+
+    def setUp(self):
+        super(TestCompleteTypes, self).setUp()
+        self.merged = []
+
+    def _merge(self, overridden_type, overriding_type):
+        self.merged.append((overridden_type, overriding_type))
+        return parser.node_type_interfaces_merging_function(
+            overridden_type, overriding_type)
+
+    def _complete_types(self, node_types):
+        return utils.CompleteTypes(node_types, self._merge,
+                                   is_relationships=False)
+
+    def test_same_as_recursive_extraction(self):
+        complete_types = self._complete_types(copy.deepcopy(NODE_TYPES))
+        for type_name, node_type in NODE_TYPES.iteritems():
+            expected = utils.extract_complete_type_recursive(
+                dsl_type=node_type,
+                dsl_type_name=type_name,
+                dsl_container=NODE_TYPES,
+                merging_func=parser.node_type_interfaces_merging_function,
+                is_relationships=False)
+            self.assertEquals(expected, complete_types.get(type_name))
+
+    def test_every_type_completed_once(self):
+        complete_types = self._complete_types(NODE_TYPES)
+        leaf = complete_types.get('leaf')
+        self.assertIs(leaf, complete_types.get('leaf'))
+        complete_types.get('other_leaf')
+        complete_types.get('middle')
+        complete_types.get('root')
+        # middle on top of root, and both leaves on top of middle
+        self.assertEquals(3, len(self.merged))
+        self.assertIs(complete_types.get('middle'), self.merged[1][0])
+        self.assertIs(complete_types.get('middle'), self.merged[2][0])
+
+    def test_raw_types_not_modified(self):
+        node_types = copy.deepcopy(NODE_TYPES)
+        complete_types = self._complete_types(node_types)
+        for type_name in node_types:
+            complete_types.get(type_name)
+        self.assertEquals(NODE_TYPES, node_types)
+
+    def test_circular_dependency(self):
+        node_types = {'a': {'derived_from': 'b'},
+                      'b': {'derived_from': 'c'},
+                      'c': {'derived_from': 'a'}}
+        ex = self.assertRaises(DSLParsingLogicException,
+                               self._complete_types(node_types).get, 'b')
+        self.assertEquals(100, ex.err_code)
+        self.assertEquals(['b', 'c', 'a', 'b'], ex.circular_dependency)
+        self.assertIn('Failed parsing type b, Circular dependency '
+                      'detected: b --> c --> a --> b', str(ex))
+
+    def test_missing_super_type(self):
+        node_types = {'a': {'derived_from': 'b'},
+                      'b': {'derived_from': 'missing'}}
+        ex = self.assertRaises(DSLParsingLogicException,
+                               self._complete_types(node_types).get, 'a')
+        self.assertEquals(14, ex.err_code)
+        self.assertIn('Missing definition for type missing which is '
+                      'declared as derived by type b', str(ex))
+
+    def test_parse_completes_every_type_once(self):
+        merged = []
+        original = parser.node_type_interfaces_merging_function
+
+        def recording_merge(overridden_type, overriding_type):
+            merged.append(overriding_type['derived_from'])
+            return original(overridden_type, overriding_type)
+        parser.node_type_interfaces_merging_function = recording_merge
+        self.addCleanup(setattr, parser,
+                        'node_type_interfaces_merging_function', original)
+        node_templates = ''.join("""
+    node{0}:
+        type: leaf
+""".format(i) for i in range(10))
+        plan = self.parse(BLUEPRINT + node_templates)
+        self.assertEquals(10, len(plan['nodes']))
+        self.assertEquals(['root'], merged)
+
+    def test_nodes_do_not_share_defaults(self):
+        plan = self.parse(BLUEPRINT + """
+    node1:
+        type: leaf
+    node2:
+        type: leaf
+""")
+        node1 = self.get_node_by_name(plan, 'node1')
+        node2 = self.get_node_by_name(plan, 'node2')
+        node1['properties']['list'].append(3)
+        node1['operations']['create']['inputs']['dict']['key'] = 'changed'
+        self.assertEquals([1, 2], node2['properties']['list'])
+        self.assertEquals({'key': 'value'},
+                          node2['operations']['create']['inputs']['dict'])
+
+
+class TestCompleteRelationshipTypes(AbstractTestParser):
+
+    BLUEPRINT = """
+tosca_definitions_version: cloudify_dsl_1_0
+plugins:
+    plugin:
+        executor: central_deployment_agent
+        source: dummy
+relationships:
+    root:
+        properties:
+            list:
+                default: [1, 2]
+        source_interfaces:
+            source:
+                op: plugin.op
+    middle:
+        derived_from: root
+        target_interfaces:
+            target:
+                op:
+                    implementation: plugin.op
+                    inputs:
+                        dict:
+                            default: {key: value}
+    leaf:
+        derived_from: middle
+    other_leaf:
+        derived_from: middle
+node_templates: {}
+"""
+
+    def test_every_type_completed_once(self):
+        merged = []
+        original = parser.relationship_type_merging_function
+
+        def recording_merge(overridden_type, overriding_type):
+            merged.append(overriding_type['derived_from'])
+            return original(overridden_type, overriding_type)
+        parser.relationship_type_merging_function = recording_merge
+        self.addCleanup(setattr, parser,
+                        'relationship_type_merging_function', original)
+        plan = self.parse(self.BLUEPRINT)
+        self.assertEquals(['middle', 'middle', 'root'], sorted(merged))
+        self.assertEquals(4, len(plan['relationships']))
+
+    def test_relationships_do_not_share_parts(self):
+        relationships = self.parse(self.BLUEPRINT)['relationships']
+        leaf = relationships['leaf']
+        self.assertEquals('leaf', leaf['name'])
+        self.assertEquals('middle', relationships['middle']['name'])
+        self.assertEquals(
+            {'implementation': 'plugin.op', 'inputs': {}, 'executor': None,
+             'max_retries': None, 'retry_interval': None},
+            leaf['source_interfaces']['source']['op'])
+        leaf['properties']['list']['default'].append(3)
+        leaf['target_interfaces']['target']['op']['inputs']['dict'][
+            'default']['key'] = 'changed'
+        for name in ['root', 'middle', 'other_leaf']:
+            self.assertEquals([1, 2], relationships[name]['properties'][
+                'list']['default'])
+        for name in ['middle', 'other_leaf']:
+            self.assertEquals({'key': 'value'}, relationships[name][
+                'target_interfaces']['target']['op']['inputs']['dict'][
+                'default'])
+
+
+class TestTypeHierarchies(AbstractTestParser):
+
+    def _type_hierarchies(self, node_types=NODE_TYPES):
+        return utils.TypeHierarchies(node_types, is_relationships=False)
+
+    def test_hierarchy(self):
+        type_hierarchies = self._type_hierarchies()
+        self.assertEquals(['root', 'middle', 'leaf'],
+                          type_hierarchies.hierarchy('leaf'))
+        self.assertEquals(['root'], type_hierarchies.hierarchy('root'))
+        self.assertIs(type_hierarchies.hierarchy('leaf'),
+                      type_hierarchies.hierarchy('leaf'))
+
+    def test_is_derived_from(self):
+        type_hierarchies = self._type_hierarchies()
+        self.assertTrue(type_hierarchies.is_derived_from('leaf', 'root'))
+        self.assertTrue(type_hierarchies.is_derived_from('leaf', 'leaf'))
+        self.assertFalse(type_hierarchies.is_derived_from('root', 'leaf'))
+        self.assertFalse(type_hierarchies.is_derived_from('leaf',
+                                                          'other_leaf'))
+
+    def test_descendants(self):
+        type_hierarchies = self._type_hierarchies()
+        self.assertEquals(set(['middle', 'leaf', 'other_leaf']),
+                          type_hierarchies.descendants('middle'))
+        self.assertEquals(set(), type_hierarchies.descendants('missing'))
+
+    def test_parse_shares_hierarchies(self):
+        plan = self.parse(BLUEPRINT + """
+    node1:
+        type: leaf
+    node2:
+        type: leaf
+        relationships:
+            -   type: cloudify.relationships.depends_on
+                target: node1
+    node3:
+        type: leaf
+        relationships:
+            -   type: cloudify.relationships.depends_on
+                target: node1
+relationships:
+    cloudify.relationships.depends_on: {}
+""")
+        node1, node2, node3 = [self.get_node_by_name(plan, name)
+                               for name in ['node1', 'node2', 'node3']]
+        self.assertEquals(['root', 'leaf'], node1['type_hierarchy'])
+        self.assertIs(node1['type_hierarchy'], node2['type_hierarchy'])
+        self.assertIs(node2['relationships'][0]['type_hierarchy'],
+                      node3['relationships'][0]['type_hierarchy'])
+
+    def test_circular_dependency(self):
+        node_types = {'a': {'derived_from': 'b'},
+                      'b': {'derived_from': 'c'},
+                      'c': {'derived_from': 'b'}}
+        type_hierarchies = self._type_hierarchies(node_types)
+        for func, args in [(type_hierarchies.hierarchy, ['a']),
+                           (type_hierarchies.is_derived_from, ['a', 'x']),
+                           (type_hierarchies.descendants, ['x'])]:
+            ex = self.assertRaises(DSLParsingLogicException, func, *args)
+            self.assertEquals(100, ex.err_code)
+            self.assertEquals(['a', 'b', 'c', 'b'], ex.circular_dependency)
+        # the cycle is never reached
+        self.assertTrue(type_hierarchies.is_derived_from('a', 'b'))
+
+
+class TestDeepHierarchies(AbstractTestParser):
+
+    DEPTH = 5000
+
+    def setUp(self):
+        super(TestDeepHierarchies, self).setUp()
+        self.node_types = {'type0': {'properties': {'prop0': {}}}}
+        for i in range(1, self.DEPTH):
+            self.node_types['type{0}'.format(i)] = {
+                'derived_from': 'type{0}'.format(i - 1)}
+        self.leaf = 'type{0}'.format(self.DEPTH - 1)
+
+    def test_complete_types(self):
+        complete_types = utils.CompleteTypes(
+            self.node_types, parser.node_type_interfaces_merging_function,
+            is_relationships=False)
+        self.assertEquals({'prop0': {}},
+                          complete_types.get(self.leaf)['properties'])
+
+    def test_extract_complete_type_recursive(self):
+        complete_type = utils.extract_complete_type_recursive(
+            dsl_type=self.node_types[self.leaf],
+            dsl_type_name=self.leaf,
+            dsl_container=self.node_types,
+            merging_func=parser.node_type_interfaces_merging_function,
+            is_relationships=False)
+        self.assertEquals({'prop0': {}}, complete_type['properties'])
+
+    def test_type_hierarchies(self):
+        type_hierarchies = utils.TypeHierarchies(self.node_types,
+                                                 is_relationships=False)
+        self.assertEquals(self.DEPTH,
+                          len(type_hierarchies.hierarchy(self.leaf)))
+        self.assertTrue(type_hierarchies.is_derived_from(self.leaf, 'type0'))
+        self.assertEquals(self.DEPTH,
+                          len(type_hierarchies.descendants('type0')))
+
+    def test_circular_dependency(self):
+        self.node_types['type0']['derived_from'] = self.leaf
+        complete_types = utils.CompleteTypes(
+            self.node_types, parser.node_type_interfaces_merging_function,
+            is_relationships=False)
+        ex = self.assertRaises(DSLParsingLogicException,
+                               complete_types.get, self.leaf)
+        self.assertEquals(100, ex.err_code)
+        self.assertEquals(self.DEPTH + 1, len(ex.circular_dependency))
+        self.assertEquals(self.leaf, ex.circular_dependency[0])
+        self.assertEquals(self.leaf, ex.circular_dependency[-1])
+
+    def test_deeply_contained_nodes(self):
+        node_templates = ''.join("""
+    node{0}:
+        type: test_type
+        relationships:
+            -   type: cloudify.relationships.contained_in
+                target: node{1}
+""".format(i, i - 1) for i in range(1, 2000))
+        plan = self.parse(self.BASIC_VERSION_SECTION_DSL_1_0 + """
+node_types:
+    cloudify.nodes.Compute: {}
+    test_type: {}
+relationships:
+    cloudify.relationships.contained_in: {}
+node_templates:
+    node0:
+        type: cloudify.nodes.Compute
+""" + node_templates)
+        self.assertEquals('node0',
+                          self.get_node_by_name(plan, 'node1999')['host_id'])
+
+    def test_node_contained_in_itself(self):
+        ex = self._assert_dsl_parsing_exception_error_code(
+            self.BASIC_VERSION_SECTION_DSL_1_0 + """
+node_types:
+    test_type: {}
+relationships:
+    cloudify.relationships.contained_in: {}
+node_templates:
+    node1:
+        type: test_type
+        relationships:
+            -   type: cloudify.relationships.contained_in
+                target: node2
+    node2:
+        type: test_type
+        relationships:
+            -   type: cloudify.relationships.contained_in
+                target: node3
+    node3:
+        type: test_type
+        relationships:
+            -   type: cloudify.relationships.contained_in
+                target: node2
+""", 113, DSLParsingLogicException)
+        self.assertIn(ex.circular_dependency, [['node1', 'node2', 'node3',
+                                                'node2'],
+                                               ['node2', 'node3', 'node2'],
+                                               ['node3', 'node2', 'node3']])
@@ -0,0 +1,118 @@
+########
+# Copyright (c) 2015 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+from dsl_parser.exceptions import DSLParsingLogicException
+from dsl_parser.parser import parse_from_url, resolve_imports
+from dsl_parser.tests.abstract_test_parser import AbstractTestParser
+from dsl_parser.tests.http_server import ResourcesHTTPServer
+
+LATENCY = 0.05
+
+
+class TestConcurrentImports(AbstractTestParser):
+
+    def setUp(self):
+        super(TestConcurrentImports, self).setUp()
+        self.server = ResourcesHTTPServer(latency=LATENCY).start()
+        self.addCleanup(self.server.stop)
+
+    def _add_resource(self, path, content):
+        self.server.resources[path] = content
+        return self.server.url(path)
+
+    def _plugin_import(self, index):
+        return """
+plugins:
+    plugin_{0}:
+        executor: central_deployment_agent
+        source: dummy
+""".format(index)
+
+    def _wide_blueprint(self, width=8):
+        self._add_resource('types.yaml', self.BASIC_TYPE)
+        for i in range(width):
+            # every plugin import also imports the shared types file
+            self._add_resource('plugin_{0}.yaml'.format(i),
+                               self._plugin_import(i) + """
+imports:
+    -   types.yaml
+""")
+        imports = ''.join('\n    -   plugin_{0}.yaml'.format(i)
+                          for i in range(width))
+        return self._add_resource(
+            'blueprint.yaml',
+            self.BASIC_VERSION_SECTION_DSL_1_0 +
+            self.BASIC_NODE_TEMPLATES_SECTION + """
+imports:""" + imports + self.BASIC_PLUGIN)
+
+    def test_same_plan_as_serial(self):
+        blueprint_url = self._wide_blueprint()
+        serial_plan = parse_from_url(blueprint_url)
+        concurrent_plan = parse_from_url(blueprint_url, max_import_workers=4)
+        self.assertEquals(serial_plan, concurrent_plan)
+
+    def test_same_ordered_imports_as_serial(self):
+        blueprint_url = self._wide_blueprint()
+        dsl_string = self.server.resources['blueprint.yaml']
+        serial_graph = resolve_imports(dsl_string, dsl_location=blueprint_url)
+        concurrent_graph = resolve_imports(dsl_string,
+                                           dsl_location=blueprint_url,
+                                           max_import_workers=4)
+        self.assertEquals(serial_graph.ordered_imports,
+                          concurrent_graph.ordered_imports)
+        self.assertEquals(self.server.url('types.yaml'),
+                          concurrent_graph.ordered_imports[1])
+
+    def test_sibling_imports_fetched_concurrently(self):
+        self.server.latency = 0.2
+        blueprint_url = self._wide_blueprint(width=8)
+        parse_from_url(blueprint_url, max_import_workers=8)
+        # serially, a single request at a time would be served
+        self.assertGreaterEqual(self.server.max_concurrent_requests, 4)
+
+    def test_no_more_requests_than_serial(self):
+        blueprint_url = self._wide_blueprint()
+        parse_from_url(blueprint_url)
+        serial_requests = len(self.server.requests)
+        self.server.requests = []
+        parse_from_url(blueprint_url, max_import_workers=4)
+        self.assertEquals(serial_requests, len(self.server.requests))
+
+    def _assert_same_error(self, blueprint_url):
+        def error(**kwargs):
+            try:
+                parse_from_url(blueprint_url, **kwargs)
+                self.fail()
+            except DSLParsingLogicException, ex:
+                return ex.err_code, str(ex), getattr(ex, 'failed_import',
+                                                     None)
+        serial_error = error()
+        self.assertEquals(serial_error, error(max_import_workers=4))
+        return serial_error
+
+    def test_merge_conflict_error(self):
+        blueprint_url = self._wide_blueprint()
+        # plugin_3 conflicts with the blueprint's own test_plugin
+        self.server.resources['plugin_3.yaml'] = self.BASIC_PLUGIN
+        err_code, _, _ = self._assert_same_error(blueprint_url)
+        self.assertEquals(4, err_code)
+
+    def test_missing_import_error(self):
+        blueprint_url = self._wide_blueprint()
+        del self.server.resources['plugin_2.yaml']
+        del self.server.resources['plugin_5.yaml']
+        err_code, _, failed_import = self._assert_same_error(blueprint_url)
+        self.assertEquals(13, err_code)
+        self.assertEquals('plugin_2.yaml', failed_import)
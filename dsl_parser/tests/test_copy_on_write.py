@@ -0,0 +1,125 @@
+########
+# Copyright (c) 2015 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+import copy
+
+from dsl_parser import parser
+from dsl_parser import utils
+from dsl_parser.import_graph import ImportGraph
+from dsl_parser.tests.abstract_test_parser import AbstractTestParser
+
+NODE_TYPES = {
+    'root': {
+        'properties': {'a': {'default': [1]}},
+        'interfaces': {'lifecycle': {'create': {'implementation': 'p.op',
+                                                'inputs': {}}}}
+    },
+    'leaf': {
+        'derived_from': 'root',
+        'properties': {'b': {'default': {'key': 'value'}}}
+    }
+}
+
+
+class TestCopyOnWrite(AbstractTestParser):
+
+    def test_complete_types_share_what_they_do_not_override(self):
+        node_types = copy.deepcopy(NODE_TYPES)
+        complete_types = utils.CompleteTypes(
+            node_types, parser.node_type_interfaces_merging_function,
+            is_relationships=False)
+        leaf = complete_types.get('leaf')
+        self.assertIs(node_types['root']['properties']['a'],
+                      leaf['properties']['a'])
+        self.assertIs(node_types['leaf']['properties']['b'],
+                      leaf['properties']['b'])
+        self.assertEquals(NODE_TYPES['leaf']['properties'],
+                          node_types['leaf']['properties'])
+
+    def test_extract_complete_type_recursive_copies_result(self):
+        node_types = copy.deepcopy(NODE_TYPES)
+        leaf = utils.extract_complete_type_recursive(
+            dsl_type=node_types['leaf'],
+            dsl_type_name='leaf',
+            dsl_container=node_types,
+            merging_func=parser.node_type_interfaces_merging_function,
+            is_relationships=False)
+        leaf['properties']['a']['default'].append(2)
+        leaf['properties']['b']['default']['key'] = 'changed'
+        self.assertEquals(NODE_TYPES, node_types)
+
+    def test_combine_imports_does_not_modify_main_document(self):
+        parsed_dsl = {
+            'tosca_definitions_version': 'cloudify_dsl_1_0',
+            'node_types': {'main': {}},
+            'plugins': {'main_plugin': {}}
+        }
+        original = copy.deepcopy(parsed_dsl)
+        imports_graph = ImportGraph('main.yaml', parsed_dsl)
+        imports_graph.add_document('types.yaml', {
+            'node_types': {'imported': {}},
+            'relationships': {'imported': {}}
+        })
+        combined = parser._combine_imports(parsed_dsl, imports_graph)
+        self.assertEquals(original, parsed_dsl)
+        self.assertEquals(set(['main', 'imported']),
+                          set(combined['node_types']))
+        self.assertIs(parsed_dsl['plugins'], combined['plugins'])
+
+    def test_process_groups_does_not_modify_groups(self):
+        groups = {
+            'group': {
+                'members': ['node'],
+                'policies': {
+                    'policy': {
+                        'type': 'policy_type',
+                        'triggers': {'trigger': {'type': 'trigger_type'}}
+                    }
+                }
+            }
+        }
+        original = copy.deepcopy(groups)
+        policy_types = parser._process_policy_types(
+            {'policy_type': {'source': 'source'}})
+        policy_triggers = parser._process_policy_triggers(
+            {'trigger_type': {'source': 'source',
+                              'parameters': {'p': {'default': [1]}}}})
+        processed_groups = parser._process_groups(
+            groups, policy_types, policy_triggers, [{'name': 'node'}])
+        self.assertEquals(original, groups)
+        policy = processed_groups['group']['policies']['policy']
+        self.assertEquals({}, policy['properties'])
+        self.assertEquals({'p': [1]},
+                          policy['triggers']['trigger']['parameters'])
+
+    def test_node_plugins_are_not_shared(self):
+        plan = self.parse(self.BASIC_VERSION_SECTION_DSL_1_0 +
+                          self.BASIC_PLUGIN + """
+node_types:
+    test_type:
+        interfaces:
+            test_interface1:
+                install: test_plugin.install
+node_templates:
+    node1:
+        type: test_type
+    node2:
+        type: test_type
+""")
+        node1 = self.get_node_by_name(plan, 'node1')
+        node2 = self.get_node_by_name(plan, 'node2')
+        node1['plugins'][0]['executor'] = 'changed'
+        self.assertEquals('central_deployment_agent',
+                          node2['plugins'][0]['executor'])
@@ -0,0 +1,134 @@
+########
+# Copyright (c) 2015 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+import time
+
+from dsl_parser import document_cache
+from dsl_parser.document_cache import DocumentCache
+from dsl_parser.tests.abstract_test_parser import AbstractTestParser
+
+
+class TestDocumentCache(AbstractTestParser):
+
+    def setUp(self):
+        super(TestDocumentCache, self).setUp()
+        self.loaded = []
+
+    def _load(self, content):
+        self.loaded.append(content)
+        return {'content': content, 'nested': {'list': [1, 2]}}
+
+    def test_hit(self):
+        cache = DocumentCache()
+        first = cache.load('url', 'content', self._load)
+        second = cache.load('url', 'content', self._load)
+        self.assertEquals(first, second)
+        self.assertEquals(['content'], self.loaded)
+        info = cache.info()
+        self.assertEquals(1, info['hits'])
+        self.assertEquals(1, info['misses'])
+        self.assertEquals(['url'], info['urls'])
+        self.assertEquals(len('content'), info['size'])
+
+    def test_keyed_by_url_and_content(self):
+        cache = DocumentCache()
+        cache.load('url', 'content', self._load)
+        cache.load('url', 'changed', self._load)
+        cache.load('other_url', 'content', self._load)
+        self.assertEquals(['content', 'changed', 'content'], self.loaded)
+
+    def test_cached_entries_cannot_be_corrupted(self):
+        cache = DocumentCache()
+        first = cache.load('url', 'content', self._load)
+        first['nested']['list'].append(3)
+        second = cache.load('url', 'content', self._load)
+        self.assertEquals([1, 2], second['nested']['list'])
+        second['nested']['list'].append(4)
+        self.assertEquals([1, 2], cache.load('url', 'content', self._load)
+                          ['nested']['list'])
+
+    def test_ttl(self):
+        cache = DocumentCache(ttl=0.1)
+        cache.load('url', 'content', self._load)
+        time.sleep(0.2)
+        cache.load('url', 'content', self._load)
+        self.assertEquals(2, len(self.loaded))
+        self.assertEquals(0, cache.info()['hits'])
+
+    def test_least_recently_used_evicted(self):
+        cache = DocumentCache(max_size=2 * len('content1'))
+        cache.load('url1', 'content1', self._load)
+        cache.load('url2', 'content2', self._load)
+        cache.load('url1', 'content1', self._load)
+        cache.load('url3', 'content3', self._load)
+        self.assertEquals(['url1', 'url3'], cache.info()['urls'])
+        self.assertEquals(2 * len('content1'), cache.info()['size'])
+
+    def test_too_large_not_cached(self):
+        cache = DocumentCache(max_size=3)
+        cache.load('url', 'content', self._load)
+        self.assertEquals(0, cache.info()['entries'])
+
+    def test_clear(self):
+        cache = DocumentCache()
+        cache.load('url', 'content', self._load)
+        cache.clear()
+        self.assertEquals(0, cache.info()['entries'])
+        self.assertEquals(0, cache.info()['size'])
+        cache.load('url', 'content', self._load)
+        self.assertEquals(2, len(self.loaded))
+
+
+class TestProcessDocumentCache(AbstractTestParser):
+
+    def setUp(self):
+        super(TestProcessDocumentCache, self).setUp()
+        document_cache.clear()
+        self.addCleanup(document_cache.clear)
+
+    def test_shared_across_parse_calls(self):
+        imported = self.make_yaml_file(self.BASIC_TYPE + self.BASIC_PLUGIN)
+        yaml = self.BASIC_NODE_TEMPLATES_SECTION + """
+imports:
+    -   {0}""".format(imported)
+        first = self.parse(yaml)
+        hits = document_cache.info()['hits']
+        second = self.parse(yaml)
+        self.assertEquals(hits + 1, document_cache.info()['hits'])
+        # merging must not have modified the cached document
+        self.assertEquals(first, second)
+
+    def test_changed_import_reloaded(self):
+        imported = self.make_yaml_file(self.MINIMAL_BLUEPRINT)
+        yaml = """
+imports:
+    -   {0}""".format(imported)
+        self.parse(yaml)
+        with open(imported, 'w') as f:
+            f.write(self.MINIMAL_BLUEPRINT.replace('"val"', '"changed"'))
+        result = self.parse(yaml)
+        self.assertEquals('changed',
+                          result.node_templates[0]['properties']['key'])
+
+    def test_configure(self):
+        original = document_cache.info()
+        self.addCleanup(document_cache.configure,
+                        original['max_size'], original['ttl'])
+        document_cache.configure(max_size=0)
+        imported = self.make_yaml_file(self.MINIMAL_BLUEPRINT)
+        self.parse("""
+imports:
+    -   {0}""".format(imported))
+        self.assertEquals(0, document_cache.info()['entries'])
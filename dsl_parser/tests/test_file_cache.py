@@ -0,0 +1,179 @@
+########
+# Copyright (c) 2015 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+import os
+import time
+
+from dsl_parser import document_cache
+from dsl_parser import file_cache
+from dsl_parser import parser
+from dsl_parser.file_cache import FileCache, RACY_INTERVAL
+from dsl_parser.parser import parse_from_path
+from dsl_parser.tests.abstract_test_parser import AbstractTestParser
+
+
+class TestFileCache(AbstractTestParser):
+
+    def setUp(self):
+        super(TestFileCache, self).setUp()
+        self.read = []
+
+        def recording_open(path, *args):
+            self.read.append(path)
+            return open(path, *args)
+        # shadows the builtin open in the module
+        file_cache.open = recording_open
+        self.addCleanup(delattr, file_cache, 'open')
+
+    def _make_file(self, content, filename='file.yaml', age=RACY_INTERVAL):
+        path = self.make_file_with_name(content, filename)
+        _set_age(path, age)
+        return path
+
+    def test_hit(self):
+        cache = FileCache()
+        path = self._make_file('content')
+        self.assertEquals('content', cache.read(path)[0])
+        content, stat = cache.read(path)
+        self.assertEquals('content', content)
+        self.assertEquals(len('content'), stat.st_size)
+        self.assertEquals([path], self.read)
+        info = cache.info()
+        self.assertEquals(1, info['hits'])
+        self.assertEquals(1, info['misses'])
+        self.assertEquals([path], info['paths'])
+        self.assertEquals(len('content'), info['size'])
+
+    def test_modified_file_read_again(self):
+        cache = FileCache()
+        path = self._make_file('content')
+        cache.read(path)
+        # same size, older modification time
+        self._make_file('changed', age=RACY_INTERVAL * 2)
+        self.assertEquals('changed', cache.read(path)[0])
+        # same modification time, other size
+        stat = os.stat(path)
+        self._make_file('changed again')
+        os.utime(path, (stat.st_atime, stat.st_mtime))
+        self.assertEquals('changed again', cache.read(path)[0])
+        self.assertEquals(3, len(self.read))
+        # older versions are dropped
+        self.assertEquals(1, cache.info()['entries'])
+
+    def test_replaced_file_read_again(self):
+        cache = FileCache()
+        path = self._make_file('content')
+        cache.read(path)
+        stat = os.stat(path)
+        other_path = self._make_file('replaced', 'other.yaml')
+        os.utime(other_path, (stat.st_atime, stat.st_mtime))
+        os.rename(other_path, path)
+        self.assertEquals('replaced', cache.read(path)[0])
+
+    def test_recently_modified_not_cached(self):
+        cache = FileCache()
+        path = self._make_file('content', age=0)
+        cache.read(path)
+        cache.read(path)
+        self.assertEquals(2, len(self.read))
+        self.assertEquals(0, cache.info()['entries'])
+
+    def test_empty_file(self):
+        cache = FileCache()
+        path = self._make_file('')
+        self.assertEquals('', cache.read(path)[0])
+        self.assertEquals('', cache.read(path)[0])
+        self.assertEquals(1, cache.info()['hits'])
+
+    def test_missing_file(self):
+        cache = FileCache()
+        self.assertRaises(IOError, cache.read,
+                          os.path.join(self._temp_dir, 'missing.yaml'))
+        self.assertRaises(IOError, cache.read, self._temp_dir)
+
+    def test_least_recently_used_evicted(self):
+        cache = FileCache(max_size=2 * len('content1'))
+        paths = [self._make_file('content{0}'.format(i),
+                                 'file{0}.yaml'.format(i))
+                 for i in range(1, 4)]
+        cache.read(paths[0])
+        cache.read(paths[1])
+        cache.read(paths[0])
+        cache.read(paths[2])
+        self.assertEquals([paths[0], paths[2]], cache.info()['paths'])
+        self.assertEquals(2 * len('content1'), cache.info()['size'])
+
+    def test_too_large_not_cached(self):
+        cache = FileCache(max_size=3)
+        cache.read(self._make_file('content'))
+        self.assertEquals(0, cache.info()['entries'])
+
+
+class TestParseFromPathCaching(AbstractTestParser):
+
+    def setUp(self):
+        super(TestParseFromPathCaching, self).setUp()
+        file_cache.clear()
+        self.addCleanup(file_cache.clear)
+        document_cache.clear()
+        self.addCleanup(document_cache.clear)
+
+    def _blueprint_path(self):
+        imported = self.make_yaml_file(self.BASIC_TYPE + self.BASIC_PLUGIN)
+        _set_age(imported, RACY_INTERVAL)
+        path = self.make_yaml_file(
+            self.BASIC_VERSION_SECTION_DSL_1_0 +
+            self.BASIC_NODE_TEMPLATES_SECTION + """
+imports:
+    -   {0}""".format(imported))
+        _set_age(path, RACY_INTERVAL)
+        return path
+
+    def test_unchanged_blueprint_not_read_or_loaded(self):
+        path = self._blueprint_path()
+        first = parse_from_path(path)
+
+        loaded = []
+        original_load_document = parser._load_document
+
+        def recording_load_document(content, location, error_message):
+            loaded.append(location)
+            return original_load_document(content, location, error_message)
+        parser._load_document = recording_load_document
+        self.addCleanup(setattr, parser, '_load_document',
+                        original_load_document)
+        misses = file_cache.info()['misses']
+
+        second = parse_from_path(path)
+        self.assertEquals(first, second)
+        self.assertEquals(misses, file_cache.info()['misses'])
+        self.assertEquals(2, file_cache.info()['entries'])
+        self.assertEquals([], loaded)
+
+    def test_changed_blueprint_parsed_again(self):
+        path = self._blueprint_path()
+        parse_from_path(path)
+        with open(path) as f:
+            content = f.read()
+        with open(path, 'w') as f:
+            f.write(content.replace('"val"', '"changed"'))
+        plan = parse_from_path(path)
+        self.assertEquals('changed',
+                          plan['nodes'][0]['properties']['key'])
+
+
+def _set_age(path, age):
+    modified_at = time.time() - age
+    os.utime(path, (modified_at, modified_at))
@@ -0,0 +1,159 @@
+########
+# Copyright (c) 2015 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+import os
+import hashlib
+from multiprocessing import Pool
+from urllib2 import HTTPError
+
+from dsl_parser.exceptions import DSLParsingLogicException
+from dsl_parser.import_cache import ImportCache
+from dsl_parser.parser import parse
+from dsl_parser.tests.abstract_test_parser import AbstractTestParser
+from dsl_parser.tests.http_server import ResourcesHTTPServer
+
+
+def _fetch_in_process(args):
+    cache_dir, max_size, url = args
+    return ImportCache(cache_dir, max_size=max_size).fetch(url)
+
+
+class TestImportCache(AbstractTestParser):
+
+    def setUp(self):
+        super(TestImportCache, self).setUp()
+        self.server = ResourcesHTTPServer().start()
+        self.addCleanup(self.server.stop)
+        self.cache_dir = os.path.join(self._temp_dir, 'cache')
+        self.server.resources['types.yaml'] = self.MINIMAL_BLUEPRINT
+        self.server.resources['plugin.yaml'] = self.BASIC_PLUGIN
+
+    def _cache(self, **kwargs):
+        return ImportCache(self.cache_dir, **kwargs)
+
+    def test_fetch_miss_then_hit(self):
+        url = self.server.url('types.yaml')
+        self.assertEquals(self.MINIMAL_BLUEPRINT, self._cache().fetch(url))
+        cache = self._cache()
+        self.assertEquals(self.MINIMAL_BLUEPRINT, cache.fetch(url))
+        stats = cache.stats
+        self.assertEquals(1, stats['hits'])
+        self.assertEquals(0, stats['misses'])
+        self.assertEquals(len(self.MINIMAL_BLUEPRINT), stats['size'])
+        requests = self.server.requests_for('types.yaml')
+        self.assertEquals(2, len(requests))
+        self.assertIn('if-none-match', requests[1][2])
+        self.assertIn('if-modified-since', requests[1][2])
+
+    def test_changed_content_is_downloaded(self):
+        url = self.server.url('types.yaml')
+        cache = self._cache()
+        cache.fetch(url)
+        self.server.resources['types.yaml'] = self.BASIC_TYPE
+        self.assertEquals(self.BASIC_TYPE, cache.fetch(url))
+        self.assertEquals(2, cache.stats['misses'])
+
+    def test_same_content_stored_once(self):
+        self.server.resources['copy.yaml'] = self.MINIMAL_BLUEPRINT
+        cache = self._cache()
+        cache.fetch(self.server.url('types.yaml'))
+        cache.fetch(self.server.url('copy.yaml'))
+        self.assertEquals(len(self.MINIMAL_BLUEPRINT), cache.stats['size'])
+
+    def test_least_recently_used_evicted(self):
+        max_size = len(self.MINIMAL_BLUEPRINT) + len(self.BASIC_PLUGIN)
+        cache = self._cache(max_size=max_size)
+        cache.fetch(self.server.url('types.yaml'))
+        cache.fetch(self.server.url('plugin.yaml'))
+        # types.yaml content is used less recently than plugin.yaml content
+        self._set_used_time(self.MINIMAL_BLUEPRINT, 1)
+        self._set_used_time(self.BASIC_PLUGIN, 2)
+        self.server.resources['types.yaml'] = 'changed'
+        cache.fetch(self.server.url('types.yaml'))
+        self.assertEquals(1, cache.stats['evictions'])
+        self.assertEquals(self.BASIC_PLUGIN,
+                          cache.fetch(self.server.url('plugin.yaml')))
+        self.assertEquals(1, cache.stats['hits'])
+        self.assertEquals(len(self.BASIC_PLUGIN) + len('changed'),
+                          cache.stats['size'])
+
+    def _set_used_time(self, content, used_time):
+        os.utime(os.path.join(self.cache_dir, 'objects',
+                              hashlib.sha256(content).hexdigest()),
+                 (used_time, used_time))
+
+    def test_evicted_content_is_downloaded(self):
+        url = self.server.url('types.yaml')
+        cache = self._cache(max_size=0)
+        cache.fetch(url)
+        self.assertEquals(0, cache.stats['size'])
+        self.assertEquals(self.MINIMAL_BLUEPRINT, cache.fetch(url))
+        self.assertEquals(2, cache.stats['misses'])
+
+    def test_clear(self):
+        cache = self._cache()
+        cache.fetch(self.server.url('types.yaml'))
+        cache.clear()
+        self.assertEquals(0, cache.stats['size'])
+        cache.fetch(self.server.url('types.yaml'))
+        self.assertEquals(2, cache.stats['misses'])
+
+    def test_missing_url(self):
+        cache = self._cache()
+        self.assertRaises(HTTPError, cache.fetch,
+                          self.server.url('missing.yaml'))
+
+    def test_shared_by_processes(self):
+        for i in range(20):
+            self.server.resources['{0}.yaml'.format(i)] = 'content{0}'.format(
+                i)
+        max_size = 10 * len('content10')
+        urls = [self.server.url('{0}.yaml'.format(i % 20))
+                for i in range(100)]
+        pool = Pool(processes=4)
+        try:
+            contents = pool.map(_fetch_in_process,
+                                [(self.cache_dir, max_size, url)
+                                 for url in urls])
+        finally:
+            pool.close()
+            pool.join()
+        self.assertEquals(['content{0}'.format(i % 20) for i in range(100)],
+                          contents)
+        self.assertLessEqual(self._cache().stats['size'], max_size)
+
+    def test_parse_with_import_cache(self):
+        cache = self._cache()
+        yaml = self.BASIC_VERSION_SECTION_DSL_1_0 + """
+imports:
+    -   {0}""".format(self.server.url('types.yaml'))
+        self.parse_with_cache(yaml, cache)
+        result = self.parse_with_cache(yaml, cache)
+        self.assertEquals('test_node', result.node_templates[0]['name'])
+        self.assertEquals({'hits': 1, 'misses': 1, 'evictions': 0,
+                           'size': len(self.MINIMAL_BLUEPRINT)},
+                          cache.stats)
+
+    def test_parse_with_import_cache_missing_import(self):
+        yaml = self.BASIC_VERSION_SECTION_DSL_1_0 + """
+imports:
+    -   {0}""".format(self.server.url('missing.yaml'))
+        ex = self._assert_dsl_parsing_exception_error_code(
+            yaml, 13, DSLParsingLogicException,
+            lambda dsl: self.parse_with_cache(dsl, self._cache()))
+        self.assertEquals(self.server.url('missing.yaml'), ex.failed_import)
+
+    def parse_with_cache(self, dsl_string, cache):
+        return parse(dsl_string, import_cache=cache)
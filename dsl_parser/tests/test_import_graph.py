@@ -0,0 +1,93 @@
+########
+# Copyright (c) 2015 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+from dsl_parser.loader import DefaultResourceLoader
+from dsl_parser.parser import parse, resolve_imports
+from dsl_parser.tests.abstract_test_parser import AbstractTestParser
+
+
+class _CountingResourceLoader(DefaultResourceLoader):
+
+    def __init__(self):
+        super(_CountingResourceLoader, self).__init__()
+        self.opened_urls = []
+
+    def open(self, url, headers=None, timeout=None):
+        self.opened_urls.append(url)
+        return super(_CountingResourceLoader, self).open(
+            url, headers, timeout)
+
+
+class TestImportGraph(AbstractTestParser):
+
+    def _diamond(self):
+        bottom = self.make_yaml_file(self.BASIC_TYPE, as_uri=True)
+        left = self.make_yaml_file(self.BASIC_PLUGIN + """
+imports:
+    -   {0}""".format(bottom), as_uri=True)
+        right = self.make_yaml_file("""
+imports:
+    -   {0}""".format(bottom), as_uri=True)
+        top = self.BASIC_NODE_TEMPLATES_SECTION + """
+imports:
+    -   {0}
+    -   {1}""".format(left, right)
+        return top, left, right, bottom
+
+    def test_each_import_opened_once(self):
+        top, left, right, bottom = self._diamond()
+        resource_loader = _CountingResourceLoader()
+        result = parse(self.BASIC_VERSION_SECTION_DSL_1_0 + top,
+                       resource_loader=resource_loader)
+        self.assertEquals(1, len(result.node_templates))
+        self.assertEquals(sorted([left, right, bottom]),
+                          sorted(resource_loader.opened_urls))
+
+    def test_ordered_imports(self):
+        top, left, right, bottom = self._diamond()
+        graph = resolve_imports(self.BASIC_VERSION_SECTION_DSL_1_0 + top)
+        self.assertEquals([left, bottom, right], graph.ordered_imports)
+        self.assertEquals([left, right], graph.imports())
+        self.assertEquals([bottom], graph.imports(left))
+        self.assertEquals([bottom], graph.imports(right))
+        self.assertEquals([], graph.imports(bottom))
+        self.assertEquals(3, len(graph))
+        self.assertIn(bottom, graph)
+        self.assertIn('test_plugin', graph.document(left)['plugins'])
+
+    def test_root_location_in_graph(self):
+        top_file = self.make_file_with_name(
+            self.BASIC_VERSION_SECTION_DSL_1_0 + self.MINIMAL_BLUEPRINT,
+            'top.yaml')
+        importing = self.make_yaml_file("""
+imports:
+    -   {0}""".format(top_file), as_uri=True)
+        with open(top_file, 'a') as f:
+            f.write("""
+imports:
+    -   {0}""".format(importing))
+        graph = resolve_imports(open(top_file).read(),
+                                dsl_location=top_file)
+        self.assertEquals([importing], graph.ordered_imports)
+        self.assertIn(graph.root_location, graph)
+        self.assertEquals([graph.root_location], graph.imports(importing))
+
+    def test_parse_does_not_modify_graph_documents(self):
+        top, left, right, bottom = self._diamond()
+        graph = resolve_imports(self.BASIC_VERSION_SECTION_DSL_1_0 + top)
+        self.parse(top)
+        self.assertNotIn('executor',
+                         graph.document(bottom)['node_types']['test_type']
+                         ['interfaces']['test_interface1']['install'])
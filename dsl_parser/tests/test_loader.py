@@ -0,0 +1,248 @@
+########
+# Copyright (c) 2015 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+import os
+import time
+import urllib2
+import contextlib
+from urllib2 import URLError, HTTPError
+
+from dsl_parser.exceptions import DSLParsingLogicException
+from dsl_parser.loader import (Resource,
+                               ResourceLoader,
+                               DefaultResourceLoader)
+from dsl_parser.parser import parse, parse_from_path, parse_from_url
+from dsl_parser.tests.abstract_test_parser import AbstractTestParser
+from dsl_parser.tests.http_server import ResourcesHTTPServer
+
+
+class _MemoryResourceLoader(ResourceLoader):
+
+    schemes = ResourceLoader.schemes + ('mem:',)
+
+    def __init__(self, resources):
+        self.resources = resources
+
+    def open(self, url, headers=None, timeout=None):
+        if url not in self.resources:
+            raise URLError('{0} not found'.format(url))
+        return Resource(self.resources[url], {})
+
+
+class TestDefaultResourceLoader(AbstractTestParser):
+
+    def setUp(self):
+        super(TestDefaultResourceLoader, self).setUp()
+        self.server = ResourcesHTTPServer().start()
+        self.addCleanup(self.server.stop)
+        self.loader = DefaultResourceLoader()
+        self.addCleanup(self.loader.close)
+
+    def test_connections_reused(self):
+        self.server.resources['a.yaml'] = 'a'
+        self.server.resources['b.yaml'] = 'b'
+        for _ in range(5):
+            self.assertEquals('a', self.loader.load(self.server.url('a.yaml')))
+            self.assertEquals('b', self.loader.load(self.server.url('b.yaml')))
+        self.assertEquals(10, len(self.server.requests))
+        self.assertEquals(1, self.server.connections)
+
+    def test_response_headers(self):
+        self.server.resources['a.yaml'] = 'a'
+        resource = self.loader.open(self.server.url('a.yaml'))
+        self.assertEquals('a', resource.content)
+        self.assertIn('etag', resource.headers)
+
+    def test_missing(self):
+        url = self.server.url('missing.yaml')
+        ex = self.assertRaises(HTTPError, self.loader.load, url)
+        self.assertEquals(404, ex.code)
+        self.assertFalse(self.loader.exists(url))
+
+    def test_exists_does_not_download(self):
+        self.server.resources['a.yaml'] = 'a'
+        self.assertTrue(self.loader.exists(self.server.url('a.yaml')))
+        self.assertEquals(['HEAD'], [r[0] for r in self.server.requests])
+
+    def test_unreachable(self):
+        server = ResourcesHTTPServer().start()
+        url = server.url('a.yaml')
+        server.stop()
+        self.assertRaises(URLError, self.loader.load, url)
+
+    def test_connections_shared_by_parse_calls(self):
+        self.server.resources['types.yaml'] = self.MINIMAL_BLUEPRINT
+        yaml = self.BASIC_VERSION_SECTION_DSL_1_0 + """
+imports:
+    -   {0}""".format(self.server.url('types.yaml'))
+        self.server.resources['blueprint.yaml'] = yaml
+        for _ in range(3):
+            parse_from_url(self.server.url('blueprint.yaml'),
+                           resource_loader=self.loader)
+        self.assertEquals(1, self.server.connections)
+
+    def test_missing_remembered(self):
+        url = self.server.url('missing.yaml')
+        for _ in range(3):
+            self.assertRaises(HTTPError, self.loader.load, url)
+            self.assertFalse(self.loader.exists(url))
+        self.assertEquals(1, len(self.server.requests))
+        self.loader.clear_missing()
+        self.server.resources['missing.yaml'] = 'created'
+        self.assertEquals('created', self.loader.load(url))
+
+    def test_missing_expires(self):
+        resource_loader = DefaultResourceLoader(missing_ttl=0.1)
+        self.addCleanup(resource_loader.close)
+        url = self.server.url('missing.yaml')
+        self.assertRaises(HTTPError, resource_loader.load, url)
+        self.server.resources['missing.yaml'] = 'created'
+        self.assertRaises(HTTPError, resource_loader.load, url)
+        time.sleep(0.2)
+        self.assertEquals('created', resource_loader.load(url))
+
+    def test_missing_bounded(self):
+        resource_loader = DefaultResourceLoader(max_missing=2)
+        self.addCleanup(resource_loader.close)
+        urls = [self.server.url('missing{0}.yaml'.format(i))
+                for i in range(3)]
+        for url in urls + urls[1:]:
+            self.assertRaises(HTTPError, resource_loader.load, url)
+        # the first url was forgotten to make room for the third
+        self.assertRaises(HTTPError, resource_loader.load, urls[0])
+        self.assertEquals(4, len(self.server.requests))
+
+    def test_missing_error_raised_anew(self):
+        url = self.server.url('missing.yaml')
+        errors = []
+        for _ in range(3):
+            ex = self.assertRaises(HTTPError, self.loader.load, url)
+            self.assertEquals(404, ex.code)
+            self.assertEquals('Not Found', ex.msg)
+            # as parse_from_url does
+            ex.msg = 'modified'
+            errors.append(ex)
+        self.assertEquals(3, len(set(id(ex) for ex in errors)))
+
+    def test_missing_not_remembered_when_disabled(self):
+        resource_loader = DefaultResourceLoader(missing_ttl=0)
+        self.addCleanup(resource_loader.close)
+        url = self.server.url('missing.yaml')
+        self.assertRaises(HTTPError, resource_loader.load, url)
+        self.assertRaises(HTTPError, resource_loader.load, url)
+        self.assertEquals(2, len(self.server.requests))
+
+    def test_relative_imports_traffic(self):
+        self.server.resources['blueprint/blueprint.yaml'] = \
+            self.BASIC_VERSION_SECTION_DSL_1_0 + \
+            self.BASIC_NODE_TEMPLATES_SECTION + """
+imports:
+    -   types.yaml
+    -   plugin.yaml"""
+        # found relative to the blueprint
+        self.server.resources['blueprint/types.yaml'] = self.BASIC_TYPE
+        # found relative to the resources base url
+        self.server.resources['plugin.yaml'] = self.BASIC_PLUGIN
+        for _ in range(2):
+            parse_from_url(self.server.url('blueprint/blueprint.yaml'),
+                           resources_base_url=self.server.base_url,
+                           resource_loader=self.loader)
+        # each existing resource is fetched once per parse, without being
+        # probed first, and the missing candidate is probed only once
+        self.assertEquals(
+            [('GET', 'blueprint/blueprint.yaml'),
+             ('GET', 'blueprint/types.yaml'),
+             ('GET', 'blueprint/plugin.yaml'),
+             ('GET', 'plugin.yaml'),
+             ('GET', 'blueprint/blueprint.yaml'),
+             ('GET', 'blueprint/types.yaml'),
+             ('GET', 'plugin.yaml')],
+            [(method, path) for method, path, _ in self.server.requests])
+
+    def test_file_url(self):
+        path = self.make_yaml_file('content')
+        self.assertEquals('content',
+                          self.loader.load('file:{0}'.format(path)))
+
+    def test_file_url_headers(self):
+        url = 'file:{0}'.format(self.make_yaml_file('content'))
+        with contextlib.closing(urllib2.urlopen(url)) as f:
+            expected = dict(f.info().items())
+        self.assertEquals(expected, self.loader.open(url).headers)
+
+    def test_missing_file(self):
+        url = 'file:{0}'.format(os.path.join(self._temp_dir, 'missing.yaml'))
+        self.assertRaises(URLError, self.loader.load, url)
+        self.assertFalse(self.loader.exists(url))
+
+    def test_missing_file_not_remembered(self):
+        path = os.path.join(self._temp_dir, 'missing.yaml')
+        url = 'file:{0}'.format(path)
+        self.assertRaises(URLError, self.loader.load, url)
+        with open(path, 'w') as f:
+            f.write('created')
+        self.assertEquals('created', self.loader.load(url))
+
+    def test_missing_import_file_created(self):
+        blueprint_path = self.make_yaml_file(
+            self.BASIC_VERSION_SECTION_DSL_1_0 +
+            self.BASIC_NODE_TEMPLATES_SECTION + """
+imports:
+    -   types.yaml""")
+        ex = self.assertRaises(DSLParsingLogicException, parse_from_path,
+                               blueprint_path)
+        self.assertEquals(13, ex.err_code)
+        types_path = os.path.join(os.path.dirname(blueprint_path),
+                                  'types.yaml')
+        with open(types_path, 'w') as f:
+            f.write(self.BASIC_TYPE + self.BASIC_PLUGIN)
+        plan = parse_from_path(blueprint_path)
+        self.assertEquals('test_type', plan['nodes'][0]['type'])
+
+
+class TestCustomResourceLoader(AbstractTestParser):
+
+    def test_custom_scheme(self):
+        resource_loader = _MemoryResourceLoader({
+            'mem:/types.yaml': self.BASIC_TYPE + self.BASIC_PLUGIN
+        })
+        yaml = self.BASIC_VERSION_SECTION_DSL_1_0 + \
+            self.BASIC_NODE_TEMPLATES_SECTION + """
+imports:
+    -   mem:/types.yaml"""
+        result = parse(yaml, resource_loader=resource_loader)
+        self.assertEquals('test_type', result.node_templates[0]['type'])
+
+    def test_relative_import_resolved_by_loader(self):
+        resource_loader = _MemoryResourceLoader({
+            'mem:/base/types.yaml': self.BASIC_TYPE + self.BASIC_PLUGIN
+        })
+        yaml = self.BASIC_VERSION_SECTION_DSL_1_0 + \
+            self.BASIC_NODE_TEMPLATES_SECTION + """
+imports:
+    -   types.yaml"""
+        result = parse(yaml, resources_base_url='mem:/base/',
+                       resource_loader=resource_loader)
+        self.assertEquals('test_type', result.node_templates[0]['type'])
+
+    def test_missing_import(self):
+        yaml = self.BASIC_VERSION_SECTION_DSL_1_0 + """
+imports:
+    -   mem:/missing.yaml"""
+        ex = self._assert_dsl_parsing_exception_error_code(
+            yaml, 13, DSLParsingLogicException,
+            lambda dsl: parse(dsl,
+                              resource_loader=_MemoryResourceLoader({})))
+        self.assertEquals('mem:/missing.yaml', ex.failed_import)
@@ -0,0 +1,55 @@
+########
+# Copyright (c) 2015 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+from dsl_parser.lru_cache import LRUCache
+from dsl_parser.tests.abstract_test_parser import AbstractTestParser
+
+
+class TestLRUCache(AbstractTestParser):
+
+    def test_least_recently_used_evicted(self):
+        cache = LRUCache(max_size=2)
+        cache.put('a', 'value a', 1)
+        cache.put('b', 'value b', 1)
+        self.assertEquals('value a', cache.get('a'))
+        cache.put('c', 'value c', 1)
+        self.assertEquals(['a', 'c'], cache.keys())
+        self.assertIsNone(cache.get('b'))
+        info = cache.info()
+        self.assertEquals(1, info['hits'])
+        self.assertEquals(1, info['misses'])
+        self.assertEquals(2, info['size'])
+
+    def test_invalid_value_dropped(self):
+        cache = LRUCache(max_size=10)
+        cache.put('a', 1, 1)
+        self.assertIsNone(cache.get('a', is_valid=lambda value: value > 1))
+        self.assertEquals(0, cache.info()['size'])
+        self.assertEquals(1, cache.info()['misses'])
+
+    def test_too_large_value_replaces_previous(self):
+        cache = LRUCache(max_size=2)
+        cache.put('a', 'small', 1)
+        cache.put('a', 'large', 3)
+        self.assertIsNone(cache.get('a'))
+        self.assertEquals(0, cache.info()['size'])
+
+    def test_resize(self):
+        cache = LRUCache(max_size=2)
+        cache.put('a', 'value', 1)
+        cache.resize(0)
+        cache.put('b', 'value', 1)
+        self.assertEquals([], cache.keys())
+        self.assertEquals(0, cache.info()['max_size'])
@@ -0,0 +1,100 @@
+########
+# Copyright (c) 2015 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+import threading
+from multiprocessing import TimeoutError
+from urllib2 import HTTPError
+
+from dsl_parser.parser import parse_from_url_async
+from dsl_parser.tests.abstract_test_parser import AbstractTestParser
+from dsl_parser.tests.http_server import ResourcesHTTPServer
+
+LATENCY = 0.1
+
+
+class TestParseAsync(AbstractTestParser):
+
+    def setUp(self):
+        super(TestParseAsync, self).setUp()
+        self.server = ResourcesHTTPServer(latency=LATENCY).start()
+        self.addCleanup(self.server.stop)
+        self.server.resources['types.yaml'] = self.BASIC_TYPE
+        self.server.resources['plugin.yaml'] = self.BASIC_PLUGIN
+        self.server.resources['blueprint.yaml'] = self._blueprint(
+            self.BASIC_VERSION_SECTION_DSL_1_0)
+        self.server.resources['blueprint_1_1.yaml'] = self._blueprint(
+            self.BASIC_VERSION_SECTION_DSL_1_1)
+
+    def _blueprint(self, version_section):
+        return version_section + self.BASIC_NODE_TEMPLATES_SECTION + """
+imports:
+    -   types.yaml
+    -   plugin.yaml"""
+
+    def _parse(self, path='blueprint.yaml'):
+        return parse_from_url_async(self.server.url(path),
+                                    resources_base_url=self.server.base_url)
+
+    def test_does_not_block(self):
+        # the parse cannot complete while the server holds its requests
+        self.server.released.clear()
+        self.addCleanup(self.server.released.set)
+        future = self._parse()
+        self.assertFalse(future.done())
+        self.server.released.set()
+        plan = future.result(timeout=10)
+        self.assertTrue(future.done())
+        self.assertEquals('test_type', plan['nodes'][0]['type'])
+        self.assertIsNone(future.exception())
+
+    def test_imports_fetched_concurrently(self):
+        self._parse().result(timeout=10)
+        self.assertGreater(self.server.max_concurrent_requests, 1)
+
+    def test_done_callback(self):
+        called = threading.Event()
+        futures = []
+
+        def callback(future):
+            futures.append(future)
+            called.set()
+        future = self._parse()
+        future.add_done_callback(callback)
+        called.wait(10)
+        self.assertEquals([future], futures)
+        self.assertEquals('test_type', futures[0].result()['nodes'][0]['type'])
+        # callbacks added later are called right away
+        future.add_done_callback(callback)
+        self.assertEquals([future, future], futures)
+
+    def test_error(self):
+        future = self._parse('missing.yaml')
+        self.assertIsInstance(future.exception(timeout=10), HTTPError)
+        self.assertRaises(HTTPError, future.result)
+
+    def test_timeout(self):
+        future = self._parse()
+        self.assertRaises(TimeoutError, future.result, 0.01)
+        future.result(timeout=10)
+
+    def test_concurrent_parses(self):
+        futures = [(self._parse(path), version)
+                   for _ in range(3)
+                   for path, version in [('blueprint.yaml', '1_0'),
+                                         ('blueprint_1_1.yaml', '1_1')]]
+        for future, version in futures:
+            plan = future.result(timeout=10)
+            self.assertEquals('cloudify_dsl_{0}'.format(version),
+                              plan['version']['raw'])
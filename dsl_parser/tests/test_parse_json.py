@@ -0,0 +1,145 @@
+########
+# Copyright (c) 2015 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+import copy
+import json
+
+import yaml
+
+from dsl_parser import parser
+from dsl_parser.exceptions import (DSLParsingFormatException,
+                                   DSLParsingLogicException)
+from dsl_parser.parser import (parse, parse_from_dict, parse_from_json,
+                               parse_from_path)
+from dsl_parser.tests.abstract_test_parser import AbstractTestParser
+
+
+class TestParseJson(AbstractTestParser):
+
+    def setUp(self):
+        super(TestParseJson, self).setUp()
+        self.loaded_yamls = []
+        original_load_yaml = parser._load_yaml
+
+        def counting_load_yaml(yaml_stream, error_message):
+            self.loaded_yamls.append(yaml_stream)
+            return original_load_yaml(yaml_stream, error_message)
+        parser._load_yaml = counting_load_yaml
+        self.addCleanup(setattr, parser, '_load_yaml', original_load_yaml)
+
+    def _blueprint(self):
+        return self.BASIC_VERSION_SECTION_DSL_1_0 + \
+            self.BLUEPRINT_WITH_INTERFACES_AND_PLUGINS + u"""
+inputs:
+    greeting:
+        default: "\u05e9\u05dc\u05d5\u05dd"
+outputs:
+    ip:
+        value: { get_attribute: [test_node, ip] }
+""".encode('utf-8')
+
+    def _to_json(self, yaml_string):
+        return json.dumps(yaml.safe_load(yaml_string))
+
+    def test_parse_from_json(self):
+        expected = parse(self._blueprint())
+        del self.loaded_yamls[:]
+        plan = parse_from_json(self._to_json(self._blueprint()))
+        self.assertEquals(expected, plan)
+        self.assertEquals([], self.loaded_yamls)
+        # strings are of the same types as when loaded from yaml
+        self.assertIs(str, type(plan['nodes'][0]['name']))
+        self.assertIs(unicode, type(plan['inputs']['greeting']['default']))
+
+    def test_parse_from_json_normalizes_once(self):
+        normalized_blueprints = []
+        original_normalize_strings = parser._normalize_strings
+
+        def recording_normalize_strings(value):
+            if isinstance(value, dict) and 'node_templates' in value:
+                normalized_blueprints.append(value)
+            return original_normalize_strings(value)
+        parser._normalize_strings = recording_normalize_strings
+        self.addCleanup(setattr, parser, '_normalize_strings',
+                        original_normalize_strings)
+        parse_from_json(self._to_json(self._blueprint()))
+        self.assertEquals(1, len(normalized_blueprints))
+
+    def test_parse_from_dict(self):
+        expected = parse(self._blueprint())
+        parsed_dsl = json.loads(self._to_json(self._blueprint()))
+        original = copy.deepcopy(parsed_dsl)
+        del self.loaded_yamls[:]
+        self.assertEquals(expected, parse_from_dict(parsed_dsl))
+        self.assertEquals([], self.loaded_yamls)
+        self.assertEquals(original, parsed_dsl)
+
+    def test_json_imports(self):
+        plugin_path = self.make_file_with_name(
+            self._to_json(self.BASIC_PLUGIN), 'plugin.json')
+        types_path = self.make_file_with_name(
+            self._to_json(self.BASIC_TYPE), 'types.json')
+        blueprint = self.BASIC_VERSION_SECTION_DSL_1_0 + \
+            self.BASIC_NODE_TEMPLATES_SECTION + """
+imports:
+    -   {0}
+    -   {1}""".format(types_path, plugin_path)
+        blueprint_path = self.make_file_with_name(
+            self._to_json(blueprint), 'blueprint.json')
+        expected = parse(self.BASIC_VERSION_SECTION_DSL_1_0 +
+                         self.BLUEPRINT_WITH_INTERFACES_AND_PLUGINS)
+        del self.loaded_yamls[:]
+        plan = parse_from_path(blueprint_path)
+        self.assertEquals([], self.loaded_yamls)
+        # the imports differ, so the plans only differ in their fingerprints
+        self.assertNotEquals(expected.pop('fingerprint'),
+                             plan.pop('fingerprint'))
+        self.assertEquals(expected, plan)
+
+    def test_yaml_in_json_file(self):
+        blueprint_path = self.make_file_with_name(
+            self.BASIC_VERSION_SECTION_DSL_1_0 +
+            self.BLUEPRINT_WITH_INTERFACES_AND_PLUGINS, 'blueprint.json')
+        plan = parse_from_path(blueprint_path)
+        self.assertEquals('test_node', plan['nodes'][0]['name'])
+
+    def test_illegal_json(self):
+        ex = self.assertRaises(DSLParsingFormatException, parse_from_json,
+                               '{"tosca_definitions_version": ')
+        self.assertEquals(-1, ex.err_code)
+        self.assertIn('Illegal json', str(ex))
+
+    def test_error_codes(self):
+        def assert_same_error(exception_type, yaml_string):
+            expected = self.assertRaises(exception_type, parse, yaml_string)
+            ex = self.assertRaises(exception_type, parse_from_json,
+                                   self._to_json(yaml_string))
+            self.assertEquals(expected.err_code, ex.err_code)
+            self.assertEquals(str(expected), str(ex))
+        assert_same_error(DSLParsingLogicException,
+                          self.BLUEPRINT_WITH_INTERFACES_AND_PLUGINS)
+        assert_same_error(DSLParsingLogicException,
+                          self.BASIC_VERSION_SECTION_DSL_1_0 +
+                          self.BASIC_NODE_TEMPLATES_SECTION)
+        assert_same_error(DSLParsingFormatException,
+                          self.BASIC_VERSION_SECTION_DSL_1_0 + """
+node_templates:
+    test_node:
+        properties: {}""")
+        assert_same_error(DSLParsingLogicException,
+                          self.BASIC_VERSION_SECTION_DSL_1_0 +
+                          self.BASIC_NODE_TEMPLATES_SECTION + """
+imports:
+    -   missing.json""")
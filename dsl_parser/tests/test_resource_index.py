@@ -0,0 +1,187 @@
+########
+# Copyright (c) 2015 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+import os
+from urllib import pathname2url
+
+from dsl_parser import resource_index
+from dsl_parser.loader import DefaultResourceLoader
+from dsl_parser.parser import parse_from_path, parse_from_url
+from dsl_parser.resource_index import ResourceIndex
+from dsl_parser.tests.abstract_test_parser import AbstractTestParser
+from dsl_parser.tests.http_server import ResourcesHTTPServer
+
+SCRIPTS_COUNT = 20
+
+
+class _CountingResourceLoader(DefaultResourceLoader):
+
+    def __init__(self):
+        super(_CountingResourceLoader, self).__init__()
+        self.checked_urls = []
+
+    def exists(self, url, timeout=None):
+        self.checked_urls.append(url)
+        return super(_CountingResourceLoader, self).exists(url, timeout)
+
+
+class TestResourceIndex(AbstractTestParser):
+
+    def setUp(self):
+        super(TestResourceIndex, self).setUp()
+        self.listed_directories = []
+        original_listdir = os.listdir
+
+        def counting_listdir(path):
+            self.listed_directories.append(path)
+            return original_listdir(path)
+        resource_index.os.listdir = counting_listdir
+        self.addCleanup(setattr, resource_index.os, 'listdir',
+                        original_listdir)
+        self.loader = _CountingResourceLoader()
+        self.addCleanup(self.loader.close)
+
+    def _base_url(self):
+        return 'file:{0}'.format(pathname2url(self._temp_dir))
+
+    def test_local_files(self):
+        os.mkdir(os.path.join(self._temp_dir, 'scripts'))
+        self.make_file_with_name('content', 'scripts/a.sh')
+        self.make_file_with_name('content', 'scripts/b.sh')
+        index = ResourceIndex(self.loader)
+        base_url = self._base_url()
+        self.assertTrue(index.exists(base_url + '/scripts/a.sh'))
+        self.assertTrue(index.exists(base_url + '/scripts/b.sh'))
+        self.assertTrue(index.exists(base_url + '/scripts/../scripts/b.sh'))
+        self.assertFalse(index.exists(base_url + '/scripts/c.sh'))
+        # directories are not resources
+        self.assertFalse(index.exists(base_url + '/scripts'))
+        self.assertFalse(index.exists(base_url + '/missing/a.sh'))
+        self.assertEquals(
+            sorted([os.path.join(self._temp_dir, 'scripts'),
+                    self._temp_dir,
+                    os.path.join(self._temp_dir, 'missing')]),
+            sorted(self.listed_directories))
+        self.assertEquals([], self.loader.checked_urls)
+
+    def test_remote_checks_memoized(self):
+        server = ResourcesHTTPServer({'a.sh': 'content'}).start()
+        self.addCleanup(server.stop)
+        index = ResourceIndex(self.loader)
+        for _ in range(3):
+            self.assertTrue(index.exists(server.url('a.sh')))
+            self.assertFalse(index.exists(server.url('b.sh')))
+        self.assertEquals([server.url('a.sh'), server.url('b.sh')],
+                          self.loader.checked_urls)
+
+    def test_prefetch(self):
+        server = ResourcesHTTPServer(latency=0.1).start()
+        self.addCleanup(server.stop)
+        for i in range(SCRIPTS_COUNT):
+            server.resources['{0}.sh'.format(i)] = 'content'
+        urls = [server.url('{0}.sh'.format(i)) for i in range(SCRIPTS_COUNT)]
+        index = ResourceIndex(self.loader)
+        index.prefetch(urls + [server.url('missing.sh')])
+        self.assertGreater(server.max_concurrent_requests, 1)
+        checked = len(self.loader.checked_urls)
+        for url in urls:
+            self.assertTrue(index.exists(url))
+        self.assertFalse(index.exists(server.url('missing.sh')))
+        self.assertEquals(checked, len(self.loader.checked_urls))
+
+
+class TestScriptMappingsExistence(AbstractTestParser):
+
+    def _blueprint(self):
+        node_templates = ''.join("""
+    node{0}:
+        type: type
+        interfaces:
+            test:
+                op: scripts/{0}.sh""".format(i) for i in range(SCRIPTS_COUNT))
+        return self.BASIC_VERSION_SECTION_DSL_1_0 + """
+plugins:
+    script:
+        executor: central_deployment_agent
+        install: false
+node_types:
+    type:
+        interfaces:
+            test:
+                shared: scripts/shared.sh
+workflows:
+    workflow: scripts/workflow.sh
+node_templates:""" + node_templates
+
+    def _script_names(self):
+        return ['scripts/{0}.sh'.format(i) for i in range(SCRIPTS_COUNT)] + \
+            ['scripts/shared.sh', 'scripts/workflow.sh']
+
+    def _assert_script_mappings(self, plan):
+        for node in plan['nodes']:
+            self.assertEquals(
+                'scripts/{0}.sh'.format(node['name'][len('node'):]),
+                node['operations']['test.op']['inputs']['script_path'])
+            self.assertEquals(
+                'scripts/shared.sh',
+                node['operations']['test.shared']['inputs']['script_path'])
+
+    def test_local_blueprint(self):
+        os.mkdir(os.path.join(self._temp_dir, 'scripts'))
+        for script_name in self._script_names():
+            self.make_file_with_name('content', script_name)
+        blueprint_path = self.make_file_with_name(self._blueprint(),
+                                                  'blueprint.yaml')
+        resource_loader = _CountingResourceLoader()
+        plan = parse_from_path(blueprint_path,
+                               resource_loader=resource_loader)
+        self._assert_script_mappings(plan)
+        self.assertEquals([], resource_loader.checked_urls)
+
+    def _assert_remote_blueprint(self, streaming):
+        server = ResourcesHTTPServer(latency=0.01).start()
+        self.addCleanup(server.stop)
+        for script_name in self._script_names():
+            server.resources[script_name] = 'content'
+        server.resources['blueprint.yaml'] = self._blueprint()
+        resource_loader = DefaultResourceLoader()
+        self.addCleanup(resource_loader.close)
+        prefetched_urls = set()
+        original_prefetch = ResourceIndex.prefetch
+
+        def recording_prefetch(index, urls):
+            urls = list(urls)
+            prefetched_urls.update(urls)
+            return original_prefetch(index, urls)
+        ResourceIndex.prefetch = recording_prefetch
+        self.addCleanup(setattr, ResourceIndex, 'prefetch', original_prefetch)
+        plan = parse_from_url(server.url('blueprint.yaml'),
+                              resource_loader=resource_loader,
+                              streaming=streaming)
+        self._assert_script_mappings(plan)
+        # every script is checked once, concurrently
+        self.assertEquals(set(server.url(script_name) for script_name
+                              in self._script_names()), prefetched_urls)
+        for script_name in self._script_names():
+            self.assertEquals(1, len(server.requests_for(script_name)))
+        self.assertGreater(server.max_concurrent_requests, 1)
+
+    def test_remote_blueprint(self):
+        self._assert_remote_blueprint(streaming=False)
+
+    def test_remote_blueprint_streaming(self):
+        # the scripts of streamed node templates are checked as they are
+        # loaded, rather than with those of the rest of the blueprint
+        self._assert_remote_blueprint(streaming=True)
@@ -0,0 +1,291 @@
+########
+# Copyright (c) 2015 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+import copy
+import random
+
+import testtools
+import yaml
+from jsonschema import Draft3Validator, Draft4Validator
+
+from dsl_parser import schemas
+from dsl_parser.schema_compiler import CompiledValidator, compile_schema
+
+FUZZ_SEED = 20150601
+FUZZ_ITERATIONS = 1000
+
+BLUEPRINT = """
+tosca_definitions_version: cloudify_dsl_1_1
+inputs:
+    port:
+        description: the port
+        default: 8080
+    name: {}
+plugins:
+    script:
+        executor: central_deployment_agent
+        source: dummy
+        install: false
+    agent_plugin:
+        executor: host_agent
+        source: dummy
+        install_arguments: --pre
+node_types:
+    cloudify.nodes.Compute:
+        properties:
+            ip:
+                type: string
+                default: ''
+    test_type:
+        derived_from: cloudify.nodes.Compute
+        properties:
+            key:
+                description: a key
+                type: string
+                default: value
+            count:
+                type: integer
+        interfaces:
+            lifecycle:
+                create: script.create
+                start:
+                    implementation: script.start
+                    inputs:
+                        port:
+                            default: 80
+                    executor: central_deployment_agent
+                    max_retries: 3
+                    retry_interval: 1.5
+relationships:
+    test_relationship:
+        derived_from: cloudify.relationships.depends_on
+        properties:
+            prop:
+                default: 1
+        source_interfaces:
+            test:
+                op: script.op
+        target_interfaces:
+            test:
+                op:
+                    implementation: script.op
+type_implementations:
+    impl:
+        type: test_type
+        node_ref: node1
+        properties:
+            key: other
+relationship_implementations:
+    rel_impl:
+        type: test_relationship
+        source_node_ref: node1
+        target_node_ref: node2
+node_templates:
+    node1:
+        type: test_type
+        properties:
+            key: { get_input: name }
+            count: 1
+        instances:
+            deploy: 2
+        interfaces:
+            lifecycle:
+                create: script.create
+                configure:
+                    implementation: script.configure
+                    inputs:
+                        a: [1, 2]
+        relationships:
+            -   type: test_relationship
+                target: node2
+                properties:
+                    prop: 2
+                source_interfaces:
+                    test:
+                        op: script.other
+    node2:
+        type: cloudify.nodes.Compute
+workflows:
+    install: script.install
+    custom:
+        mapping: script.custom
+        parameters:
+            param:
+                default: true
+policy_types:
+    policy:
+        source: policies/policy.clj
+        properties:
+            threshold:
+                default: 10
+policy_triggers:
+    trigger:
+        source: triggers/trigger.clj
+        parameters:
+            url: {}
+groups:
+    group:
+        members: [node1, node2]
+        policies:
+            policy:
+                type: policy
+                properties:
+                    threshold: 5
+                triggers:
+                    trigger:
+                        type: trigger
+                        parameters:
+                            url: http://localhost
+outputs:
+    ip:
+        description: the ip
+        value: { get_attribute: [node2, ip] }
+    port:
+        value: 8080
+"""
+
+RANDOM_VALUES = [None, True, False, 0, 1, -1.5, 'string', u'unicode', '',
+                 [], ['a', 'a'], [1, 'b'], {}, {'key': 'value'},
+                 {'type': 'string'}, {'implementation': 'script.op'},
+                 {'default': None}]
+RANDOM_KEYS = ['type', 'properties', 'interfaces', 'default', 'mapping',
+               'implementation', 'inputs', 'unknown', 'members', 'value',
+               'derived_from', 'target', 'source', 'executor', 'deploy']
+
+
+def _containers(value, path=()):
+    """every dict and list in value, along with its path"""
+    if isinstance(value, (dict, list)):
+        yield path, value
+        items = value.iteritems() if isinstance(value, dict) \
+            else enumerate(value)
+        for key, item in items:
+            for container in _containers(item, path + (key,)):
+                yield container
+
+
+def _mutate(document, rnd):
+    path, container = rnd.choice(list(_containers(document)))
+    value = copy.deepcopy(rnd.choice(RANDOM_VALUES))
+    mutation = rnd.randint(0, 3)
+    if isinstance(container, dict):
+        if container and mutation == 0:
+            del container[rnd.choice(container.keys())]
+        elif container and mutation == 1:
+            container[rnd.choice(container.keys())] = value
+        elif mutation == 2:
+            container[rnd.choice(RANDOM_KEYS)] = value
+        elif path:
+            _replace(document, path, value)
+    else:
+        if container and mutation == 0:
+            del container[rnd.randrange(len(container))]
+        elif container and mutation == 1:
+            container[rnd.randrange(len(container))] = value
+        elif mutation == 2:
+            container.append(value)
+        elif path:
+            _replace(document, path, value)
+
+
+def _replace(document, path, value):
+    for key in path[:-1]:
+        document = document[key]
+    document[path[-1]] = value
+
+
+def _first_error(validator, instance):
+    try:
+        validator.validate(instance)
+    except Exception, ex:
+        return type(ex), getattr(ex, 'message', str(ex)), \
+            list(getattr(ex, 'path', []))
+    return None
+
+
+class TestSchemaCompiler(testtools.TestCase):
+
+    def _assert_same_errors(self, schema, instances):
+        generic = Draft4Validator(schema)
+        compiled = compile_schema(schema)
+        errors = 0
+        for instance in instances:
+            expected = _first_error(generic, instance)
+            self.assertEquals(expected, _first_error(compiled, instance),
+                              'different errors for {0!r}'.format(instance))
+            if expected is not None:
+                errors += 1
+        return errors
+
+    def test_valid_blueprint(self):
+        self.assertEquals(
+            0, self._assert_same_errors(schemas.DSL_SCHEMA,
+                                        [yaml.safe_load(BLUEPRINT)]))
+
+    def test_fuzzed_blueprints(self):
+        rnd = random.Random(FUZZ_SEED)
+        blueprint = yaml.safe_load(BLUEPRINT)
+
+        def fuzzed_blueprints():
+            for _ in range(FUZZ_ITERATIONS):
+                document = copy.deepcopy(blueprint)
+                for _ in range(rnd.randint(1, 3)):
+                    _mutate(document, rnd)
+                yield document
+        errors = self._assert_same_errors(schemas.DSL_SCHEMA,
+                                          fuzzed_blueprints())
+        # the corpus exercises both valid and invalid blueprints
+        self.assertGreater(errors, FUZZ_ITERATIONS / 2)
+        self.assertLess(errors, FUZZ_ITERATIONS)
+
+    def test_fuzzed_imports(self):
+        rnd = random.Random(FUZZ_SEED)
+        instances = [[rnd.choice(RANDOM_VALUES + ['a.yaml', 'b.yaml'])
+                      for _ in range(rnd.randint(0, 3))]
+                     for _ in range(500)] + RANDOM_VALUES
+        self._assert_same_errors(schemas.IMPORTS_SCHEMA, instances)
+
+    def test_keywords_without_specialization(self):
+        schema = {
+            'type': 'object',
+            'properties': {
+                'name': {'type': 'string', 'pattern': '^[a-z]+$',
+                         'maxLength': 5},
+                'list': {'type': 'array', 'items': [{'type': 'integer'}],
+                         'additionalItems': False},
+                'number': {'not': {'type': 'integer'}, 'maximum': 10},
+                'ref': {'$ref': '#/properties/name'}
+            },
+            'additionalProperties': {'type': 'integer'},
+            'dependencies': {'list': ['number']}
+        }
+        instances = [{'name': 'abc'}, {'name': 'ABC'}, {'name': 'abcdefg'},
+                     {'list': [1]}, {'list': [1, 2], 'number': 1.5},
+                     {'list': ['a']}, {'list': [1], 'number': 2.5},
+                     {'number': 1}, {'number': 11.5}, {'ref': 'abc'},
+                     {'ref': 1}, {'extra': 1}, {'extra': 'a'}, {'extra': True}]
+        self.assertEquals(10, self._assert_same_errors(schema, instances))
+
+    def test_one_of(self):
+        schema = {'oneOf': [{'type': 'string'}, {'type': 'integer'},
+                            {'enum': [1, 'a']}]}
+        self.assertEquals(
+            3, self._assert_same_errors(schema, ['b', 2, 'a', 1, None]))
+
+    def test_other_drafts_not_compiled(self):
+        schema = {'type': 'object'}
+        self.assertIsInstance(compile_schema(schema), CompiledValidator)
+        self.assertIsInstance(compile_schema(schema, Draft3Validator),
+                              Draft3Validator)
@@ -0,0 +1,149 @@
+########
+# Copyright (c) 2015 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+import threading
+
+from dsl_parser import parser
+from dsl_parser.exceptions import DSLParsingFormatException
+from dsl_parser.tests.abstract_test_parser import AbstractTestParser
+
+
+class TestSchemaValidators(AbstractTestParser):
+
+    def setUp(self):
+        super(TestSchemaValidators, self).setUp()
+        self.built_validators = []
+        original_validator_for = parser.validator_for
+
+        def counting_validator_for(schema):
+            self.built_validators.append(schema)
+            return original_validator_for(schema)
+        parser.validator_for = counting_validator_for
+        self.addCleanup(setattr, parser, 'validator_for',
+                        original_validator_for)
+        self.addCleanup(setattr, parser, '_schema_validators',
+                        parser._schema_validators)
+        parser._schema_validators = parser._SchemaValidators()
+
+    def _parse_with_import(self):
+        self.parse(self.BASIC_NODE_TEMPLATES_SECTION +
+                   self.create_yaml_with_imports(
+                       [self.BASIC_TYPE, self.BASIC_PLUGIN]))
+
+    def test_validators_reused(self):
+        for _ in range(3):
+            self._parse_with_import()
+        self.assertGreater(len(self.built_validators), 0)
+        self.assertEquals(len(set(id(schema) for schema
+                                  in self.built_validators)),
+                          len(self.built_validators))
+
+    def test_validator_per_thread(self):
+        self._parse_with_import()
+        built_validators = len(self.built_validators)
+        thread = threading.Thread(target=self._parse_with_import)
+        thread.start()
+        thread.join()
+        self.assertEquals(2 * built_validators, len(self.built_validators))
+
+    def test_errors_unchanged(self):
+        for _ in range(2):
+            ex = self.assertRaises(DSLParsingFormatException, self.parse,
+                                   self.BASIC_TYPE + """
+node_templates:
+    test_node:
+        properties: {}""")
+            self.assertEquals(1, ex.err_code)
+            self.assertIn("'type' is a required property", str(ex))
+            ex = self.assertRaises(DSLParsingFormatException, self.parse,
+                                   self.BASIC_NODE_TEMPLATES_SECTION + """
+imports:
+    -   [not, a, string]""")
+            self.assertEquals(2, ex.err_code)
+
+
+class _RecordingSchemaValidators(parser._SchemaValidators):
+
+    def __init__(self):
+        super(_RecordingSchemaValidators, self).__init__()
+        self.used = []
+
+    def get(self, schema_name):
+        self.used.append(schema_name)
+        return super(_RecordingSchemaValidators, self).get(schema_name)
+
+
+class TestImportsValidation(AbstractTestParser):
+
+    def setUp(self):
+        super(TestImportsValidation, self).setUp()
+        self.addCleanup(setattr, parser, '_schema_validators',
+                        parser._schema_validators)
+        self.validators = _RecordingSchemaValidators()
+        parser._schema_validators = self.validators
+        parser._schema_valid_imports.clear()
+        self.addCleanup(parser._schema_valid_imports.clear)
+
+    def _parse_with_imports(self, blueprint, imports):
+        return self.parse(blueprint + self.create_yaml_with_imports(imports))
+
+    def test_imports_validated_once(self):
+        blueprint = self.BASIC_NODE_TEMPLATES_SECTION + \
+            self.create_yaml_with_imports([self.BASIC_TYPE,
+                                           self.BASIC_PLUGIN])
+        self.parse(blueprint)
+        self.assertEquals(3, self.validators.used.count('DOCUMENT_SCHEMA'))
+        self.assertNotIn('DSL_SCHEMA', self.validators.used)
+        del self.validators.used[:]
+        plan = self.parse(blueprint)
+        # only the blueprint itself is validated again
+        self.assertEquals(['IMPORTS_SCHEMA', 'DOCUMENT_SCHEMA',
+                           'COMBINED_SECTIONS_SCHEMA'], self.validators.used)
+        self.assertEquals('test_type', plan['nodes'][0]['type'])
+
+    def test_node_templates_imported(self):
+        plan = self._parse_with_imports('', [
+            self.BASIC_NODE_TEMPLATES_SECTION, self.BASIC_TYPE,
+            self.BASIC_PLUGIN])
+        self.assertEquals('test_node', plan['nodes'][0]['name'])
+        self.assertNotIn('DSL_SCHEMA', self.validators.used)
+
+    def test_invalid_import(self):
+        ex = self.assertRaises(
+            DSLParsingFormatException, self._parse_with_imports,
+            self.BASIC_NODE_TEMPLATES_SECTION, [self.BASIC_TYPE + """
+        derived_from: [not, a, string]""", self.BASIC_PLUGIN])
+        self.assertEquals(1, ex.err_code)
+        self.assertIn('Path to error: node_types.test_type.derived_from',
+                      str(ex))
+
+    def test_invalid_blueprint_with_valid_imports(self):
+        ex = self.assertRaises(
+            DSLParsingFormatException, self._parse_with_imports, """
+node_templates:
+    test_node:
+        type: test_type
+        instances: {}""", [self.BASIC_TYPE, self.BASIC_PLUGIN])
+        self.assertEquals(1, ex.err_code)
+        self.assertIn("'deploy' is a required property", str(ex))
+        self.assertIn('Path to error: node_templates.test_node.instances',
+                      str(ex))
+
+    def test_missing_node_templates(self):
+        ex = self.assertRaises(DSLParsingFormatException,
+                               self._parse_with_imports, '',
+                               [self.BASIC_TYPE, self.BASIC_PLUGIN])
+        self.assertEquals(1, ex.err_code)
+        self.assertIn("'node_templates' is a required property", str(ex))
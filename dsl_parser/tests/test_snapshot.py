@@ -0,0 +1,176 @@
+########
+# Copyright (c) 2015 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+import os
+import cPickle
+import datetime
+
+from dsl_parser import document_cache
+from dsl_parser import parser
+from dsl_parser.exceptions import (DSLParsingFormatException,
+                                   DSLParsingLogicException)
+from dsl_parser.parser import compile_snapshot, parse
+from dsl_parser.snapshot import FORMAT_VERSION, Snapshot
+from dsl_parser.tests.abstract_test_parser import AbstractTestParser
+
+
+class TestSnapshot(AbstractTestParser):
+
+    def setUp(self):
+        super(TestSnapshot, self).setUp()
+        document_cache.clear()
+        self.addCleanup(document_cache.clear)
+        self.plugin_url = self.make_yaml_file(self.BASIC_PLUGIN, as_uri=True)
+        self.types_url = self.make_yaml_file(self.BASIC_TYPE + """
+imports:
+    -   {0}""".format(self.plugin_url), as_uri=True)
+        self.yaml = self.BASIC_VERSION_SECTION_DSL_1_0 + \
+            self.BASIC_NODE_TEMPLATES_SECTION + """
+imports:
+    -   {0}""".format(self.types_url)
+        self.loaded_yamls = []
+        original_load_yaml = parser._load_yaml
+
+        def counting_load_yaml(yaml_stream, error_message):
+            self.loaded_yamls.append(yaml_stream)
+            return original_load_yaml(yaml_stream, error_message)
+        parser._load_yaml = counting_load_yaml
+        self.addCleanup(setattr, parser, '_load_yaml', original_load_yaml)
+
+    def _compile_and_save(self):
+        snapshot_path = os.path.join(self._temp_dir, 'types.snapshot')
+        compile_snapshot([self.types_url]).save(snapshot_path)
+        return Snapshot.load(snapshot_path)
+
+    def test_compile(self):
+        snapshot = self._compile_and_save()
+        self.assertEquals(sorted([self.types_url, self.plugin_url]),
+                          snapshot.urls)
+        self.assertIn(self.types_url, snapshot)
+        self.assertEquals(2, len(snapshot))
+        with open(self.plugin_url[len('file:'):]) as f:
+            document = snapshot.document(self.plugin_url, f.read())
+        self.assertIn('test_plugin', document['plugins'])
+
+    def test_parse_with_snapshot(self):
+        snapshot = self._compile_and_save()
+        expected = parse(self.yaml)
+        del self.loaded_yamls[:]
+        document_cache.clear()
+        plan = parse(self.yaml, snapshot=snapshot)
+        self.assertEquals(expected, plan)
+        # only the blueprint itself was loaded
+        self.assertEquals([self.yaml], self.loaded_yamls)
+
+    def test_snapshot_documents_not_modified_by_parse(self):
+        snapshot = self._compile_and_save()
+        first = parse(self.yaml, snapshot=snapshot)
+        second = parse(self.yaml, snapshot=snapshot)
+        self.assertEquals(first, second)
+
+    def test_changed_import_loaded(self):
+        snapshot = self._compile_and_save()
+        changed_plugin = self.BASIC_PLUGIN.replace('dummy', 'changed')
+        with open(self.plugin_url[len('file:'):], 'w') as f:
+            f.write(changed_plugin)
+        del self.loaded_yamls[:]
+        plan = parse(self.yaml, snapshot=snapshot)
+        self.assertEquals([self.yaml, changed_plugin], self.loaded_yamls)
+        self.assertEquals('changed',
+                          plan['nodes'][0]['plugins'][0]['source'])
+
+    def test_invalid_imports(self):
+        ex = self.assertRaises(DSLParsingFormatException, compile_snapshot,
+                               [{'not': 'a string'}])
+        self.assertEquals(2, ex.err_code)
+
+    def test_missing_import(self):
+        ex = self.assertRaises(DSLParsingLogicException, compile_snapshot,
+                               ['file:/missing/types.yaml'])
+        self.assertEquals(13, ex.err_code)
+
+    def test_invalid_snapshot(self):
+        snapshot_path = self.make_file_with_name('not a snapshot',
+                                                 'types.snapshot')
+        ex = self.assertRaises(DSLParsingFormatException, Snapshot.load,
+                               snapshot_path)
+        self.assertEquals(34, ex.err_code)
+
+    def test_pickled_snapshot(self):
+        snapshot_path = self.make_file_with_name(
+            'cloudify-dsl-parser-snapshot {0}\n'.format(FORMAT_VERSION) +
+            cPickle.dumps(_Unpickled(), cPickle.HIGHEST_PROTOCOL),
+            'types.snapshot')
+        ex = self.assertRaises(DSLParsingFormatException, Snapshot.load,
+                               snapshot_path)
+        self.assertEquals(34, ex.err_code)
+        self.assertFalse(_Unpickled.unpickled)
+
+    def test_documents_saved_without_loss(self):
+        document = {'str': 'value', 'unicode': u'\u05d0', 1: [1.5, True,
+                                                              None, 10 ** 20],
+                    'dates': [datetime.date(2015, 1, 2),
+                              datetime.datetime(2015, 1, 2, 3, 4, 5, 6)],
+                    'set': set(['a', 'b']), 'bytes': '\xff\x00',
+                    'nested': {'!': 'tag key', 'empty': {}}}
+        snapshot = Snapshot()
+        snapshot.add('url', 'content', document)
+        snapshot_path = os.path.join(self._temp_dir, 'types.snapshot')
+        snapshot.save(snapshot_path)
+        snapshot = Snapshot.load(snapshot_path)
+        loaded = snapshot.document('url', 'content')
+        self.assertEquals(document, loaded)
+        self.assertIs(str, type(loaded['str']))
+        self.assertIs(unicode, type(loaded['unicode']))
+        self.assertIs(str, type(loaded['nested'].keys()[0]))
+
+    def test_unsupported_document_left_out(self):
+        snapshot = Snapshot()
+        snapshot.add('url', 'content', {'tuple': (1, 2)})
+        # loaded by parse calls as usual
+        self.assertNotIn('url', snapshot)
+
+    def test_malformed_snapshot(self):
+        snapshot_path = self.make_file_with_name(
+            'cloudify-dsl-parser-snapshot {0}\n'.format(FORMAT_VERSION) +
+            '{"url": ["hash", {"!": "unknown"}]}', 'types.snapshot')
+        ex = self.assertRaises(DSLParsingFormatException, Snapshot.load,
+                               snapshot_path)
+        self.assertEquals(34, ex.err_code)
+
+    def test_other_format_version(self):
+        snapshot_path = os.path.join(self._temp_dir, 'types.snapshot')
+        compile_snapshot([self.types_url]).save(snapshot_path)
+        with open(snapshot_path, 'rb') as f:
+            content = f.read()
+        with open(snapshot_path, 'wb') as f:
+            f.write(content.replace(' {0}\n'.format(FORMAT_VERSION),
+                                    ' 0\n', 1))
+        ex = self.assertRaises(DSLParsingFormatException, Snapshot.load,
+                               snapshot_path)
+        self.assertEquals(34, ex.err_code)
+        self.assertIn('compiled again', str(ex))
+
+
+class _Unpickled(object):
+
+    unpickled = False
+
+    def __reduce__(self):
+        return _unpickle, ()
+
+
+def _unpickle():
+    _Unpickled.unpickled = True
@@ -0,0 +1,157 @@
+########
+# Copyright (c) 2015 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+import os
+import time
+
+from dsl_parser.exceptions import DSLParsingTimeoutException
+from dsl_parser.loader import (DefaultResourceLoader,
+                               DeadlineResourceLoader,
+                               ResourceTimeout)
+from dsl_parser.parser import parse, parse_from_url
+from dsl_parser.tests.abstract_test_parser import AbstractTestParser
+from dsl_parser.tests.http_server import ResourcesHTTPServer
+
+# the latency of slow resources, far above the timeouts used, so that
+# timing out is told apart from loading them even on a loaded machine
+SLOW = 10
+
+
+class TestTimeouts(AbstractTestParser):
+
+    def setUp(self):
+        super(TestTimeouts, self).setUp()
+        self.server = ResourcesHTTPServer().start()
+        self.addCleanup(self.server.stop)
+        self.server.resources['types.yaml'] = self.BASIC_TYPE
+        self.server.resources['plugin.yaml'] = self.BASIC_PLUGIN
+        self.loader = DefaultResourceLoader(timeout=0.2)
+        self.addCleanup(self.loader.close)
+
+    def _blueprint(self, *imports):
+        return self.BASIC_VERSION_SECTION_DSL_1_0 + \
+            self.BASIC_NODE_TEMPLATES_SECTION + """
+imports:""" + ''.join("""
+    -   {0}""".format(self.server.url(i)) for i in imports)
+
+    def _set_environ(self, name, value):
+        if name in os.environ:
+            self.addCleanup(os.environ.__setitem__, name, os.environ[name])
+        else:
+            self.addCleanup(os.environ.pop, name, None)
+        os.environ[name] = value
+
+    def _assert_timeout(self, failed_path, parse_function, *args, **kwargs):
+        started = time.time()
+        ex = self.assertRaises(DSLParsingTimeoutException, parse_function,
+                               *args, **kwargs)
+        self.assertLess(time.time() - started, SLOW)
+        self.assertEquals(33, ex.err_code)
+        self.assertEquals(self.server.url(failed_path), ex.failed_import)
+        return ex
+
+    def test_loader_timeout(self):
+        self.server.latencies['types.yaml'] = SLOW
+        self._assert_timeout('types.yaml', parse,
+                             self._blueprint('types.yaml', 'plugin.yaml'),
+                             resource_loader=self.loader)
+
+    def test_loader_timeout_concurrent_imports(self):
+        self.server.latencies['plugin.yaml'] = SLOW
+        self._assert_timeout('plugin.yaml', parse,
+                             self._blueprint('types.yaml', 'plugin.yaml'),
+                             resource_loader=self.loader,
+                             max_import_workers=2)
+
+    def test_parse_timeout(self):
+        self.server.latency = 0.3
+        for i in range(5):
+            self.server.resources['{0}.yaml'.format(i)] = ''
+        imports = ['{0}.yaml'.format(i) for i in range(5)]
+        started = time.time()
+        ex = self.assertRaises(DSLParsingTimeoutException, parse,
+                               self._blueprint('types.yaml', 'plugin.yaml',
+                                               *imports),
+                               timeout=0.5)
+        # every import loads within the timeout, all of them together do not
+        self.assertLess(time.time() - started, SLOW)
+        self.assertEquals(33, ex.err_code)
+        self.assertIn(ex.failed_import,
+                      [self.server.url(i)
+                       for i in ['types.yaml', 'plugin.yaml'] + imports])
+
+    def test_parse_timeout_trickling_import(self):
+        # every read gets a byte in time, the whole import does not
+        self.server.drips['types.yaml'] = 0.1
+        self._assert_timeout('types.yaml', parse,
+                             self._blueprint('types.yaml', 'plugin.yaml'),
+                             timeout=0.5)
+
+    def test_parse_timeout_trickling_proxied_import(self):
+        # proxied urls are loaded through urllib2, rather than pooled
+        self.server.drips['types.yaml'] = 0.1
+        self._set_environ('http_proxy', self.server.base_url)
+        self._set_environ('no_proxy', '')
+        self._assert_timeout('types.yaml', parse,
+                             self._blueprint('types.yaml', 'plugin.yaml'),
+                             timeout=0.5)
+        self.assertTrue(self.server.requests_for('types.yaml'))
+
+    def test_parse_within_timeout(self):
+        plan = parse(self._blueprint('types.yaml', 'plugin.yaml'),
+                     timeout=10)
+        self.assertEquals('test_type', plan['nodes'][0]['type'])
+
+    def test_blueprint_timeout(self):
+        self.server.resources['blueprint.yaml'] = self._blueprint(
+            'types.yaml', 'plugin.yaml')
+        self.server.latencies['blueprint.yaml'] = SLOW
+        self._assert_timeout('blueprint.yaml', parse_from_url,
+                             self.server.url('blueprint.yaml'), timeout=0.2)
+
+    def test_script_timeout(self):
+        self.server.resources['blueprint.yaml'] = self._blueprint(
+            'script.yaml', 'plugin.yaml')
+        self.server.resources['script.yaml'] = """
+plugins:
+    script:
+        executor: central_deployment_agent
+        install: false
+node_types:
+    test_type:
+        properties:
+            key: {}
+        interfaces:
+            test:
+                op1: script1.sh
+                op2: script2.sh
+"""
+        self.server.resources['script1.sh'] = ''
+        self.server.resources['script2.sh'] = ''
+        self.server.latencies['script2.sh'] = SLOW
+        self._assert_timeout('script2.sh', parse_from_url,
+                             self.server.url('blueprint.yaml'),
+                             resource_loader=self.loader)
+
+    def test_deadline_loader(self):
+        deadline_loader = DeadlineResourceLoader(self.loader, 0.1)
+        self.assertEquals(self.BASIC_TYPE,
+                          deadline_loader.load(self.server.url('types.yaml')))
+        time.sleep(0.2)
+        self.assertRaises(ResourceTimeout, deadline_loader.load,
+                          self.server.url('types.yaml'))
+        self.assertRaises(ResourceTimeout, deadline_loader.exists,
+                          self.server.url('types.yaml'))
+        self.assertEquals(1, len(self.server.requests))
@@ -0,0 +1,128 @@
+########
+# Copyright (c) 2015 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+import os
+
+from dsl_parser import functions
+from dsl_parser import parser
+from dsl_parser import resource_index
+from dsl_parser.exceptions import DSLParsingFormatException
+from dsl_parser.parser import parse, parse_from_path
+from dsl_parser.tests.abstract_test_parser import AbstractTestParser
+
+
+class TestTrustedFingerprint(AbstractTestParser):
+
+    def setUp(self):
+        super(TestTrustedFingerprint, self).setUp()
+        self.checks = []
+
+        def record(name, original):
+            def recording(*args, **kwargs):
+                self.checks.append(name)
+                return original(*args, **kwargs)
+            return recording
+        for module, name in [(parser, '_validate_dsl_schema'),
+                             (parser, '_schema_valid'),
+                             (functions, 'validate_functions'),
+                             (resource_index.ResourceIndex, 'exists'),
+                             (resource_index.ResourceIndex, 'prefetch')]:
+            original = getattr(module, name)
+            if isinstance(module, type):
+                original = original.im_func
+            setattr(module, name, record(name, original))
+            self.addCleanup(setattr, module, name, original)
+
+    def _blueprint_path(self):
+        os.mkdir(os.path.join(self._temp_dir, 'scripts'))
+        self.make_file_with_name('content', 'scripts/create.sh')
+        types_path = self.make_file_with_name(self.BASIC_TYPE, 'types.yaml')
+        plugin_path = self.make_file_with_name(self.BASIC_PLUGIN,
+                                               'plugin.yaml')
+        return self.make_file_with_name(
+            self.BASIC_VERSION_SECTION_DSL_1_0 + """
+imports:
+    -   {0}
+    -   {1}
+plugins:
+    script:
+        executor: central_deployment_agent
+        install: false
+inputs:
+    port:
+        default: 8080
+node_templates:
+    test_node:
+        type: test_type
+        properties:
+            key: {{ get_input: port }}
+        interfaces:
+            scripts:
+                create: scripts/create.sh
+    other_node:
+        type: test_type
+        properties:
+            key: {{ get_property: [test_node, key] }}
+outputs:
+    key:
+        value: {{ get_property: [other_node, key] }}
+""".format(types_path, plugin_path), 'blueprint.yaml')
+
+    def test_identical_plan(self):
+        blueprint_path = self._blueprint_path()
+        plan = parse_from_path(blueprint_path)
+        self.assertIn('_schema_valid', self.checks)
+        self.assertIn('validate_functions', self.checks)
+        self.assertIn('exists', self.checks)
+        del self.checks[:]
+        trusted_plan = parse_from_path(blueprint_path,
+                                       trusted_fingerprint=plan.fingerprint)
+        self.assertEquals([], self.checks)
+        self.assertEquals(plan, trusted_plan)
+        node = self.get_node_by_name(trusted_plan, 'test_node')
+        self.assertEquals('scripts/create.sh',
+                          node['operations']['create']['inputs']
+                          ['script_path'])
+
+    def test_fingerprint_stable(self):
+        blueprint = self.BASIC_VERSION_SECTION_DSL_1_0 + \
+            self.BLUEPRINT_WITH_INTERFACES_AND_PLUGINS
+        fingerprint = parse(blueprint).fingerprint
+        self.assertEquals(64, len(fingerprint))
+        self.assertEquals(fingerprint, parse(blueprint).fingerprint)
+        self.assertNotEqual(
+            fingerprint, parse(blueprint.replace('val', 'other')).fingerprint)
+        self.assertNotEqual(
+            fingerprint, parse(blueprint, 'http://localhost/').fingerprint)
+
+    def test_changed_import_not_trusted(self):
+        blueprint_path = self._blueprint_path()
+        fingerprint = parse_from_path(blueprint_path).fingerprint
+        self.make_file_with_name(self.BASIC_TYPE + """
+    other_type: {}""", 'types.yaml')
+        del self.checks[:]
+        plan = parse_from_path(blueprint_path,
+                               trusted_fingerprint=fingerprint)
+        self.assertNotEquals(fingerprint, plan.fingerprint)
+        self.assertIn('validate_functions', self.checks)
+
+    def test_invalid_blueprint_not_trusted(self):
+        blueprint = self.BASIC_VERSION_SECTION_DSL_1_0 + \
+            self.BLUEPRINT_WITH_INTERFACES_AND_PLUGINS
+        fingerprint = parse(blueprint).fingerprint
+        ex = self.assertRaises(DSLParsingFormatException, parse,
+                               blueprint + """
+unknown_section: {}""", trusted_fingerprint=fingerprint)
+        self.assertEquals(1, ex.err_code)
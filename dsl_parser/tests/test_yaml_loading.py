@@ -0,0 +1,187 @@
+########
+# Copyright (c) 2015 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+import unittest
+
+import yaml
+
+from dsl_parser import parser
+from dsl_parser.exceptions import DSLParsingFormatException
+from dsl_parser.tests.abstract_test_parser import AbstractTestParser
+
+VALID_YAMLS = [
+    '',
+    '# only a comment',
+    'key: value',
+    """
+anchors:
+    base: &base
+        a: 1
+        b: [1, 2, 3]
+    derived:
+        <<: *base
+        b: overridden
+    alias: *base
+""",
+    """
+scalars:
+    - 1
+    - -1.5
+    - 1e3
+    - .inf
+    - -.inf
+    - 0x1f
+    - 017
+    - 1:20
+    - yes
+    - No
+    - off
+    - ~
+    - null
+    - 2015-01-01
+    - 2015-01-01 10:20:30.5
+    - '2015-01-01'
+    - "quoted \\t string"
+    - !!str 123
+    - !!float 1
+    - !!binary aGVsbG8=
+""",
+    u"""
+unicode:
+    hebrew: \u05e9\u05dc\u05d5\u05dd
+    ascii: plain
+    escaped: "\\u263a"
+""".encode('utf-8'),
+    """
+multiline:
+    literal: |
+        line 1
+          line 2
+    folded: >
+        folded
+        text
+
+        paragraph
+    stripped: |-
+        no trailing newline
+    kept: |+
+        trailing newlines
+
+""",
+    """
+flow: {a: [1, {b: c}], 'd e': f}
+nested:
+    -   - - deep
+    -   ? complex key
+        : value
+sets: !!set {a, b}
+omap: !!omap [a: 1, b: 2]
+""",
+    """
+first: document
+---
+second: document
+""",
+]
+
+MALFORMED_YAMLS = [
+    'key: [unclosed',
+    'key: {unclosed',
+    'key: value\n  bad indentation: here',
+    '- item\nkey: value',
+    'key: "unclosed',
+    'key:\tvalue\n\tother: 1',
+    '*undefined_alias',
+    'key: !!python/object:os.system echo',
+    'key: value\n---\n: [',
+    'key: \xc3\x28 invalid utf-8',
+    '@reserved',
+]
+
+
+def _typed(value):
+    """value, along with the types of all its members"""
+    if isinstance(value, dict):
+        return dict((_typed(k), _typed(v)) for k, v in value.iteritems())
+    if isinstance(value, (list, tuple)):
+        return [_typed(v) for v in value]
+    return type(value), value
+
+
+@unittest.skipUnless(hasattr(yaml, 'CSafeLoader'), 'libyaml is not available')
+class TestYamlLoadingParity(AbstractTestParser):
+
+    def _load(self, loader, yaml_string):
+        original_loader = parser._YAML_LOADER
+        parser._YAML_LOADER = loader
+        try:
+            return parser._load_yaml(yaml_string, 'Failed to parse DSL')
+        except Exception, ex:
+            return type(ex), str(ex), getattr(ex, 'err_code', None)
+        finally:
+            parser._YAML_LOADER = original_loader
+
+    def _assert_parity(self, yaml_string):
+        expected = self._load(yaml.SafeLoader, yaml_string)
+        actual = self._load(yaml.CSafeLoader, yaml_string)
+        self.assertEquals(_typed(expected), _typed(actual),
+                          'different result for {0!r}'.format(yaml_string))
+        return actual
+
+    def test_libyaml_used(self):
+        self.assertIs(yaml.CSafeLoader, parser._YAML_LOADER)
+
+    def test_valid_yamls(self):
+        for yaml_string in VALID_YAMLS[:-1]:
+            result = self._assert_parity(yaml_string)
+            self.assertIsInstance(result, dict)
+        # multiple documents are an error in both
+        result = self._assert_parity(VALID_YAMLS[-1])
+        self.assertIsInstance(result, tuple)
+
+    def test_test_blueprints(self):
+        yaml_strings = [value for name, value
+                        in vars(AbstractTestParser).iteritems()
+                        if name.isupper() and isinstance(value, str)]
+        self.assertGreater(len(yaml_strings), 5)
+        for yaml_string in yaml_strings:
+            self._assert_parity(yaml_string)
+
+    def test_malformed_yamls(self):
+        for yaml_string in MALFORMED_YAMLS:
+            result = self._assert_parity(yaml_string)
+            self.assertIsInstance(result, tuple)
+
+    def test_malformed_yaml_format_exception(self):
+        for loader in [yaml.SafeLoader, yaml.CSafeLoader]:
+            exception_type, _, err_code = self._load(loader,
+                                                     MALFORMED_YAMLS[0])
+            self.assertIs(DSLParsingFormatException, exception_type)
+            self.assertEquals(-1, err_code)
+
+    def test_large_blueprint(self):
+        node_templates = ''.join("""
+    node{0}:
+        type: test_type
+        properties:
+            key: "value {0}"
+            list: [1, 2.5, true, null, 'x']
+        relationships:
+            -   type: cloudify.relationships.depends_on
+                target: node{1}
+""".format(i, i - 1) for i in range(1000))
+        self._assert_parity(self.BASIC_VERSION_SECTION_DSL_1_0 +
+                            self.BASIC_TYPE + """
+node_templates:""" + node_templates)
@@ -0,0 +1,225 @@
+########
+# Copyright (c) 2015 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+import testtools
+
+from dsl_parser import parser
+from dsl_parser import yaml_stream
+from dsl_parser.exceptions import DSLParsingException
+from dsl_parser.parser import parse, parse_from_path
+from dsl_parser.tests.abstract_test_parser import AbstractTestParser
+
+BLUEPRINT = """
+tosca_definitions_version: cloudify_dsl_1_1
+inputs:
+    port:
+        default: 8080
+node_templates:
+    host:
+        type: cloudify.nodes.Compute
+        properties: &host_properties
+            ip: 10.0.0.1
+    server:
+        type: web_server
+        properties:
+            port: { get_input: port }
+        instances:
+            deploy: 2
+        relationships:
+            -   type: cloudify.relationships.contained_in
+                target: host
+    other_host:
+        type: cloudify.nodes.Compute
+        properties: *host_properties
+plugins:
+    test_plugin:
+        executor: host_agent
+        source: dummy
+node_types:
+    cloudify.nodes.Compute:
+        properties:
+            ip:
+                default: ''
+    web_server:
+        properties:
+            port: {}
+        interfaces:
+            lifecycle:
+                start: test_plugin.start
+relationships:
+    cloudify.relationships.contained_in: {}
+groups:
+    servers:
+        members: [server]
+        policies: {}
+outputs:
+    ip:
+        value: { get_attribute: [host, ip] }
+"""
+
+
+def _comparable(plan):
+    plan = dict(plan)
+    del plan['fingerprint']
+    plan['nodes'] = sorted(plan['nodes'], key=lambda node: node['id'])
+    return plan
+
+
+class TestLoadStreamed(testtools.TestCase):
+
+    def test_load_streamed(self):
+        document, nodes = yaml_stream.load_streamed(BLUEPRINT,
+                                                    'node_templates')
+        self.assertEquals({}, document['node_templates'])
+        self.assertEquals({'default': 8080}, document['inputs']['port'])
+        self.assertEquals(['host', 'server', 'other_host'], nodes.names)
+        self.assertEquals(3, len(nodes))
+        templates = list(nodes)
+        self.assertEquals(['host', 'server', 'other_host'],
+                          [name for name, _ in templates])
+        self.assertEquals({'ip': '10.0.0.1'}, templates[2][1]['properties'])
+        # every iteration loads the templates again
+        self.assertEquals(templates, list(nodes))
+        self.assertIsNot(templates[0][1], list(nodes)[0][1])
+
+    def test_anchors_outside_section(self):
+        document, nodes = yaml_stream.load_streamed("""
+defaults: &defaults {type: test_type}
+node_templates:
+    node: *defaults
+after: *defaults
+""", 'node_templates')
+        self.assertEquals({'type': 'test_type'}, document['after'])
+        self.assertEquals([('node', {'type': 'test_type'})], list(nodes))
+
+    def test_not_streamed(self):
+        for content in [
+                '',
+                '- item',
+                'key: [unclosed',
+                'key: value',
+                'node_templates: null',
+                'node_templates: [node]',
+                'node_templates: {node: 1, node: 2}',
+                'node_templates: {1: node}',
+                'node_templates: {}\nnode_templates: {}',
+                'node_templates: &section {}',
+                'node_templates: {node: &anchor {}}\nother: *anchor',
+                'node_templates: {node: {}}\n---\nnode_templates: {}']:
+            self.assertIsNone(
+                yaml_stream.load_streamed(content, 'node_templates'),
+                'streamed {0!r}'.format(content))
+
+
+class TestStreamingParse(AbstractTestParser):
+
+    def _assert_same_result(self, dsl_string):
+        def result(streaming):
+            try:
+                return _comparable(parse(dsl_string, streaming=streaming))
+            except DSLParsingException, ex:
+                return type(ex), str(ex), ex.err_code
+        expected = result(False)
+        self.assertEquals(expected, result(True))
+        return expected
+
+    def test_same_plan(self):
+        plan = self._assert_same_result(BLUEPRINT)
+        self.assertEquals(3, len(plan['nodes']))
+
+    def test_same_errors(self):
+        for dsl_string in [
+                BLUEPRINT.replace('target: host', 'target: missing'),
+                BLUEPRINT.replace('type: web_server', 'type: missing'),
+                BLUEPRINT.replace('deploy: 2', 'deploy: two'),
+                BLUEPRINT.replace('instances:', 'unknown: 1\n        '
+                                                'instances:'),
+                BLUEPRINT.replace('members: [server]',
+                                  'members: [missing]'),
+                BLUEPRINT.replace('    host:\n', '    host: [1]\n', 1),
+                BLUEPRINT.replace('plugins:', 'plugins: [1]\nold_plugins:'),
+                BLUEPRINT + 'node_templates: {}',
+                BLUEPRINT.replace('port: {}', 'port: [1')]:
+            result = self._assert_same_result(dsl_string)
+            self.assertIsInstance(result, tuple)
+
+    def test_node_template_schema_error_path(self):
+        ex = self._assert_dsl_parsing_exception_error_code(
+            BLUEPRINT.replace('deploy: 2', 'deploy: two'), 1,
+            parsing_method=lambda dsl: parse(dsl, streaming=True))
+        self.assertIn('Path to error: node_templates.server.instances.deploy',
+                      str(ex))
+
+    def test_imports(self):
+        imports = self.create_yaml_with_imports([self.BASIC_PLUGIN,
+                                                 self.BASIC_TYPE])
+        dsl_string = self.BASIC_VERSION_SECTION_DSL_1_0 + imports + \
+            self.BASIC_NODE_TEMPLATES_SECTION
+        plan = self._assert_same_result(dsl_string)
+        self.assertEquals('test_node', plan['nodes'][0]['id'])
+
+    def test_parse_from_path(self):
+        dsl_path = self.make_yaml_file(BLUEPRINT)
+        self.assertEquals(
+            _comparable(parse_from_path(dsl_path)),
+            _comparable(parse_from_path(dsl_path, streaming=True)))
+
+    def test_templates_processed_as_loaded(self):
+        events = []
+        original_iter = yaml_stream.StreamedSection.__iter__
+        original_process_node = parser._process_node
+
+        def recording_iter(section):
+            for name, node in original_iter(section):
+                events.append(('loaded', name))
+                yield name, node
+
+        def recording_process_node(node_name, *args, **kwargs):
+            events.append(('processed', node_name))
+            return original_process_node(node_name, *args, **kwargs)
+        yaml_stream.StreamedSection.__iter__ = recording_iter
+        self.addCleanup(setattr, yaml_stream.StreamedSection, '__iter__',
+                        original_iter)
+        parser._process_node = recording_process_node
+        self.addCleanup(setattr, parser, '_process_node',
+                        original_process_node)
+
+        parse(BLUEPRINT, streaming=True)
+        self.assertEquals([('loaded', 'host'), ('processed', 'host'),
+                           ('loaded', 'server'), ('processed', 'server'),
+                           ('loaded', 'other_host'),
+                           ('processed', 'other_host')], events)
+
+    def test_fingerprint(self):
+        plan = parse(BLUEPRINT)
+        streamed_plan = parse(BLUEPRINT, streaming=True)
+        self.assertNotEquals(plan.fingerprint, streamed_plan.fingerprint)
+        self.assertEquals(streamed_plan.fingerprint,
+                          parse(BLUEPRINT, streaming=True).fingerprint)
+        self.assertNotEquals(
+            streamed_plan.fingerprint,
+            parse(BLUEPRINT.replace('10.0.0.1', '10.0.0.2'),
+                  streaming=True).fingerprint)
+        trusted_plan = parse(BLUEPRINT, streaming=True,
+                             trusted_fingerprint=streamed_plan.fingerprint)
+        self.assertEquals(_comparable(streamed_plan),
+                          _comparable(trusted_plan))
+
+    def test_not_streamed_blueprint(self):
+        # anchors defined in node templates and used outside of them
+        dsl_string = BLUEPRINT + """
+extra_host_properties: *host_properties
+"""
+        self._assert_same_result(dsl_string)
@@ -28,7 +28,12 @@ def flatten_schema(schema):
     flattened_schema_props = {}
     for prop_key, prop in schema.iteritems():
         if 'default' in prop:
-            flattened_schema_props[prop_key] = prop['default']
+            default = prop['default']
+            if isinstance(default, (dict, list)):
+                # schemas of complete types are shared, their defaults are
+                # copied so every instance gets its own
+                default = copy.deepcopy(default)
+            flattened_schema_props[prop_key] = default
         else:
             flattened_schema_props[prop_key] = None
     return flattened_schema_props
@@ -118,52 +123,195 @@ def extract_complete_type_recursive(dsl_type,
 
     """
     This method is applicable to both types and relationships.
-    it's concerned with extracting the super types recursively,
+    it's concerned with extracting the super types,
     where the merging_func parameter is used
-    to merge them with the current type
+    to merge them with the current type.
+    Despite its name, the super types are extracted without recursion.
 
     :param dsl_type:
     :param dsl_type_name:
     :param dsl_container:
     :param merging_func:
     :param is_relationships:
-    :param visited_type_names:
+    :param visited_type_names: the names of the types already visited on
+                               the way to this type.
     :return:
     """
 
-    if not visited_type_names:
-        visited_type_names = []
-    if dsl_type_name in visited_type_names:
-        visited_type_names.append(dsl_type_name)
-        ex = DSLParsingLogicException(
-            100, 'Failed parsing {0} {1}, Circular dependency detected: {2}'
-                 .format('relationship' if is_relationships else 'type',
-                         dsl_type_name,
-                         ' --> '.join(visited_type_names)))
-        ex.circular_dependency = visited_type_names
-        raise ex
+    ancestry = _ancestry(dsl_type_name, dsl_container, is_relationships,
+                         dsl_type=dsl_type,
+                         visited_type_names=visited_type_names)
+    dsl_types = [dsl_type] + [dsl_container[super_type_name]
+                              for super_type_name in ancestry[1:]]
+    # merging functions only replace top level keys of the overriding type,
+    # so the levels are copied shallowly, and the result once
+    complete_type = dict(dsl_types.pop())
+    while dsl_types:
+        complete_type = merging_func(complete_type, dict(dsl_types.pop()))
+    return copy.deepcopy(complete_type)
+
+
+class CompleteTypes(object):
+    """
+    The complete types of a types section (node types or relationships),
+    i.e. its types merged with all of their ancestors, as
+    extract_complete_type_recursive merges them.
+
+    Every type is completed once, when it is first looked up, on top of its
+    already complete parent, so each type hierarchy is resolved once rather
+    than for every node or relationship of the type. Complete types are
+    shared by all lookups, and share whatever they do not override with
+    their parents and with the types section, so they should not be
+    modified.
+    """
+
+    def __init__(self, dsl_container, merging_func, is_relationships,
+                 prepare_root_func=None):
+        """
+        :param prepare_root_func: called with every type which is not
+                                  derived from another before it is
+                                  completed.
+        """
+        self._dsl_container = dsl_container
+        self._merging_func = merging_func
+        self._is_relationships = is_relationships
+        self._prepare_root_func = prepare_root_func
+        self._complete_types = {}
+
+    def get(self, dsl_type_name):
+        ancestry = _ancestry(dsl_type_name, self._dsl_container,
+                             self._is_relationships,
+                             resolved=self._complete_types)
+        # complete the types from the topmost one not yet complete down
+        for type_name in reversed(ancestry):
+            dsl_type = self._dsl_container[type_name]
+            if 'derived_from' not in dsl_type:
+                if self._prepare_root_func:
+                    self._prepare_root_func(dsl_type)
+                complete_type = dict(dsl_type)
+            else:
+                complete_type = self._merging_func(
+                    self._complete_types[dsl_type['derived_from']],
+                    dict(dsl_type))
+            self._complete_types[type_name] = complete_type
+        return self._complete_types[dsl_type_name]
+
+
+class TypeHierarchies(object):
+    """
+    The hierarchies of the types of a types section (node types or
+    relationships).
+
+    Every type's hierarchy is computed once, and whether types are derived
+    from a type is computed once for each type, so whether a type is derived
+    from another is answered without walking up its derived_from chain
+    again.
+    """
+
+    def __init__(self, dsl_container, is_relationships):
+        self._dsl_container = dsl_container
+        self._is_relationships = is_relationships
+        self._hierarchies = {}
+        # super type name -> type name -> whether derived from super type
+        self._derived_from = {}
+
+    def hierarchy(self, dsl_type_name):
+        """
+        The type names from the root of the type's hierarchy down to the
+        type itself. Hierarchies are shared by all lookups, and should not
+        be modified.
+        """
+        ancestry = _ancestry(dsl_type_name, self._dsl_container,
+                             self._is_relationships,
+                             resolved=self._hierarchies)
+        if not ancestry:
+            return self._hierarchies[dsl_type_name]
+        # only the hierarchy of the type itself is kept, rather than those
+        # of all of its ancestors, which would be quadratic in its depth
+        super_type_name = self._dsl_container[ancestry[-1]].get(
+            'derived_from')
+        hierarchy = self._hierarchies.get(super_type_name, [])[:]
+        hierarchy.extend(reversed(ancestry))
+        self._hierarchies[dsl_type_name] = hierarchy
+        return hierarchy
+
+    def is_derived_from(self, dsl_type_name, super_type_name):
+        """Whether the type is, or is derived from, super_type_name."""
+        derived_from = self._derived_from.setdefault(super_type_name,
+                                                     {super_type_name: True})
+        # the types up to the first one already known to be derived from
+        # super_type_name or not
+        ancestry = _ancestry(dsl_type_name, self._dsl_container,
+                             self._is_relationships,
+                             resolved=derived_from)
+        if not ancestry:
+            return derived_from[dsl_type_name]
+        resolved_type_name = self._dsl_container[ancestry[-1]].get(
+            'derived_from')
+        is_derived = derived_from.get(resolved_type_name, False)
+        for type_name in ancestry:
+            derived_from[type_name] = is_derived
+        return is_derived
+
+    def descendants(self, super_type_name):
+        """The names of the types derived from super_type_name, itself
+        included if it is defined."""
+        return set(dsl_type_name for dsl_type_name in self._dsl_container
+                   if self.is_derived_from(dsl_type_name, super_type_name))
+
+
+def _ancestry(dsl_type_name, dsl_container, is_relationships,
+              resolved=(), dsl_type=None, visited_type_names=None):
+    """
+    The names of the type and of its ancestors, from the type itself up to
+    its root type, or up to (and excluding) the first one in resolved.
+    The derived_from chain is walked iteratively, so its depth is not
+    bounded by the recursion limit.
+
+    :param dsl_type: the type, if not dsl_container[dsl_type_name].
+    :param visited_type_names: names to report as visited before the type
+                               in circular dependency errors.
+    """
+    ancestry = list(visited_type_names or [])
+    visited = set(ancestry)
+    start = len(ancestry)
+    while dsl_type_name not in resolved:
+        if dsl_type_name in visited:
+            raise _circular_dependency_error(dsl_type_name, ancestry,
+                                             is_relationships)
+        visited.add(dsl_type_name)
+        ancestry.append(dsl_type_name)
+        if dsl_type is None:
+            dsl_type = dsl_container[dsl_type_name]
+        if 'derived_from' not in dsl_type:
+            break
+        super_type_name = dsl_type['derived_from']
+        if super_type_name not in dsl_container and \
+                super_type_name not in resolved:
+            raise _missing_super_type_error(super_type_name, dsl_type_name,
+                                            is_relationships)
+        dsl_type_name = super_type_name
+        dsl_type = None
+    return ancestry[start:]
+
+
+def _circular_dependency_error(dsl_type_name, visited_type_names,
+                               is_relationships):
     visited_type_names.append(dsl_type_name)
-    current_level_type = copy.deepcopy(dsl_type)
+    ex = DSLParsingLogicException(
+        100, 'Failed parsing {0} {1}, Circular dependency detected: {2}'
+             .format('relationship' if is_relationships else 'type',
+                     dsl_type_name,
+                     ' --> '.join(visited_type_names)))
+    ex.circular_dependency = visited_type_names
+    return ex
 
-    # halt condition
-    if 'derived_from' not in current_level_type:
-        return current_level_type
 
-    super_type_name = current_level_type['derived_from']
-    if super_type_name not in dsl_container:
-        raise DSLParsingLogicException(
-            14, 'Missing definition for {0} {1} which is declared as derived '
-                'by {0} {2}'
-                .format('relationship' if is_relationships else 'type',
-                        super_type_name,
-                        dsl_type_name))
-
-    super_type = dsl_container[super_type_name]
-    complete_super_type = extract_complete_type_recursive(
-        dsl_type=super_type,
-        dsl_type_name=super_type_name,
-        dsl_container=dsl_container,
-        merging_func=merging_func,
-        visited_type_names=visited_type_names,
-        is_relationships=is_relationships)
-    return merging_func(complete_super_type, current_level_type)
+def _missing_super_type_error(super_type_name, dsl_type_name,
+                              is_relationships):
+    return DSLParsingLogicException(
+        14, 'Missing definition for {0} {1} which is declared as derived '
+            'by {0} {2}'
+            .format('relationship' if is_relationships else 'type',
+                    super_type_name,
+                    dsl_type_name))
@@ -0,0 +1,187 @@
+########
+# Copyright (c) 2015 GigaSpaces Technologies Ltd. All rights reserved
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+#    * WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    * See the License for the specific language governing permissions and
+#    * limitations under the License.
+
+import yaml
+from yaml.composer import Composer
+from yaml.constructor import SafeConstructor
+from yaml.events import (AliasEvent,
+                         DocumentEndEvent,
+                         MappingEndEvent,
+                         MappingStartEvent,
+                         SequenceEndEvent,
+                         SequenceStartEvent,
+                         StreamEndEvent)
+from yaml.nodes import MappingNode, ScalarNode
+from yaml.resolver import Resolver
+
+_MAP_TAG = u'tag:yaml.org,2002:map'
+
+# events are produced by libyaml when available, and composed into nodes
+# here, so nodes can be composed and constructed one at a time
+try:
+    from yaml.cyaml import CParser
+
+    class _Loader(CParser, Composer, SafeConstructor, Resolver):
+
+        def __init__(self, stream):
+            CParser.__init__(self, stream)
+            Composer.__init__(self)
+            SafeConstructor.__init__(self)
+            Resolver.__init__(self)
+except ImportError:
+    _Loader = yaml.SafeLoader
+
+
+def load_streamed(content, section):
+    """
+    Load a YAML document, except for the items of one of its top level
+    sections, which are loaded one at a time when they are iterated, rather
+    than along with the rest of the document.
+
+    :return: (document, StreamedSection), where the section is an empty
+             dict in document. None if content cannot be loaded this way,
+             in which case it should be loaded whole, e.g. when it is not a
+             single mapping, the section has duplicate or non string
+             names, or anchors defined in the section are used outside it.
+    """
+    loader = _Loader(content)
+    try:
+        return _load_skeleton(loader, content, section)
+    except yaml.YAMLError:
+        # the error is reported when the document is loaded whole
+        return None
+    finally:
+        loader.dispose()
+
+
+class StreamedSection(object):
+    """
+    The items of a section of a YAML document. Every iteration loads the
+    items again, one at a time, so only the current item is kept in memory.
+    """
+
+    def __init__(self, content, section, names):
+        self.content = content
+        self._section = section
+        self.names = names
+
+    def __iter__(self):
+        loader = _Loader(self.content)
+        try:
+            for key_node in _top_level_keys(loader):
+                if loader.construct_document(key_node) != self._section:
+                    # composed all the same, for the anchors it defines
+                    loader.compose_node(None, None)
+                    continue
+                loader.get_event()
+                while not loader.check_event(MappingEndEvent):
+                    name = loader.construct_document(
+                        loader.compose_node(None, None))
+                    yield name, loader.construct_document(
+                        loader.compose_node(None, None))
+                loader.get_event()
+        finally:
+            loader.dispose()
+
+    def __len__(self):
+        return len(self.names)
+
+
+def _load_skeleton(loader, content, section):
+    pairs = []
+    names = None
+    for key_node in _top_level_keys(loader):
+        if key_node is None:
+            return None
+        if not isinstance(key_node, ScalarNode) or \
+                loader.construct_document(key_node) != section:
+            pairs.append((key_node, loader.compose_node(None, None)))
+            continue
+        if names is not None or not _starts_plain_mapping(loader):
+            return None
+        names = _skip_section(loader)
+        if names is None:
+            return None
+        pairs.append((key_node, MappingNode(_MAP_TAG, [])))
+    if names is None or not loader.check_event(StreamEndEvent):
+        return None
+    document = loader.construct_document(MappingNode(_MAP_TAG, pairs))
+    return document, StreamedSection(content, section, names)
+
+
+def _top_level_keys(loader):
+    """
+    The key nodes of the top level mapping, after each of which its value
+    should be consumed. Yields None if the document is not a mapping.
+    """
+    loader.get_event()
+    if loader.check_event(StreamEndEvent):
+        yield None
+        return
+    loader.get_event()
+    if not _starts_plain_mapping(loader):
+        yield None
+        return
+    loader.get_event()
+    while not loader.check_event(MappingEndEvent):
+        yield loader.compose_node(None, None)
+    loader.get_event()
+    if loader.check_event(DocumentEndEvent):
+        loader.get_event()
+
+
+def _starts_plain_mapping(loader):
+    if not loader.check_event(MappingStartEvent):
+        return False
+    event = loader.peek_event()
+    return event.anchor is None and event.tag is None
+
+
+def _skip_section(loader):
+    """
+    Skip the items of a section, returning their names, or None if they
+    are not uniquely named by strings.
+    """
+    loader.get_event()
+    names = []
+    while not loader.check_event(MappingEndEvent):
+        name_node = loader.compose_node(None, None)
+        if not isinstance(name_node, ScalarNode) or \
+                name_node.tag == u'tag:yaml.org,2002:merge':
+            return None
+        names.append(loader.construct_document(name_node))
+        _skip_node(loader)
+    loader.get_event()
+    if len(set(names)) != len(names) or \
+            not all(isinstance(name, basestring) for name in names):
+        return None
+    return names
+
+
+def _skip_node(loader):
+    depth = 0
+    while True:
+        event = loader.get_event()
+        if not isinstance(event, AliasEvent) and \
+                getattr(event, 'anchor', None) is not None:
+            # using the anchor outside the section fails the load, rather
+            # than using the node it was skipped for
+            loader.anchors.pop(event.anchor, None)
+        if isinstance(event, (MappingStartEvent, SequenceStartEvent)):
+            depth += 1
+        elif isinstance(event, (MappingEndEvent, SequenceEndEvent)):
+            depth -= 1
+        if depth == 0:
+            return